@@ -1,12 +1,99 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING
 
-from .routers import products, chat, admin
+if TYPE_CHECKING:
+    from fastapi import FastAPI
 
+# Submodules (`app.schemas`, `app.cli`, ...) import this package first, so
+# the web framework, routers and services are only imported when an app is
+# built.
+
+
+async def _warm_up() -> None:
+    """
+    Load what the first requests would otherwise pay for: the catalogue and
+    its BM25 index (so chat requests never query products), the vector
+    index and the LLM clients.
+    """
+    from .db.session import AsyncSessionLocal
+    from .services import vectorstore
+    from .services.lexical import lexical_index
+    from .services.llm_gateway import gateway
+    from .services.product_cache import product_cache
+
+    # Loads only if stale: a snapshot preloaded by the master is kept.
+    async with AsyncSessionLocal() as db:
+        lexical_index.sync(await product_cache.all_async(db))
+    await asyncio.to_thread(vectorstore.warm_up)
+    gateway.warm_up()
+
+
+def preload() -> None:
+    """
+    Build the read-only catalogue structures in a master process before it
+    forks workers (gunicorn's `preload_app`, see gunicorn.conf.py): product
+    records, rendered documents and the BM25 index, plus the NumPy vector
+    index mapping. Workers inherit them copy-on-write and keep them until
+    the catalogue version moves.
+    """
+    import gc
+
+    from .core.config import get_settings
+    from .db.schema import create_schema
+    from .db.session import SessionLocal, engine
+    from .services import catalogue, vectorstore
+    from .services.lexical import lexical_index
+    from .services.product_cache import product_cache
+
+    create_schema(engine)
+    # ETags from an earlier deployment must not match this one's.
+    catalogue.new_epoch()
+    with SessionLocal() as db:
+        lexical_index.sync(product_cache.all(db))
+    # Chroma starts threads and opens SQLite; it is opened in each worker.
+    if get_settings().vector_store_backend == "numpy":
+        vectorstore.warm_up()
+    # Pooled connections must not be shared with the forked workers.
+    engine.dispose()
+    # Move everything allocated so far out of the collector's reach, so
+    # collections in the workers don't write to (and copy) those pages.
+    gc.freeze()
+
+
+@asynccontextmanager
+async def lifespan(app: "FastAPI"):
+    from .core.config import get_settings
+    from .core.http import close_async_http_client
+    from .db.schema import create_schema
+    from .db.session import async_engine, engine
+    from .services.jobs import jobs
+    from .services.llm_gateway import gateway
+    from .services.safety import flush_safety_cache
+
+    # Ensure tables exist (simple for assignment; in production use migrations)
+    await asyncio.to_thread(create_schema, engine)
+    if get_settings().startup_warmup:
+        await _warm_up()
+    yield
+    # Stop this worker's admin jobs at their next progress report.
+    await asyncio.to_thread(jobs.shutdown)
+    await asyncio.to_thread(flush_safety_cache)
+    # Release pooled connections held by the async request path.
+    await close_async_http_client()
+    await gateway.aclose()
+    await async_engine.dispose()
+
+
+def create_app() -> "FastAPI":
+    from fastapi import FastAPI
+
+    from .routers import products, chat, admin
 
-def create_app() -> FastAPI:
     app = FastAPI(
         title="Traya Product Discovery Assistant",
         version="0.1.0",
+        lifespan=lifespan,
     )
 
     app.include_router(products.router, prefix="/products", tags=["products"])
@@ -14,5 +101,3 @@ def create_app() -> FastAPI:
     app.include_router(admin.router, prefix="/admin", tags=["admin"])
 
     return app
-
-
@@ -0,0 +1,148 @@
+"""
+Command-line entry points. Run from `backend/`:
+
+    python -m app.cli chat-batch queries.jsonl [-o results.ndjson] [--url URL]
+
+`chat-batch` replays logged conversations through the batch chat pipeline,
+in-process by default or against a running server's `POST /chat/batch`
+with `--url` (which also warms that server's caches). Each input line is a
+JSON object with either `messages` (a list of `{role, content}`) or a single
+user message in `query`, `content`, `message` or `body`; an `id` or
+`request_id` is echoed back. Output is NDJSON, one `ChatBatchResult` per
+line, in completion order.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import IO, Any, Dict, Iterator, List, Optional
+
+from app.schemas.chat import ChatBatchItem, ChatBatchResult, ChatMessage
+
+
+_TEXT_KEYS = ("query", "content", "message", "body")
+
+
+def _item(record: Dict[str, Any]) -> ChatBatchItem:
+    item_id = record.get("id", record.get("request_id"))
+    if "messages" in record:
+        messages = [ChatMessage.model_validate(m) for m in record["messages"]]
+    else:
+        text = next((record[k] for k in _TEXT_KEYS if isinstance(record.get(k), str)), None)
+        if text is None:
+            raise ValueError(f"no messages or query text in {sorted(record)}")
+        messages = [ChatMessage(role="user", content=text)]
+    return ChatBatchItem(id=None if item_id is None else str(item_id), messages=messages)
+
+
+def _read_items(source: IO[str]) -> List[ChatBatchItem]:
+    items = []
+    for number, line in enumerate(source, start=1):
+        if not line.strip():
+            continue
+        try:
+            items.append(_item(json.loads(line)))
+        except ValueError as exc:
+            raise SystemExit(f"line {number}: {exc}")
+    return items
+
+
+def _chunks(items: List[ChatBatchItem], size: int) -> Iterator[List[ChatBatchItem]]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+async def _run_local(items: List[ChatBatchItem], batch_size: int, out: IO[str]) -> int:
+    from app.core.config import get_settings
+    from app.core.http import close_async_http_client
+    from app.db.session import AsyncSessionLocal, async_engine
+    from app.services.rag import run_rag_chat_batch
+
+    concurrency = get_settings().chat_batch_concurrency
+    errors = 0
+    offset = 0
+    try:
+        async with AsyncSessionLocal() as db:
+            for chunk in _chunks(items, batch_size):
+                results = run_rag_chat_batch(db, [i.messages for i in chunk], concurrency)
+                async for index, result in results:
+                    line = ChatBatchResult(index=offset + index, id=chunk[index].id)
+                    if isinstance(result, Exception):
+                        errors += 1
+                        line.error = f"{type(result).__name__}: {result}"
+                    else:
+                        line.response = result
+                    out.write(line.model_dump_json(exclude_none=True) + "\n")
+                offset += len(chunk)
+    finally:
+        await close_async_http_client()
+        await async_engine.dispose()
+    return errors
+
+
+async def _run_remote(
+    items: List[ChatBatchItem], batch_size: int, out: IO[str], url: str
+) -> int:
+    import httpx
+
+    errors = 0
+    offset = 0
+    async with httpx.AsyncClient(base_url=url.rstrip("/"), timeout=None) as client:
+        for chunk in _chunks(items, batch_size):
+            body = {"items": [i.model_dump() for i in chunk]}
+            async with client.stream("POST", "/chat/batch", json=body) as response:
+                response.raise_for_status()
+                async for raw in response.aiter_lines():
+                    if not raw.strip():
+                        continue
+                    line = ChatBatchResult.model_validate_json(raw)
+                    line.index += offset
+                    errors += line.error is not None
+                    out.write(line.model_dump_json(exclude_none=True) + "\n")
+            offset += len(chunk)
+    return errors
+
+
+def chat_batch(args: argparse.Namespace) -> int:
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    with source:
+        items = _read_items(source)
+    out = sys.stdout if args.output is None else open(args.output, "w", encoding="utf-8")
+
+    started = time.perf_counter()
+    try:
+        if args.url:
+            errors = asyncio.run(_run_remote(items, args.batch_size, out, args.url))
+        else:
+            errors = asyncio.run(_run_local(items, args.batch_size, out))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - started
+    rate = len(items) / elapsed if elapsed else 0.0
+    print(
+        f"{len(items)} conversations, {errors} errors, {elapsed:.1f}s ({rate:.1f}/s)",
+        file=sys.stderr,
+    )
+    return 1 if errors else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    batch = commands.add_parser("chat-batch", help="replay conversations through /chat/batch")
+    batch.add_argument("input", help="JSONL file of conversations, or - for stdin")
+    batch.add_argument("-o", "--output", help="NDJSON results file (default: stdout)")
+    batch.add_argument("--url", help="base URL of a running server; default runs in-process")
+    batch.add_argument("--batch-size", type=int, default=200, help="conversations per batch")
+    batch.set_defaults(handler=chat_batch)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -15,8 +15,63 @@ class Settings(BaseSettings):
     # Optional custom base URL for OpenAI-compatible APIs (e.g. Groq)
     openai_base_url: str | None = None
 
+    # Startup. Clients, the vector store backend and the scraper's parsers
+    # are only loaded on first use; with `startup_warmup` each worker also
+    # loads the product cache, BM25 index, vector index and LLM clients
+    # before it reports ready, so its first requests don't pay for them.
+    startup_warmup: bool = True
+
+    # Catalogue version shared by the worker processes on a host (see
+    # services/catalogue.py); empty keeps it per process. Workers notice a
+    # bump made by another worker within `catalogue_version_check_s`.
+    catalogue_version_path: str | None = "./catalogue_version"
+    catalogue_version_check_s: float = 0.5
+
     # Vector store
+    # "chroma" (HNSW, via chromadb) or "numpy" (exact search over a
+    # memory-mapped matrix; no chromadb import at all).
+    vector_store_backend: str = "chroma"
     chroma_path: str = "./chroma_db"
+    numpy_store_path: str = "./vector_index"
+    # "persistent" stores the index on disk (at `chroma_path` or
+    # `numpy_store_path`) so it survives restarts and is shared by every
+    # worker; "ephemeral" keeps it in memory.
+    vector_store_mode: str = "persistent"
+    # Chroma calls are blocking; async callers run them on a pool this size.
+    vector_store_max_workers: int = 4
+
+    # Hybrid retrieval: merge BM25 keyword matches with the vector search
+    # using reciprocal rank fusion (score = sum of 1 / (rrf_k + rank)).
+    hybrid_search_enabled: bool = True
+    rrf_k: int = 60
+
+    # LLM gateway (chat and embeddings calls, see services/llm_gateway.py)
+    chat_model: str = "llama-3.1-8b-instant"
+    # Tried once the primary model's retries are exhausted (or it is gone).
+    chat_fallback_model: str | None = None
+    llm_connect_timeout_s: float = 5.0
+    llm_read_timeout_s: float = 60.0
+    llm_max_connections: int = 50
+    llm_max_in_flight: int = 16
+    # Requests per second across all LLM calls in this process; 0 = no limit.
+    llm_rate_per_s: float = 0.0
+    llm_burst: int = 10
+    llm_max_retries: int = 3
+    llm_backoff_base_s: float = 0.5
+    llm_backoff_max_s: float = 10.0
+    # Hedge non-streaming calls still running after the recent p95 latency.
+    llm_hedge_enabled: bool = False
+    llm_hedge_min_samples: int = 20
+
+    # Embeddings
+    embedding_model: str = "text-embedding-3-small"
+    # Max inputs per embeddings request (OpenAI accepts up to 2048).
+    embedding_batch_size: int = 128
+    # Max embeddings requests in flight at once for a single embed_texts call.
+    embedding_max_concurrency: int = 4
+    # On-disk cache keyed by (model, sha256(text)); ":memory:" disables persistence.
+    embedding_cache_path: str = "./embedding_cache.sqlite3"
+    embedding_cache_max_entries: int = 50_000
 
     # CORS
     cors_origins: List[AnyUrl] = []
@@ -24,6 +79,69 @@ class Settings(BaseSettings):
     # DuckDuckGo via SearchApi.io
     searchapi_api_key: str | None = None
     searchapi_base_url: str = "https://www.searchapi.io/api/v1/search"
+    # Safety lookups are cached per normalised query. Empty results / errors
+    # use the shorter negative TTL. Set a path to persist the cache on disk;
+    # changes are written at most every `safety_cache_save_s` and at shutdown.
+    safety_cache_ttl_s: float = 24 * 3600
+    safety_cache_negative_ttl_s: float = 600
+    safety_cache_max_entries: int = 2048
+    safety_cache_path: str | None = None
+    safety_cache_save_s: float = 5.0
+
+    # Traya scraper
+    traya_base_url: str = "https://traya.health"
+    crawler_max_concurrency: int = 8
+    # Requests per second to any single host.
+    crawler_per_host_rate: float = 10.0
+    crawler_max_retries: int = 3
+    # "auto" uses the fastest installed parser (lxml, then selectolax) and
+    # falls back to the standard library's html.parser.
+    html_parser_backend: str = "auto"
+    # Crawls with at least this many fresh pages are parsed in a process pool.
+    html_parse_pool_min_pages: int = 32
+    html_parse_max_workers: int | None = None
+
+    # Admin jobs (scrapes and index builds, see services/jobs.py). Running
+    # jobs write their progress every `admin_job_heartbeat_s`; an unfinished
+    # job without a heartbeat for `admin_job_stale_s` is marked failed.
+    admin_job_heartbeat_s: float = 1.0
+    admin_job_stale_s: float = 30.0
+    # "process" runs jobs in a spawned child process at `admin_job_nice`,
+    # "thread" on a thread of the worker; "auto" picks "process" when the
+    # vector index is shared on disk (persistent NumPy store). Without a
+    # `catalogue_version_path` jobs always run on a thread, as a child's
+    # catalogue bump would not reach the serving process.
+    admin_job_executor: str = "auto"
+    admin_job_nice: int = 10
+
+    # Chat pipeline stage deadlines (seconds, measured from when a stage starts).
+    # A safety search that misses its deadline is dropped and the reply is
+    # generated without web context.
+    retrieval_timeout_s: float = 5.0
+    safety_search_timeout_s: float = 2.5
+
+    # POST /chat/batch: max conversations per request and chat-model calls
+    # in flight at once for one batch.
+    chat_batch_max_items: int = 1000
+    chat_batch_concurrency: int = 8
+
+    # Conversation context (see services/conversation.py). Retrieval uses the
+    # last `chat_query_turns` user messages within `chat_query_max_tokens`;
+    # the prompt carries earlier turns up to `chat_history_max_tokens`.
+    chat_query_turns: int = 3
+    chat_query_max_tokens: int = 64
+    chat_history_max_tokens: int = 400
+    # Incoming chat bodies are cut to the last `chat_max_messages` messages,
+    # each to its last `chat_max_message_chars` characters, before validation.
+    chat_max_messages: int = 20
+    chat_max_message_chars: int = 2000
+
+    # Semantic answer cache: reuse a full answer for a paraphrased query with
+    # the same candidate products and safety intent. Off by default.
+    answer_cache_enabled: bool = False
+    answer_cache_similarity_threshold: float = 0.95
+    answer_cache_ttl_s: float = 3600
+    answer_cache_max_entries: int = 1000
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,28 @@
+from typing import Optional
+
+import httpx
+
+
+# One pooled client per process, so outbound calls on the request path reuse
+# keep-alive connections instead of paying a TCP/TLS handshake every time.
+_async_client: Optional[httpx.AsyncClient] = None
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """
+    Return the shared AsyncClient, creating it on first use.
+    """
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(10.0),
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        )
+    return _async_client
+
+
+async def close_async_http_client() -> None:
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
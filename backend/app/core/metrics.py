@@ -0,0 +1,244 @@
+import functools
+import inspect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+# Histogram resolution: 2**_SUB_BITS buckets per power of two, so a reported
+# quantile is within 1/2**(_SUB_BITS + 1) (~1.6%) of the true value.
+_SUB_BITS = 5
+_SUB = 1 << _SUB_BITS
+# Values are microseconds, clamped below 2**40 us (about 12 days).
+_MAX_BITS = 40
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _bucket(us: int) -> int:
+    """
+    Bucket index of a value in microseconds; values past the last bucket
+    land in it.
+    """
+    if us < _SUB:
+        return us if us > 0 else 0
+    shift = min(us.bit_length(), _MAX_BITS) - _SUB_BITS - 1
+    return _SUB * (shift + 1) + min(us >> shift, 2 * _SUB - 1) - _SUB
+
+
+def _bucket_value(index: int) -> float:
+    """
+    Midpoint of a bucket, in microseconds.
+    """
+    if index < _SUB:
+        return float(index)
+    shift = index // _SUB - 1
+    low = (index % _SUB + _SUB) << shift
+    return low + ((1 << shift) - 1) / 2
+
+
+class Histogram:
+    """
+    Log-linear latency histogram in the style of HdrHistogram: bucket width
+    grows with the value, so p50/p95/p99 keep the same relative precision
+    from microseconds to minutes in a fixed ~1k counters. Recording is one
+    index computation and a few increments under an uncontended lock.
+    """
+
+    def __init__(self) -> None:
+        self._counts = [0] * (_SUB * (_MAX_BITS - _SUB_BITS + 1))
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        index = _bucket(int(seconds * 1e6))
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.sum += seconds
+
+    def quantiles(self, qs: Iterable[float] = QUANTILES) -> Dict[float, float]:
+        """
+        Seconds at each quantile in `qs` (0.0 for an empty histogram).
+        """
+        with self._lock:
+            counts = list(self._counts)
+            total = self.count
+        result: Dict[float, float] = {}
+        if not total:
+            return {q: 0.0 for q in qs}
+        targets = sorted((max(1, math.ceil(q * total)), q) for q in qs)
+        seen = 0
+        pending = iter(targets)
+        target, q = next(pending)
+        for index, n in enumerate(counts):
+            seen += n
+            while seen >= target:
+                result[q] = _bucket_value(index) / 1e6
+                try:
+                    target, q = next(pending)
+                except StopIteration:
+                    return result
+        return result
+
+
+# (stage, seconds) pairs for the request being handled, if it asked for them.
+_request_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar(
+    "request_timings", default=None
+)
+
+_Labels = Tuple[Tuple[str, str], ...]
+
+
+class _Span:
+    __slots__ = ("_registry", "_name", "_started")
+
+    def __init__(self, registry: "Metrics", name: str) -> None:
+        self._registry = registry
+        self._name = name
+
+    def __enter__(self) -> "_Span":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._registry.observe(self._name, time.perf_counter() - self._started)
+
+
+class Metrics:
+    """
+    Process-wide stage latencies and counters.
+
+    `span(stage)` times a block into the stage's histogram (and into the
+    current request's `Server-Timing` list, see `request_timings`);
+    `incr` bumps a labelled counter. `render` writes everything in the
+    Prometheus text format. Histograms cover the whole process lifetime.
+    """
+
+    def __init__(self) -> None:
+        self._histograms: Dict[str, Histogram] = {}
+        self._counters: Dict[Tuple[str, _Labels], float] = {}
+        self._lock = threading.Lock()
+
+    def span(self, stage: str) -> _Span:
+        return _Span(self, stage)
+
+    def timed(self, stage: str) -> Callable[[F], F]:
+        """
+        Decorator form of `span` for a whole function, sync or async.
+        """
+
+        def decorate(func: F) -> F:
+            if inspect.iscoroutinefunction(func):
+
+                @functools.wraps(func)
+                async def run_async(*args: Any, **kwargs: Any) -> Any:
+                    with self.span(stage):
+                        return await func(*args, **kwargs)
+
+                return run_async  # type: ignore[return-value]
+
+            @functools.wraps(func)
+            def run(*args: Any, **kwargs: Any) -> Any:
+                with self.span(stage):
+                    return func(*args, **kwargs)
+
+            return run  # type: ignore[return-value]
+
+        return decorate
+
+    def observe(self, stage: str, seconds: float) -> None:
+        histogram = self._histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(stage, Histogram())
+        histogram.record(seconds)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((stage, seconds))
+
+    def incr(self, name: str, value: float = 1.0, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def histogram(self, stage: str) -> Optional[Histogram]:
+        return self._histograms.get(stage)
+
+    def render(self, gauges: Iterable[Tuple[str, Dict[str, str], float]] = ()) -> str:
+        """
+        Prometheus text exposition: stage latencies as a summary, counters,
+        and caller-supplied (name, labels, value) gauges, e.g. cache stats
+        read at scrape time.
+        """
+        lines: List[str] = []
+        if self._histograms:
+            lines.append("# TYPE app_stage_seconds summary")
+        for stage, histogram in sorted(self._histograms.items()):
+            for q, seconds in histogram.quantiles().items():
+                labels = {"stage": stage, "quantile": str(q)}
+                lines.append(_sample("app_stage_seconds", labels, seconds))
+            lines.append(_sample("app_stage_seconds_sum", {"stage": stage}, histogram.sum))
+            lines.append(_sample("app_stage_seconds_count", {"stage": stage}, histogram.count))
+
+        with self._lock:
+            counters = sorted(self._counters.items())
+        typed = set()
+        for (name, labels), value in counters:
+            if name not in typed:
+                lines.append(f"# TYPE app_{name} counter")
+                typed.add(name)
+            lines.append(_sample(f"app_{name}", dict(labels), value))
+
+        # Samples of one metric must be contiguous.
+        for name, labels, value in sorted(gauges, key=lambda gauge: gauge[0]):
+            if name not in typed:
+                lines.append(f"# TYPE app_{name} gauge")
+                typed.add(name)
+            lines.append(_sample(f"app_{name}", labels, value))
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _sample(name: str, labels: Dict[str, str], value: float) -> str:
+    if labels:
+        rendered = ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items())
+        name = f"{name}{{{rendered}}}"
+    return f"{name} {value:.9g}"
+
+
+@contextmanager
+def request_timings() -> Iterator[List[Tuple[str, float]]]:
+    """
+    Collect the spans recorded while handling one request, including those
+    in tasks it starts, for its `Server-Timing` header.
+    """
+    timings: List[Tuple[str, float]] = []
+    token = _request_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _request_timings.reset(token)
+
+
+def server_timing(timings: Iterable[Tuple[str, float]]) -> str:
+    """
+    `Server-Timing` header value, durations in milliseconds; repeated stages
+    are summed.
+    """
+    totals: Dict[str, float] = {}
+    for stage, seconds in timings:
+        totals[stage] = totals.get(stage, 0.0) + seconds
+    return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in totals.items())
+
+
+metrics = Metrics()
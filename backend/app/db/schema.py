@@ -0,0 +1,40 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+from app.db.session import Base
+
+
+def create_schema(engine: Engine) -> None:
+    """
+    Create missing tables, then apply the additive changes `create_all`
+    can't make to tables that already exist (simple for assignment; in
+    production use migrations).
+    """
+    # Register every model on Base.metadata.
+    import app.models  # noqa: F401
+
+    Base.metadata.create_all(bind=engine)
+
+    inspector = inspect(engine)
+    columns = {c["name"] for c in inspector.get_columns("products")}
+    indexes = {i["name"] for i in inspector.get_indexes("products")}
+    with engine.begin() as conn:
+        if "content_hash" not in columns:
+            conn.execute(text("ALTER TABLE products ADD COLUMN content_hash VARCHAR(64)"))
+        if "ix_products_source_url" not in indexes:
+            # source_url became the upsert key. Older scrapes could store the
+            # same URL twice; keep the oldest row so the index can be built.
+            conn.execute(
+                text(
+                    "DELETE FROM products WHERE source_url IS NOT NULL AND id NOT IN "
+                    "(SELECT MIN(id) FROM products WHERE source_url IS NOT NULL "
+                    "GROUP BY source_url)"
+                )
+            )
+            conn.execute(
+                text("CREATE UNIQUE INDEX ix_products_source_url ON products (source_url)")
+            )
+        # Filters on /products.
+        for column in ("category", "price"):
+            if f"ix_products_{column}" not in indexes:
+                conn.execute(text(f"CREATE INDEX ix_products_{column} ON products ({column})"))
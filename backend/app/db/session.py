@@ -1,5 +1,6 @@
 from sqlalchemy import create_engine
-from sqlalchemy.engine import make_url
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 
 from app.core.config import get_settings
@@ -25,6 +26,23 @@ engine = create_engine(url, echo=False, future=True)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+def _async_url(sync_url: URL) -> URL:
+    # psycopg3 speaks asyncio natively; SQLite needs the aiosqlite driver.
+    if sync_url.get_backend_name() == "sqlite":
+        return sync_url.set(drivername="sqlite+aiosqlite")
+    return sync_url
+
+
+# Used by the request path (/chat) so DB waits don't hold a threadpool slot.
+async_engine = create_async_engine(_async_url(url), echo=False)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+
 def get_db():
     db = SessionLocal()
     try:
@@ -33,3 +51,8 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
@@ -1,5 +1,5 @@
+from .crawl_state import CrawlState
+from .job import Job
 from .product import Product
 
-__all__ = ["Product"]
-
-
+__all__ = ["CrawlState", "Job", "Product"]
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, DateTime, String, func
+
+from app.db.session import Base
+
+
+class CrawlState(Base):
+    """
+    HTTP validators from the last successful fetch of a scraped URL, sent
+    back as If-None-Match / If-Modified-Since on the next crawl.
+    """
+
+    __tablename__ = "crawl_state"
+
+    url = Column(String(512), primary_key=True)
+    etag = Column(String(255), nullable=True)
+    last_modified = Column(String(64), nullable=True)
+    fetched_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,45 @@
+from sqlalchemy import Boolean, Column, DateTime, Index, String, Text, func, text
+
+from app.db.session import Base
+
+
+# Statuses of a job that is not finished yet; at most one job of each kind
+# may be in one of them (see `ix_jobs_active_kind`).
+ACTIVE_STATUSES = ("queued", "running")
+_ACTIVE = text("status IN ('queued', 'running')")
+
+
+class Job(Base):
+    """
+    An admin background job (a scrape or an index build) with its progress
+    counters and outcome; run by `services.jobs`.
+    """
+
+    __tablename__ = "jobs"
+
+    id = Column(String(32), primary_key=True)
+    kind = Column(String(32), nullable=False)
+    # queued, running, succeeded, failed or cancelled
+    status = Column(String(16), nullable=False, default="queued")
+    # JSON objects
+    params = Column(Text, nullable=True)
+    progress = Column(Text, nullable=True)
+    result = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    # "host:pid" of the process running the job.
+    owner = Column(String(128), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index(
+            "ix_jobs_active_kind",
+            "kind",
+            unique=True,
+            sqlite_where=_ACTIVE,
+            postgresql_where=_ACTIVE,
+        ),
+    )
@@ -8,12 +8,15 @@ class Product(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False, index=True)
-    price = Column(Float, nullable=True)
+    price = Column(Float, nullable=True, index=True)
     short_description = Column(Text, nullable=True)
     long_description = Column(Text, nullable=True)
     features = Column(Text, nullable=True)  # simple text/JSON string for now
     image_url = Column(String(512), nullable=True)
-    category = Column(String(128), nullable=True)
-    source_url = Column(String(512), nullable=True)
+    category = Column(String(128), nullable=True, index=True)
+    # Natural key for scraped products; scrapes upsert on it.
+    source_url = Column(String(512), nullable=True, unique=True, index=True)
+    # sha256 of the scraped columns, so unchanged products are skipped.
+    content_hash = Column(String(64), nullable=True)
 
 
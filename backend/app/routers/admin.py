@@ -1,35 +1,132 @@
-from typing import List
+from typing import Any, Dict, List, Tuple
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import PlainTextResponse
 from sqlalchemy.orm import Session
 
+from app.core.metrics import metrics
 from app.db.session import get_db
-from app.models.product import Product
-from app.schemas.product import ProductRead
-from app.services.rag import index_all_products
-from app.services.scraper_traya import scrape_traya_products
+from app.models.job import Job
+from app.schemas.job import JobRead
+from app.services.embeddings import embedding_cache_stats
+from app.services.jobs import Progress, jobs
+from app.services.llm_gateway import gateway
+from app.services.product_cache import product_cache
+from app.services.rag import answer_cache, index_all_products
+from app.services.safety import safety_cache_stats
 
 router = APIRouter()
 
 
-@router.post("/scrape-traya", response_model=List[ProductRead])
-def scrape_traya(db: Session = Depends(get_db)) -> List[ProductRead]:
+def _scrape(db: Session, progress: Progress, limit: int) -> Dict[str, Any]:
+    # The scraper pulls in the HTML parsers; only load them when scraping.
+    from app.services.scraper_traya import scrape_traya_products
+
+    scraped = scrape_traya_products(db=db, limit=limit, progress=progress)
+    return {"products": len(scraped.product_ids), "changed": len(scraped.changed_ids)}
+
+
+def _build_index(db: Session, progress: Progress) -> Dict[str, Any]:
+    return {"indexed": index_all_products(db=db, progress=progress)}
+
+
+def _submitted(job: Job, created: bool, response: Response) -> Job:
+    # 202 for a new job; 200 with the job already queued or running.
+    response.status_code = 202 if created else 200
+    response.headers["Location"] = f"/admin/jobs/{job.id}"
+    return job
+
+
+@router.post("/scrape-traya", response_model=JobRead, status_code=202)
+def scrape_traya(
+    response: Response,
+    limit: int = Query(80, ge=1, le=1000),
+    db: Session = Depends(get_db),
+) -> JobRead:
+    """
+    Start a background scrape of Traya.health into the database and return
+    the job (progress: pages_fetched, pages_parsed, products_upserted,
+    products_changed). While a scrape is queued or running, this returns
+    that job instead of starting another. Follow with `/build-index`.
+    """
+    return _submitted(*jobs.submit(db, "scrape-traya", _scrape, limit=limit), response)
+
+
+@router.post("/build-index", response_model=JobRead, status_code=202)
+def build_index(response: Response, db: Session = Depends(get_db)) -> JobRead:
+    """
+    Start a background build/refresh of the vector index over all products
+    and return the job (progress: vectors_total, vectors_written,
+    vectors_deleted). While a build is queued or running, this returns that
+    job instead of starting another.
     """
-    Scrape products from Traya.health and store them in the database.
-    Returns the list of products in the database after scraping.
+    return _submitted(*jobs.submit(db, "build-index", _build_index), response)
+
+
+@router.get("/jobs", response_model=List[JobRead])
+def list_jobs(
+    limit: int = Query(20, ge=1, le=200), db: Session = Depends(get_db)
+) -> List[JobRead]:
+    """
+    The most recent jobs, newest first.
+    """
+    return jobs.recent(db, limit=limit)
+
+
+@router.get("/jobs/{job_id}", response_model=JobRead)
+def get_job(job_id: str, db: Session = Depends(get_db)) -> JobRead:
+    job = jobs.get(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=JobRead)
+def cancel_job(job_id: str, db: Session = Depends(get_db)) -> JobRead:
+    """
+    Cancel a queued or running job. A running job stops at its next
+    progress report (a page fetched, a chunk of vectors written); vectors
+    already written are kept, a scrape writes nothing.
     """
-    scrape_traya_products(db=db)
-    products = db.query(Product).all()
-    return products
+    job = jobs.cancel(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
 
 
-@router.post("/build-index", response_model=int)
-def build_index(db: Session = Depends(get_db)) -> int:
+@router.get("/cache-stats")
+def cache_stats() -> Dict[str, Any]:
     """
-    Build or refresh the vector index over all products.
-    Returns the number of indexed products.
+    Size and hit/miss counters of the in-process caches.
     """
-    return index_all_products(db=db)
+    return {
+        "products": product_cache.stats(),
+        "safety": safety_cache_stats(),
+        "embeddings": embedding_cache_stats(),
+        "answers": answer_cache.stats() if answer_cache is not None else None,
+    }
 
 
+def _gauges() -> List[Tuple[str, Dict[str, str], float]]:
+    gauges: List[Tuple[str, Dict[str, str], float]] = []
+    for cache, stats in cache_stats().items():
+        if stats is None:
+            continue
+        for key in ("size", "hits", "misses", "hit_rate"):
+            if key in stats:
+                gauges.append((f"cache_{key}", {"cache": cache}, stats[key]))
+    for key, value in gateway.counters.items():
+        gauges.append((f"llm_{key}", {}, value))
+    return gauges
 
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics() -> PlainTextResponse:
+    """
+    Per-stage latency quantiles (p50/p95/p99) of chat, indexing, scraping,
+    safety search and LLM calls, LLM token counts, stage timeouts, and
+    cache / LLM gateway counters, in the Prometheus text format.
+    """
+    return PlainTextResponse(
+        metrics.render(_gauges()), media_type="text/plain; version=0.0.4"
+    )
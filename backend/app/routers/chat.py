@@ -1,19 +1,93 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+import json
+from typing import Any, AsyncIterator, Dict
 
-from app.db.session import get_db
-from app.schemas.chat import ChatRequest, ChatResponse
-from app.services.rag import run_rag_chat
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.metrics import request_timings, server_timing
+from app.db.session import AsyncSessionLocal, get_async_db
+from app.schemas.chat import ChatBatchRequest, ChatBatchResult, ChatRequest, ChatResponse
+from app.services.rag import run_rag_chat, run_rag_chat_batch, stream_rag_chat
 
 router = APIRouter()
+settings = get_settings()
 
 
 @router.post("/", response_model=ChatResponse)
-def chat(payload: ChatRequest, db: Session = Depends(get_db)) -> ChatResponse:
+async def chat(
+    payload: ChatRequest, response: Response, db: AsyncSession = Depends(get_async_db)
+) -> ChatResponse:
+    """
+    Chat endpoint powered by the RAG pipeline over Traya products. The
+    `Server-Timing` header breaks the request down by pipeline stage.
+    """
+    with request_timings() as timings:
+        result = await run_rag_chat(db=db, messages=payload.messages)
+    response.headers["Server-Timing"] = server_timing(timings)
+    return result
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/stream")
+async def chat_stream(payload: ChatRequest) -> StreamingResponse:
     """
-    Chat endpoint powered by the RAG pipeline over Traya products.
+    Server-Sent Events version of the chat endpoint.
+
+    Emits `token` events with pieces of the reply as the model generates
+    them, then a `recommendations` event (same `RecommendedProduct` shape as
+    `POST /chat`) and a final `done` event.
     """
-    return run_rag_chat(db=db, messages=payload.messages)
 
+    async def events() -> AsyncIterator[str]:
+        # The session is opened inside the generator: dependency teardown
+        # runs before a streaming body is sent.
+        async with AsyncSessionLocal() as db:
+            async for event, data in stream_rag_chat(db=db, messages=payload.messages):
+                yield _sse(event, data)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/batch")
+async def chat_batch(payload: ChatBatchRequest) -> StreamingResponse:
+    """
+    Answer many independent conversations in one request, for offline
+    evaluation and cache warming.
+
+    Retrieval runs once for the whole batch (one embeddings call, one
+    multi-query vector search); chat-model calls fan out with bounded
+    concurrency. Results stream back as NDJSON, one `ChatBatchResult` per
+    line in completion order; a failing conversation gets an `error` line
+    and the rest of the batch carries on.
+    """
+    if len(payload.items) > settings.chat_batch_max_items:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.chat_batch_max_items} conversations per batch",
+        )
 
+    async def lines() -> AsyncIterator[str]:
+        async with AsyncSessionLocal() as db:
+            results = run_rag_chat_batch(
+                db,
+                [item.messages for item in payload.items],
+                concurrency=settings.chat_batch_concurrency,
+            )
+            async for index, result in results:
+                line = ChatBatchResult(index=index, id=payload.items[index].id)
+                if isinstance(result, Exception):
+                    line.error = f"{type(result).__name__}: {result}"
+                else:
+                    line.response = result
+                yield line.model_dump_json(exclude_none=True) + "\n"
 
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
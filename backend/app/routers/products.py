@@ -1,30 +1,114 @@
-from typing import List
+import base64
+from typing import List, Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db, Base, engine
+from app.db.session import get_db
 from app.models.product import Product
-from app.schemas.product import ProductRead
+from app.schemas.product import ProductPage, ProductRead
+from app.services.catalogue import catalogue_etag
+from app.services.product_cache import product_cache
 
 
-# Ensure tables exist (simple for assignment; in production use migrations)
-Base.metadata.create_all(bind=engine)
-
 router = APIRouter()
 
+# Columns a listing can project, in response order.
+PRODUCT_COLUMNS: Tuple[str, ...] = ("id",) + tuple(
+    name for name in ProductRead.model_fields if name != "id"
+)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def _parse_fields(fields: Optional[str]) -> Tuple[str, ...]:
+    if not fields:
+        return PRODUCT_COLUMNS
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested.difference(PRODUCT_COLUMNS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    # The id is always returned; it is also the pagination key.
+    return tuple(name for name in PRODUCT_COLUMNS if name == "id" or name in requested)
+
+
+def _encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(f"id:{last_id}".encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> int:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        prefix, _, last_id = raw.partition(":")
+        if prefix == "id":
+            return int(last_id)
+    except ValueError:
+        pass
+    raise HTTPException(status_code=400, detail="Invalid cursor")
 
-@router.get("/", response_model=List[ProductRead])
-def list_products(db: Session = Depends(get_db)) -> List[ProductRead]:
-    products = db.query(Product).all()
-    return products
+
+def _not_modified(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = {tag.strip() for tag in header.split(",")}
+    # Weak comparison: W/"x" and "x" name the same representation.
+    return "*" in tags or etag in tags or etag.removeprefix("W/") in tags
+
+
+@router.get("/", response_model=ProductPage)
+def list_products(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(
+        None, description="Comma-separated columns, e.g. id,title,price,image_url,category"
+    ),
+    category: Optional[str] = None,
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    db: Session = Depends(get_db),
+) -> Response:
+    """
+    One page of products, ordered by id.
+
+    Keyset pagination (`cursor` is the `next_cursor` of the previous page)
+    keeps every page an index range scan, however large the catalogue gets.
+    Responses carry an ETag that changes with the catalogue version, so an
+    unchanged listing revalidates with a bodiless 304.
+    """
+    etag = catalogue_etag()
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    columns = _parse_fields(fields)
+    query = db.query(*(getattr(Product, name) for name in columns))
+    if cursor:
+        query = query.filter(Product.id > _decode_cursor(cursor))
+    if category:
+        query = query.filter(Product.category == category.strip().lower())
+    if min_price is not None:
+        query = query.filter(Product.price >= min_price)
+    if max_price is not None:
+        query = query.filter(Product.price <= max_price)
+    # One extra row tells us whether there is a next page.
+    rows = query.order_by(Product.id).limit(limit + 1).all()
+
+    next_cursor = _encode_cursor(rows[limit - 1].id) if len(rows) > limit else None
+    items: List[dict] = [dict(zip(columns, row)) for row in rows[:limit]]
+    return Response(
+        content=orjson.dumps({"items": items, "next_cursor": next_cursor}),
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": "no-cache"},
+    )
 
 
 @router.get("/{product_id}", response_model=ProductRead)
 def get_product(product_id: int, db: Session = Depends(get_db)) -> ProductRead:
-    product = db.query(Product).filter(Product.id == product_id).first()
+    # Served from the in-process catalogue copy; `db` only reloads it.
+    product = product_cache.get(db, product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     return product
-
-
@@ -1,16 +1,42 @@
-from typing import List, Optional
+from typing import Any, List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
+
+from app.core.config import get_settings
+
+
+def _trim_messages(messages: Any) -> Any:
+    """
+    Cut a raw messages list to the last `chat_max_messages` entries and each
+    `content` to its last `chat_max_message_chars` characters, before the
+    items are validated. Anything else is left for validation to reject.
+    """
+    if not isinstance(messages, list):
+        return messages
+    settings = get_settings()
+    max_chars = settings.chat_max_message_chars
+    trimmed = []
+    for message in messages[-settings.chat_max_messages :]:
+        content = message.get("content") if isinstance(message, dict) else None
+        if isinstance(content, str) and len(content) > max_chars:
+            message = {**message, "content": content[-max_chars:]}
+        trimmed.append(message)
+    return trimmed
 
 
 class ChatMessage(BaseModel):
     role: str  # "user" or "assistant"
     content: str
+    # On assistant messages: the products shown with that reply, so follow-ups
+    # ("is it safe with PCOS?") can refer back to them.
+    recommended_product_ids: Optional[List[int]] = None
 
 
 class ChatRequest(BaseModel):
     messages: List[ChatMessage]
 
+    _trim = field_validator("messages", mode="before")(_trim_messages)
+
 
 class RecommendedProduct(BaseModel):
     product_id: int
@@ -22,3 +48,25 @@ class ChatResponse(BaseModel):
     recommended_products: List[RecommendedProduct] = []
 
 
+class ChatBatchItem(BaseModel):
+    # Echoed back with the result, e.g. the id of a logged request.
+    id: Optional[str] = None
+    messages: List[ChatMessage]
+
+    _trim = field_validator("messages", mode="before")(_trim_messages)
+
+
+class ChatBatchRequest(BaseModel):
+    items: List[ChatBatchItem]
+
+
+class ChatBatchResult(BaseModel):
+    """
+    One NDJSON line of a `/chat/batch` response: either `response` or
+    `error` is set.
+    """
+
+    index: int
+    id: Optional[str] = None
+    response: Optional[ChatResponse] = None
+    error: Optional[str] = None
@@ -0,0 +1,35 @@
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel, ValidationInfo, field_validator
+
+
+class JobRead(BaseModel):
+    id: str
+    kind: str
+    # queued, running, succeeded, failed or cancelled
+    status: str
+    params: Dict[str, Any] = {}
+    # Counters, e.g. pages_fetched / products_upserted for a scrape and
+    # vectors_total / vectors_written for an index build.
+    progress: Dict[str, int] = {}
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    cancel_requested: bool = False
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+    @field_validator("params", "progress", "result", mode="before")
+    @classmethod
+    def _json(cls, value: Any, info: ValidationInfo) -> Any:
+        # Stored as JSON text on the `jobs` row.
+        if isinstance(value, str):
+            return json.loads(value)
+        if value is None and info.field_name != "result":
+            return {}
+        return value
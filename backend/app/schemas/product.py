@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel, HttpUrl
 
@@ -25,3 +25,10 @@ class ProductRead(ProductBase):
         from_attributes = True
 
 
+
+
+class ProductPage(BaseModel):
+    # Products with only the requested `fields` (id is always included).
+    items: List[Dict[str, Any]]
+    # Pass back as `cursor` for the next page; null on the last page.
+    next_cursor: Optional[str] = None
@@ -0,0 +1,129 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from itertools import count
+from operator import mul
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from app.schemas.chat import ChatResponse
+from app.services.catalogue import get_catalogue_version
+
+
+# (candidate ids, safety intent, conversation context fingerprint)
+_BucketKey = Tuple[FrozenSet[int], bool, str]
+
+
+@dataclass
+class _Entry:
+    bucket: _BucketKey
+    embedding: List[float]  # unit length
+    response: ChatResponse
+    expires_at: float
+
+
+def _normalize(vector: List[float]) -> List[float]:
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+class SemanticAnswerCache:
+    """
+    Cache of full chat answers keyed by query meaning rather than exact text.
+
+    An answer is reused only for a query with the same candidate product set,
+    safety-intent flag and conversation context (see
+    `ConversationContext.cache_key`; "" for a first turn) whose embedding has cosine similarity of at least
+    `threshold` with the cached one. Entries expire after `ttl_s`, the cache
+    holds at most `max_entries` (LRU), and everything is dropped when the
+    catalogue version changes.
+    """
+
+    def __init__(self, threshold: float, ttl_s: float, max_entries: int) -> None:
+        self.threshold = threshold
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._ids = count()
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._buckets: Dict[_BucketKey, Set[int]] = {}
+        self._version = get_catalogue_version()
+
+    def lookup(
+        self,
+        query_embedding: List[float],
+        candidate_ids: FrozenSet[int],
+        safety_intent: bool,
+        context_key: str = "",
+    ) -> Optional[ChatResponse]:
+        query = _normalize(query_embedding)
+        now = time.time()
+        with self._lock:
+            self._check_version()
+            best_id, best_score = None, self.threshold
+            for entry_id in list(self._buckets.get((candidate_ids, safety_intent, context_key), ())):
+                entry = self._entries[entry_id]
+                if entry.expires_at <= now:
+                    self._remove(entry_id)
+                    continue
+                score = sum(map(mul, query, entry.embedding))
+                if score >= best_score:
+                    best_id, best_score = entry_id, score
+
+            if best_id is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_id)
+            self.hits += 1
+            return self._entries[best_id].response
+
+    def store(
+        self,
+        query_embedding: List[float],
+        candidate_ids: FrozenSet[int],
+        safety_intent: bool,
+        response: ChatResponse,
+        context_key: str = "",
+    ) -> None:
+        bucket = (candidate_ids, safety_intent, context_key)
+        entry = _Entry(
+            bucket=bucket,
+            embedding=_normalize(query_embedding),
+            response=response,
+            expires_at=time.time() + self.ttl_s,
+        )
+        with self._lock:
+            self._check_version()
+            entry_id = next(self._ids)
+            self._entries[entry_id] = entry
+            self._buckets.setdefault(bucket, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _check_version(self) -> None:
+        version = get_catalogue_version()
+        if version != self._version:
+            self._entries.clear()
+            self._buckets.clear()
+            self._version = version
+
+    def _remove(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id)
+        bucket = self._buckets.get(entry.bucket)
+        if bucket is not None:
+            bucket.discard(entry_id)
+            if not bucket:
+                del self._buckets[entry.bucket]
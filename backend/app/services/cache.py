@@ -0,0 +1,154 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Generic, Optional, Tuple, TypeVar
+
+
+T = TypeVar("T")
+
+_MISSING = object()
+
+
+class TTLCache(Generic[T]):
+    """
+    Size-bounded LRU cache whose entries expire after a per-entry TTL.
+
+    If `path` is given, entries are persisted to that JSON file (values must
+    be JSON-serialisable) and reloaded on start-up, so a restart does not
+    throw away everything that was learned. Changes are written on a timer
+    thread at most once every `save_delay_s`, never on the caller's thread
+    (which may be the event loop); `flush` writes them at once.
+    """
+
+    def __init__(
+        self, max_entries: int, path: Optional[str] = None, save_delay_s: float = 5.0
+    ) -> None:
+        self.max_entries = max_entries
+        self.path = path
+        self.save_delay_s = save_delay_s
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # key -> (expires_at as wall-clock time, value)
+        self._data: "OrderedDict[str, Tuple[float, T]]" = OrderedDict()
+        self._dirty = False
+        self._save_timer: Optional[threading.Timer] = None
+        self._save_lock = threading.Lock()  # one write to `path` at a time
+        if path:
+            self._load()
+
+    def get(self, key: str) -> Tuple[bool, Optional[T]]:
+        """
+        Return (hit, value). A cached `None` is a hit, so negative results
+        can be cached too.
+        """
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING or entry[0] <= time.time():
+                if entry is not _MISSING:
+                    del self._data[key]
+                self.misses += 1
+                return False, None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return True, entry[1]
+
+    def set(self, key: str, value: T, ttl: float) -> None:
+        with self._lock:
+            self._data[key] = (time.time() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+            if self.path:
+                self._schedule_save()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            if self.path:
+                self._schedule_save()
+
+    def flush(self) -> None:
+        """
+        Write unsaved changes to `path` now (e.g. at shutdown).
+        """
+        if not self.path:
+            return
+        with self._save_lock:
+            with self._lock:
+                self._save_timer = None
+                if not self._dirty:
+                    return
+                self._dirty = False
+                snapshot = dict(self._data)
+            self._save(snapshot)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, encoding="utf-8") as f:  # type: ignore[arg-type]
+                raw = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        for key, (expires_at, value) in raw.items():
+            if expires_at > now:
+                self._data[key] = (expires_at, value)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def _schedule_save(self) -> None:
+        # Call with `_lock` held. A timer from before a fork is not alive in
+        # the child, so each process schedules its own.
+        self._dirty = True
+        if self._save_timer is not None and self._save_timer.is_alive():
+            return
+        self._save_timer = threading.Timer(self.save_delay_s, self.flush)
+        self._save_timer.daemon = True
+        self._save_timer.start()
+
+    def _save(self, data: Dict[str, Tuple[float, T]]) -> None:
+        # Write-then-rename so a crash never leaves a truncated file behind;
+        # the temporary name is per process, as workers may share `path`.
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)  # type: ignore[arg-type]
+        except OSError:
+            pass
+
+
+class SingleFlight(Generic[T]):
+    """
+    Coalesce concurrent async calls for the same key into one in-flight call.
+
+    The shared call runs as its own task, so a caller that gives up (e.g. a
+    pipeline stage hitting its deadline) does not cancel it for the others.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: Dict[str, "asyncio.Task[T]"] = {}
+
+    async def run(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
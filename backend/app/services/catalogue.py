@@ -0,0 +1,143 @@
+import os
+import secrets
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+
+from app.core.config import get_settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: bumps from several processes may race
+    fcntl = None
+
+
+settings = get_settings()
+
+# Monotonic counter bumped whenever the product catalogue (DB rows or the
+# vector index) changes. Caches derived from the catalogue remember the
+# version they were built at and drop their contents when it moves.
+#
+# With `catalogue_version_path` set, the counter lives in a small file
+# ("<epoch> <version>") shared by every worker process on the host: a bump
+# rewrites it atomically, and readers re-check it at most once every
+# `catalogue_version_check_s` (one `stat` unless it changed), so a scrape or
+# index build served by one worker reaches the others within that interval.
+# Without a path the counter is process-local.
+_version = 0
+_lock = threading.Lock()
+
+# Random prefix for HTTP validators: a counter that restarts (a new process,
+# or a new version file) must never make old ETags match again.
+_epoch = secrets.token_hex(4)
+
+_path: Optional[Path] = (
+    Path(settings.catalogue_version_path) if settings.catalogue_version_path else None
+)
+_stamp: Optional[Tuple[int, int, int]] = None  # (inode, mtime_ns, size) last read
+_checked_at = float("-inf")
+
+
+def _file_stamp() -> Optional[Tuple[int, int, int]]:
+    try:
+        st = os.stat(_path)
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+def _read() -> Optional[Tuple[str, int]]:
+    try:
+        epoch, version = _path.read_text(encoding="ascii").split()
+        return epoch, int(version)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _write(epoch: str, version: int) -> None:
+    tmp = _path.with_name(f"{_path.name}.{os.getpid()}.tmp")
+    tmp.write_text(f"{epoch} {version}\n", encoding="ascii")
+    os.replace(tmp, _path)
+
+
+class _FileLock:
+    """
+    Exclusive lock across processes (flock on a sidecar file) for
+    read-modify-write of the version file.
+    """
+
+    def __enter__(self) -> None:
+        self._f = open(_path.with_name(f"{_path.name}.lock"), "a")
+        if fcntl is not None:
+            fcntl.flock(self._f, fcntl.LOCK_EX)
+
+    def __exit__(self, *exc) -> None:
+        self._f.close()  # releases the lock
+
+
+def _refresh(force: bool = False) -> None:
+    global _version, _epoch, _stamp, _checked_at
+    now = time.monotonic()
+    if not force and now - _checked_at < settings.catalogue_version_check_s:
+        return
+    _checked_at = now
+    stamp = _file_stamp()
+    if stamp is not None and stamp == _stamp:
+        return
+    if stamp is None:
+        _path.parent.mkdir(parents=True, exist_ok=True)
+        with _FileLock():
+            if _read() is None:
+                _write(_epoch, _version)
+        stamp = _file_stamp()
+    state = _read()
+    if state is not None:
+        with _lock:
+            _epoch, _version = state
+            _stamp = stamp
+
+
+def get_catalogue_version() -> int:
+    if _path is not None:
+        _refresh()
+    return _version
+
+
+def bump_catalogue_version() -> int:
+    global _version, _epoch, _stamp, _checked_at
+    if _path is None:
+        with _lock:
+            _version += 1
+            return _version
+    _refresh(force=True)
+    with _lock, _FileLock():
+        epoch, version = _read() or (_epoch, _version)
+        _write(epoch, version + 1)
+        _epoch, _version = epoch, version + 1
+        _stamp, _checked_at = _file_stamp(), time.monotonic()
+        return _version
+
+
+def new_epoch() -> None:
+    """
+    Start a fresh ETag epoch, keeping the version (a deployment's master
+    process calls this before forking workers; see gunicorn.conf.py).
+    """
+    global _epoch, _version, _stamp
+    with _lock:
+        _epoch = secrets.token_hex(4)
+        if _path is not None:
+            _path.parent.mkdir(parents=True, exist_ok=True)
+            with _FileLock():
+                _version = (_read() or (_epoch, _version))[1]
+                _write(_epoch, _version)
+            _stamp = _file_stamp()
+
+
+def catalogue_etag() -> str:
+    """
+    Weak ETag for responses derived only from the catalogue.
+    """
+    version = get_catalogue_version()
+    return f'W/"{_epoch}-{version}"'
@@ -0,0 +1,115 @@
+import hashlib
+import math
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Sequence
+
+from app.schemas.chat import ChatMessage
+
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+@lru_cache(maxsize=8192)
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count without a tokenizer: one per word or punctuation mark,
+    with long words counted as several pieces. Cached, since every turn
+    re-counts the same history messages.
+    """
+    return sum(max(1, math.ceil(len(piece) / 6)) for piece in _TOKEN_RE.findall(text))
+
+
+@dataclass(frozen=True)
+class ConversationContext:
+    latest_query: str
+    # Latest user message plus as many earlier ones as fit the query budget.
+    retrieval_query: str
+    # Products recommended in recent assistant turns, most recent first.
+    carried_ids: List[int]
+    # Earlier turns (oldest first) that fit the prompt's history budget.
+    history: List[ChatMessage]
+
+    @property
+    def cache_key(self) -> str:
+        """
+        Fingerprint of everything besides the latest query that shapes the
+        answer; "" for a first turn.
+        """
+        if not self.history and not self.carried_ids:
+            return ""
+        digest = hashlib.sha256()
+        for message in self.history:
+            digest.update(f"{message.role}\x00{message.content}\x00".encode("utf-8"))
+        digest.update(",".join(map(str, self.carried_ids)).encode("ascii"))
+        return digest.hexdigest()
+
+    def history_text(self) -> str:
+        return "\n".join(f"{m.role}: {m.content}" for m in self.history)
+
+
+def build_context(
+    messages: Sequence[ChatMessage],
+    query_turns: int,
+    query_max_tokens: int,
+    history_max_tokens: int,
+    carry_turns: int = 2,
+) -> ConversationContext:
+    """
+    The conversation context for the latest user message in `messages`
+    (which must contain at least one).
+
+    - The retrieval query joins the last `query_turns` user messages, newest
+      first in priority, within `query_max_tokens`, so "is it safe with
+      that?" still retrieves what "that" was.
+    - Product ids recommended in the last `carry_turns` assistant turns are
+      carried forward as candidates.
+    - The history window holds the newest earlier turns that fit
+      `history_max_tokens`.
+    """
+    latest_index = max(i for i, m in enumerate(messages) if m.role == "user")
+    latest = messages[latest_index].content
+    earlier = list(messages[:latest_index])
+
+    parts = [latest]
+    used = estimate_tokens(latest)
+    for message in reversed(earlier):
+        if len(parts) >= query_turns:
+            break
+        if message.role != "user":
+            continue
+        cost = estimate_tokens(message.content)
+        if used + cost > query_max_tokens:
+            break
+        parts.append(message.content)
+        used += cost
+    retrieval_query = "\n".join(reversed(parts))
+
+    carried: Dict[int, None] = {}
+    assistant_turns = 0
+    for message in reversed(earlier):
+        if message.role != "assistant":
+            continue
+        assistant_turns += 1
+        if assistant_turns > carry_turns:
+            break
+        for pid in message.recommended_product_ids or []:
+            carried.setdefault(pid)
+
+    history: List[ChatMessage] = []
+    used = 0
+    for message in reversed(earlier):
+        cost = estimate_tokens(message.content) + 2  # role label and separator
+        if used + cost > history_max_tokens:
+            break
+        history.append(message)
+        used += cost
+    history.reverse()
+
+    return ConversationContext(
+        latest_query=latest,
+        retrieval_query=retrieval_query,
+        carried_ids=list(carried),
+        history=history,
+    )
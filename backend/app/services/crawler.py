@@ -0,0 +1,176 @@
+import asyncio
+import random
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+
+USER_AGENT = "TrayaProductDiscoveryBot/0.1 (+https://product-discovery-chatbot.onrender.com)"
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+@dataclass
+class FetchResult:
+    url: str
+    # 200 (fresh body), 304 (unchanged since last crawl) or the final error
+    # status; 0 when the request never got a response.
+    status: int
+    text: Optional[str] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status == 200 and self.text is not None
+
+    @property
+    def not_modified(self) -> bool:
+        return self.status == 304
+
+
+class HostRateLimiter:
+    """
+    Spaces requests to the same host at least `1 / rate` seconds apart.
+    """
+
+    def __init__(self, rate: float) -> None:
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot: Dict[str, float] = {}
+
+    async def wait(self, host: str) -> None:
+        if not self.interval:
+            return
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        # Reserve the next free slot synchronously so concurrent callers
+        # queue up behind each other instead of all firing at once.
+        slot = max(now, self._next_slot.get(host, now))
+        self._next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class Crawler:
+    """
+    Polite concurrent fetcher built on one pooled `httpx.AsyncClient`.
+
+    - at most `max_concurrency` requests in flight, and at most
+      `per_host_rate` requests per second to any single host;
+    - retries on transport errors, 429 and 5xx with exponential backoff and
+      jitter (honouring a numeric `Retry-After`);
+    - conditional GETs: pass the ETag / Last-Modified from the previous crawl
+      and an unchanged page comes back as a cheap 304.
+
+    Use as an async context manager.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        per_host_rate: float = 10.0,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        timeout: float = 20.0,
+        on_fetch: Optional[Callable[[FetchResult], None]] = None,
+    ) -> None:
+        self.max_retries = max_retries
+        # Called with every finished fetch (e.g. to report progress).
+        self._on_fetch = on_fetch
+        self.backoff_base = backoff_base
+        self._timeout = timeout
+        self._max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._rate_limiter = HostRateLimiter(per_host_rate)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def __aenter__(self) -> "Crawler":
+        self._client = httpx.AsyncClient(
+            # Follow redirects because Traya may redirect old product URLs
+            follow_redirects=True,
+            timeout=self._timeout,
+            headers={"User-Agent": USER_AGENT},
+            limits=httpx.Limits(
+                max_connections=self._max_concurrency,
+                max_keepalive_connections=self._max_concurrency,
+            ),
+        )
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def fetch(
+        self,
+        url: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> FetchResult:
+        result = await self._fetch(url, etag, last_modified)
+        if self._on_fetch is not None:
+            self._on_fetch(result)
+        return result
+
+    async def _fetch(
+        self, url: str, etag: Optional[str], last_modified: Optional[str]
+    ) -> FetchResult:
+        assert self._client is not None, "use Crawler as an async context manager"
+        headers: Dict[str, str] = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        host = urlsplit(url).netloc
+        status = 0
+        for attempt in range(self.max_retries + 1):
+            retry_after: Optional[float] = None
+            async with self._semaphore:
+                await self._rate_limiter.wait(host)
+                try:
+                    resp = await self._client.get(url, headers=headers)
+                except httpx.TransportError:
+                    resp = None
+
+            if resp is not None:
+                status = resp.status_code
+                if status == 304:
+                    return FetchResult(url=url, status=304, etag=etag, last_modified=last_modified)
+                if status < 400:
+                    return FetchResult(
+                        url=url,
+                        status=status,
+                        text=resp.text,
+                        etag=resp.headers.get("ETag"),
+                        last_modified=resp.headers.get("Last-Modified"),
+                    )
+                if status not in RETRY_STATUSES:
+                    break
+                header = resp.headers.get("Retry-After", "")
+                retry_after = float(header) if header.isdigit() else None
+
+            if attempt < self.max_retries:
+                delay = retry_after
+                if delay is None:
+                    delay = self.backoff_base * (2**attempt) * (0.5 + random.random())
+                await asyncio.sleep(delay)
+
+        return FetchResult(url=url, status=status)
+
+    async def fetch_all(
+        self,
+        requests: Sequence[Tuple[str, Optional[str], Optional[str]]],
+    ) -> List[FetchResult]:
+        """
+        Fetch (url, etag, last_modified) triples concurrently; results keep
+        the input order.
+        """
+        return list(
+            await asyncio.gather(
+                *(self.fetch(url, etag, last_modified) for url, etag, last_modified in requests)
+            )
+        )
@@ -0,0 +1,149 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+def text_key(text: str) -> str:
+    """
+    Content address of a text: the cache never stores the text itself.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    SQLite-backed embedding cache keyed by (model, sha256(text)).
+
+    Vectors are stored as packed float32 blobs. Hits are remembered in
+    memory and their `last_used` timestamps written in one batch later (by
+    `put_many` or `flush_touched`), so a lookup is a single SELECT. Once
+    the table grows past `max_entries` the least recently used rows are
+    evicted.
+    """
+
+    def __init__(self, path: str, max_entries: int) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        # (model, text_hash) -> last hit time, not yet written.
+        self._touched: Dict[Tuple[str, str], float] = {}
+        self._flushed_at = time.monotonic()
+
+    def _connection(self) -> sqlite3.Connection:
+        # Opened on first use and once per process: a SQLite connection
+        # must not be carried across fork (e.g. into the workers of a
+        # preloading gunicorn master). Call with `_lock` held.
+        if self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            if self.path != ":memory:":
+                conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " model TEXT NOT NULL,"
+                " text_hash TEXT NOT NULL,"
+                " vector BLOB NOT NULL,"
+                " last_used REAL NOT NULL,"
+                " PRIMARY KEY (model, text_hash))"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_embeddings_last_used ON embeddings (last_used)"
+            )
+            self._conn, self._pid = conn, os.getpid()
+            self._touched = {}
+        return self._conn
+
+    def get_many(self, model: str, keys: Iterable[str]) -> Dict[str, List[float]]:
+        """
+        Return the cached vectors for whichever of `keys` are present.
+        """
+        keys = list(dict.fromkeys(keys))
+        found: Dict[str, List[float]] = {}
+        if not keys:
+            return found
+
+        with self._lock:
+            conn = self._connection()
+            # Stay well below SQLite's bound-parameter limit.
+            for start in range(0, len(keys), 500):
+                chunk = keys[start : start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings "
+                    f"WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *chunk],
+                ).fetchall()
+                for text_hash, blob in rows:
+                    found[text_hash] = array("f", blob).tolist()
+
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+            now = time.time()
+            for key in found:
+                self._touched[model, key] = now
+        return found
+
+    def flush_touched(self, min_interval_s: float = 0.0) -> None:
+        """
+        Write the `last_used` timestamps of the hits since the last flush,
+        unless that was less than `min_interval_s` ago. Timestamps not yet
+        written when the process exits are lost, which only makes eviction
+        slightly less exact.
+        """
+        with self._lock:
+            if self._touched and time.monotonic() - self._flushed_at >= min_interval_s:
+                self._flush_touched(self._connection())
+
+    def _flush_touched(self, conn: sqlite3.Connection) -> None:
+        # Call with `_lock` held.
+        if self._touched:
+            # One transaction for the batch (the connection autocommits).
+            conn.execute("BEGIN")
+            conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash = ?",
+                [(used, model, key) for (model, key), used in self._touched.items()],
+            )
+            conn.execute("COMMIT")
+            self._touched = {}
+        self._flushed_at = time.monotonic()
+
+    def put_many(self, model: str, vectors: Dict[str, List[float]]) -> None:
+        """
+        Store vectors keyed by text hash, evicting LRU entries if needed.
+        """
+        if not vectors:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            # Eviction must see the recent hits.
+            self._flush_touched(conn)
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector, last_used) "
+                "VALUES (?, ?, ?, ?)",
+                [(model, k, array("f", v).tobytes(), now) for k, v in vectors.items()],
+            )
+            (count,) = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+            overflow = count - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM embeddings WHERE rowid IN ("
+                    " SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+                    (overflow,),
+                )
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -1,27 +1,123 @@
-from typing import List
-
-from openai import OpenAI
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
 
 from app.core.config import get_settings
+from app.services.embedding_cache import EmbeddingCache, text_key
+from app.services.llm_gateway import gateway
 
 
 settings = get_settings()
-client = OpenAI(
-    api_key=settings.openai_api_key,
-    base_url=settings.openai_base_url or None,
+
+EMBEDDING_MODEL = settings.embedding_model
+
+_cache = EmbeddingCache(
+    settings.embedding_cache_path,
+    max_entries=settings.embedding_cache_max_entries,
+)
+
+# Shared pool so concurrent callers together never exceed the provider limit.
+_executor = ThreadPoolExecutor(
+    max_workers=settings.embedding_max_concurrency,
+    thread_name_prefix="embeddings",
 )
+_async_limit = asyncio.Semaphore(settings.embedding_max_concurrency)
+# The cache is synchronous SQLite; the async path runs it here, off the event
+# loop. One thread keeps this process's lookups and writes in order.
+_cache_io = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding-cache")
+# Hit timestamps (the cache's LRU order) are written at most this often.
+TOUCH_FLUSH_INTERVAL_S = 5.0
 
-EMBEDDING_MODEL = "text-embedding-3-small"
 
+def embedding_cache_stats() -> Dict[str, Any]:
+    return _cache.stats()
 
-def embed_text(text: str) -> List[float]:
+
+def _embed_batch(texts: List[str]) -> List[List[float]]:
+    response = gateway.embeddings(texts, model=EMBEDDING_MODEL)
+    # The API does not guarantee ordering, so sort by the returned index.
+    return [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
+
+
+async def _embed_batch_async(texts: List[str]) -> List[List[float]]:
+    async with _async_limit:
+        response = await gateway.embeddings_async(texts, model=EMBEDDING_MODEL)
+    return [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
+
+
+def _plan(texts: List[str]):
     """
-    Generate a single embedding vector for the given text.
+    Split `texts` into cache hits and the unique misses still to embed.
+
+    Returns (keys, vectors, chunks, missing): `keys` aligned with `texts`,
+    cached `vectors` by key, and the missing keys grouped into chunks of
+    `embedding_batch_size` along with their key -> text map.
+    """
+    keys = [text_key(t) for t in texts]
+    vectors: Dict[str, List[float]] = _cache.get_many(EMBEDDING_MODEL, keys)
+
+    missing: Dict[str, str] = {}
+    for key, text in zip(keys, texts):
+        if key not in vectors and key not in missing:
+            missing[key] = text
+
+    missing_keys = list(missing)
+    batch_size = settings.embedding_batch_size
+    chunks = [
+        missing_keys[start : start + batch_size]
+        for start in range(0, len(missing_keys), batch_size)
+    ]
+    return keys, vectors, chunks, missing
+
+
+def _fresh(chunks, results) -> Dict[str, List[float]]:
+    fresh: Dict[str, List[float]] = {}
+    for chunk, embeddings in zip(chunks, results):
+        fresh.update(zip(chunk, embeddings))
+    return fresh
+
+
+def embed_texts(texts: List[str]) -> List[List[float]]:
+    """
+    Embed many texts at once, returning vectors in the same order.
+
+    Cached vectors are served from the on-disk cache; the remaining unique
+    texts are sent in chunks of `embedding_batch_size`, with up to
+    `embedding_max_concurrency` requests in flight.
     """
-    response = client.embeddings.create(
-        model=EMBEDDING_MODEL,
-        input=text,
-    )
-    return response.data[0].embedding
+    keys, vectors, chunks, missing = _plan(texts)
+    if chunks:
+        results = _executor.map(
+            lambda chunk: _embed_batch([missing[k] for k in chunk]), chunks
+        )
+        fresh = _fresh(chunks, results)
+        _cache.put_many(EMBEDDING_MODEL, fresh)
+        vectors.update(fresh)
+    return [vectors[k] for k in keys]
 
 
+async def embed_texts_async(texts: List[str]) -> List[List[float]]:
+    """
+    Async counterpart of `embed_texts` for the request path. Cache lookups
+    run on the cache thread; new vectors and hit timestamps are written
+    there in the background, after the request has its vectors.
+    """
+    loop = asyncio.get_running_loop()
+    keys, vectors, chunks, missing = await loop.run_in_executor(_cache_io, _plan, texts)
+    if chunks:
+        results = await asyncio.gather(
+            *(_embed_batch_async([missing[k] for k in chunk]) for chunk in chunks)
+        )
+        fresh = _fresh(chunks, results)
+        _cache_io.submit(_cache.put_many, EMBEDDING_MODEL, fresh)
+        vectors.update(fresh)
+    else:
+        _cache_io.submit(_cache.flush_touched, TOUCH_FLUSH_INTERVAL_S)
+    return [vectors[k] for k in keys]
+
+
+def embed_text(text: str) -> List[float]:
+    """
+    Generate a single embedding vector for the given text.
+    """
+    return embed_texts([text])[0]
@@ -0,0 +1,344 @@
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+# Product-page fields are pulled out of the markup in ONE pass over the
+# document. A backend turns HTML into a stream of start / end / text /
+# comment events and `_FieldCollector` picks what it needs from the stream,
+# so no tree is built (stdlib, lxml) or only the parser's own C tree is
+# walked once (selectolax).
+#
+# Text semantics follow the BeautifulSoup extraction this replaces:
+# - h1 / p / li text is the element's stripped, non-empty strings, joined
+#   with "" (h1) or " " (p, li); strings inside script, style, template,
+#   rt and rp, and comments, are not element text;
+# - the price is the first string anywhere in the document (comments and
+#   scripts included) that contains "₹";
+# - only the first h1, meta[name=description] and meta[property=og:image]
+#   count, and an empty `content` attribute counts as missing.
+#
+# The raw text of every <script type="application/ld+json"> block is kept
+# as well, for the structured-data path in services/structured_data.py.
+
+PRICE_MARKER = "₹"
+
+# Text under these elements is not part of an element's visible text.
+_RAW_TEXT_TAGS = frozenset({"script", "style", "template", "rt", "rp"})
+
+# Elements that never have children; `<br>` must not swallow the text after it.
+_VOID_TAGS = frozenset(
+    {
+        "area", "base", "basefont", "bgsound", "br", "col", "command", "embed",
+        "frame", "hr", "image", "img", "input", "isindex", "keygen", "link",
+        "menuitem", "meta", "nextid", "param", "source", "spacer", "track", "wbr",
+    }
+)
+
+_COLLECTED_TAGS = frozenset({"h1", "p", "li"})
+
+
+@dataclass
+class PageFields:
+    """
+    Raw fields of a product page, before any product-specific cleanup.
+    """
+
+    title: Optional[str] = None
+    price_text: Optional[str] = None  # first string containing "₹"
+    meta_description: Optional[str] = None
+    og_image: Optional[str] = None
+    paragraphs: List[str] = field(default_factory=list)
+    list_items: List[str] = field(default_factory=list)
+    json_ld: List[str] = field(default_factory=list)  # raw JSON-LD script bodies
+
+
+class _FieldCollector:
+    """
+    Consumes parser events and fills a `PageFields`.
+    """
+
+    def __init__(self) -> None:
+        self.fields = PageFields()
+        # Open elements as (tag, collector); collector is the list of strings
+        # for h1/p/li and None for everything else.
+        self._stack: List[Tuple[str, Optional[List[str]]]] = []
+        # Collectors of the open h1/p/li elements, innermost last.
+        self._active: List[List[str]] = []
+        self._raw_depth = 0
+        # Finished text for each p / li, in start-tag (document) order.
+        self._paragraphs: List[List[str]] = []
+        self._list_items: List[List[str]] = []
+        self._title: Optional[List[str]] = None
+        # Text of the JSON-LD script currently open, if any.
+        self._json_ld: Optional[List[str]] = None
+        self._seen_description = False
+        self._seen_og_image = False
+
+    def start(self, tag: str, attrs: Dict[str, Optional[str]]) -> None:
+        if tag == "meta":
+            self._meta(attrs)
+        if tag in _VOID_TAGS:
+            return
+
+        collector: Optional[List[str]] = None
+        if tag in _COLLECTED_TAGS:
+            collector = []
+            if tag == "p":
+                self._paragraphs.append(collector)
+            elif tag == "li":
+                self._list_items.append(collector)
+            elif self._title is None:
+                self._title = collector
+            else:
+                # Only the first h1 is the title.
+                collector = None
+            if collector is not None:
+                self._active.append(collector)
+        elif tag in _RAW_TEXT_TAGS:
+            self._raw_depth += 1
+            if tag == "script" and (attrs.get("type") or "").strip().lower() == "application/ld+json":
+                self._json_ld = []
+        self._stack.append((tag, collector))
+
+    def end(self, tag: str) -> None:
+        # Close the most recently opened element with this name (and anything
+        # left open inside it); a stray end tag is ignored.
+        for i in range(len(self._stack) - 1, -1, -1):
+            if self._stack[i][0] == tag:
+                break
+        else:
+            return
+        while len(self._stack) > i:
+            self._pop()
+
+    def text(self, data: str) -> None:
+        if self.fields.price_text is None and PRICE_MARKER in data:
+            self.fields.price_text = data
+        if self._json_ld is not None:
+            self._json_ld.append(data)
+        if self._raw_depth or not self._active:
+            return
+        stripped = data.strip()
+        if stripped:
+            for collector in self._active:
+                collector.append(stripped)
+
+    def comment(self, data: str) -> None:
+        if self.fields.price_text is None and PRICE_MARKER in data:
+            self.fields.price_text = data
+
+    def close(self) -> PageFields:
+        while self._stack:
+            self._pop()
+        fields = self.fields
+        if self._title is not None:
+            fields.title = "".join(self._title)
+        fields.paragraphs = [" ".join(parts) for parts in self._paragraphs]
+        fields.list_items = [" ".join(parts) for parts in self._list_items]
+        return fields
+
+    def _pop(self) -> None:
+        tag, collector = self._stack.pop()
+        if collector is not None:
+            self._active.remove(collector)
+        elif tag in _RAW_TEXT_TAGS:
+            self._raw_depth -= 1
+            if tag == "script" and self._json_ld is not None:
+                self.fields.json_ld.append("".join(self._json_ld))
+                self._json_ld = None
+
+    def _meta(self, attrs: Dict[str, Optional[str]]) -> None:
+        if not self._seen_description and attrs.get("name") == "description":
+            self._seen_description = True
+            content = attrs.get("content")
+            if content:
+                self.fields.meta_description = content.strip()
+        if not self._seen_og_image and attrs.get("property") == "og:image":
+            self._seen_og_image = True
+            self.fields.og_image = attrs.get("content") or None
+
+
+# ---------------------------------------------------------------------------
+# Backends
+
+
+class _StdlibEventParser(HTMLParser):
+    """
+    Pure-Python fallback on `html.parser`, always available.
+    """
+
+    def __init__(self, collector: _FieldCollector) -> None:
+        super().__init__(convert_charrefs=True)
+        self._collector = collector
+        self._text: List[str] = []
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        self._flush()
+        self._collector.start(tag, dict(attrs))
+
+    def handle_startendtag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        self._flush()
+        self._collector.start(tag, dict(attrs))
+        if tag not in _VOID_TAGS:
+            self._collector.end(tag)
+
+    def handle_endtag(self, tag: str) -> None:
+        self._flush()
+        self._collector.end(tag)
+
+    def handle_data(self, data: str) -> None:
+        # html.parser may split one run of text (e.g. around a bare "<");
+        # buffer until the next markup event so each run is one string.
+        self._text.append(data)
+
+    def handle_comment(self, data: str) -> None:
+        self._flush()
+        self._collector.comment(data)
+
+    def handle_decl(self, decl: str) -> None:
+        self._flush()
+
+    def handle_pi(self, data: str) -> None:
+        self._flush()
+
+    def unknown_decl(self, data: str) -> None:
+        self._flush()
+
+    def close(self) -> None:
+        super().close()
+        self._flush()
+
+    def _flush(self) -> None:
+        if self._text:
+            self._collector.text("".join(self._text))
+            self._text = []
+
+
+def _extract_stdlib(html: str) -> PageFields:
+    collector = _FieldCollector()
+    parser = _StdlibEventParser(collector)
+    parser.feed(html)
+    parser.close()
+    return collector.close()
+
+
+def _extract_selectolax(html: str) -> PageFields:
+    from selectolax.parser import HTMLParser as SelectolaxParser
+
+    collector = _FieldCollector()
+    start, end, text, comment = collector.start, collector.end, collector.text, collector.comment
+
+    # Iterative pre-order walk of the C tree from the document node (so
+    # comments before <html> are seen); an element's end event is emitted
+    # once its last child has been visited.
+    node = SelectolaxParser(html).root.parent.child
+    while node is not None:
+        tag = node.tag
+        if tag == "-text":
+            text(node.text_content or "")
+        elif tag == "_comment":
+            comment(node.html[4:-3])
+        elif tag[0] not in "-_":
+            start(tag, node.attributes)
+            child = node.child
+            if child is not None:
+                node = child
+                continue
+            end(tag)
+        while node.next is None:
+            node = node.parent
+            # Back at the document node, which has no parent.
+            if node is None or node.parent is None:
+                return collector.close()
+            end(node.tag)
+        node = node.next
+    return collector.close()
+
+
+class _LxmlTarget:
+    """
+    Parser target for lxml's libxml2 HTML parser, which calls back into
+    Python from C as it tokenizes.
+    """
+
+    def __init__(self, collector: _FieldCollector) -> None:
+        self._collector = collector
+        self._text: List[str] = []
+
+    def start(self, tag: str, attrs: Dict[str, Optional[str]]) -> None:
+        self._flush()
+        self._collector.start(tag, attrs)
+
+    def end(self, tag: str) -> None:
+        self._flush()
+        self._collector.end(tag)
+
+    def data(self, data: str) -> None:
+        # libxml2 may deliver one run of text in several pieces.
+        self._text.append(data)
+
+    def comment(self, data: str) -> None:
+        self._flush()
+        self._collector.comment(data)
+
+    def close(self) -> PageFields:
+        self._flush()
+        return self._collector.close()
+
+    def _flush(self) -> None:
+        if self._text:
+            self._collector.text("".join(self._text))
+            self._text = []
+
+
+def _extract_lxml(html: str) -> PageFields:
+    from lxml import etree
+
+    # Bytes with an explicit encoding: lxml refuses a `str` that starts with
+    # an XML declaration naming an encoding (`<?xml ... encoding="utf-8"?>`).
+    parser = etree.HTMLParser(encoding="utf-8", target=_LxmlTarget(_FieldCollector()))
+    return etree.fromstring(html.encode("utf-8"), parser)
+
+
+_BACKENDS: Dict[str, Tuple[str, Callable[[str], PageFields]]] = {
+    "selectolax": ("selectolax.parser", _extract_selectolax),
+    "lxml": ("lxml.etree", _extract_lxml),
+    "stdlib": ("html.parser", _extract_stdlib),
+}
+
+# Preference order for "auto": C-backed parsers first, fastest first
+# (see benchmarks/bench_html_parse.py).
+_AUTO_ORDER = ("lxml", "selectolax", "stdlib")
+
+_resolved: Dict[str, str] = {}
+
+
+def resolve_backend(name: str = "auto") -> str:
+    """
+    Map a configured backend name ("auto", "selectolax", "lxml", "stdlib")
+    to one that is importable here. "auto" picks the first installed C-backed
+    parser and falls back to the standard library.
+    """
+    if name in _resolved:
+        return _resolved[name]
+    if name != "auto" and name not in _BACKENDS:
+        raise ValueError(f"Unknown HTML parser backend: {name!r}")
+
+    candidates = _AUTO_ORDER if name == "auto" else (name,)
+    for candidate in candidates:
+        module = _BACKENDS[candidate][0]
+        try:
+            __import__(module)
+        except ImportError:
+            continue
+        _resolved[name] = candidate
+        return candidate
+    raise ImportError(f"HTML parser backend {name!r} is not installed")
+
+
+def extract_page_fields(html: str, backend: str = "auto") -> PageFields:
+    """
+    Parse a product page once and return its raw fields.
+    """
+    return _BACKENDS[resolve_backend(backend)][1](html)
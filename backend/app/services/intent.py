@@ -0,0 +1,193 @@
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable
+
+
+# Keyword sets used by the chat pipeline's heuristic intent detection.
+# Every phrase is matched on word boundaries, so "bp" does not fire on "bpm".
+
+# Direct safety wording
+SAFETY_KEYWORDS = (
+    "side effect",
+    "side effects",
+    "side-effect",
+    "side-effects",
+    "is it safe",
+    "safe to use",
+    "is it okay",
+    "is it ok",
+    "is it fine",
+    "okay to use",
+    "ok to use",
+    "fine to use",
+    "harmful",
+    "allergy",
+    "allergies",
+    "allergic",
+    "contraindication",
+    "contraindications",
+    "interaction",
+    "interactions",
+)
+
+# Common condition words that usually imply a safety context when paired
+# with a question.
+CONDITION_KEYWORDS = (
+    "pcos",
+    "pregnant",
+    "pregnancy",
+    "bp",
+    "blood pressure",
+    "diabetes",
+    "thyroid",
+)
+
+ACTION_WORDS = ("use", "take", "have", "apply")
+
+# Simple "no more help" messages; matched only at the very end of the text.
+CLOSERS = (
+    "no",
+    "no thank you",
+    "no thanks",
+    "that's all",
+    "that is all",
+    "im fine",
+    "i'm fine",
+    "all good",
+    "ok thanks",
+    "okay thanks",
+    "thank you",
+    "thanks",
+    "thankyou",
+)
+
+GENERIC_TRIGGERS = (
+    "hair growth",
+    "hair products",
+    "recommend something",
+    "recommend products",
+    "suggest something",
+)
+
+SYMPTOM_KEYWORDS = (
+    "dandruff",
+    "itchy",
+    "itching",
+    "flaky",
+    "hair fall",
+    "hairfall",
+    "pcos",
+    "dry scalp",
+    "oily scalp",
+    "split ends",
+)
+
+# Queries shorter than this with a generic trigger and no symptom are
+# answered with a clarifying question only.
+CLARIFY_MAX_LENGTH = 25
+
+_SAFETY = 1
+_CONDITION = 2
+_ACTION = 4
+_GENERIC = 8
+_SYMPTOM = 16
+_QUESTION = 32
+
+
+def _keyword_flags() -> Dict[str, int]:
+    flags: Dict[str, int] = {}
+    for words, flag in (
+        (SAFETY_KEYWORDS, _SAFETY),
+        (CONDITION_KEYWORDS, _CONDITION),
+        (ACTION_WORDS, _ACTION),
+        (GENERIC_TRIGGERS, _GENERIC),
+        (SYMPTOM_KEYWORDS, _SYMPTOM),
+    ):
+        for word in words:
+            # A phrase may belong to several sets ("pcos").
+            flags[word] = flags.get(word, 0) | flag
+    return flags
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """
+    Compile phrases into a regex shaped like a prefix trie, e.g.
+    ["side effect", "side effects"] -> "side\\ effect(?:s)?". Each character
+    position is tried once instead of once per phrase, and the greedy
+    optional tails make the longest phrase win.
+    """
+    root: Dict[str, dict] = {}
+    for word in words:
+        node = root
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(root)
+
+
+_KEYWORD_FLAGS = _keyword_flags()
+
+# One combined pattern. At each word boundary a closer that runs to the end
+# of the text is tried first, then any keyword; question marks are picked up
+# too. A single `finditer` pass therefore yields every signal we need.
+_PATTERN = re.compile(
+    rf"\b(?:(?P<closing>{_trie_pattern(CLOSERS)})\Z"
+    rf"|(?P<keyword>{_trie_pattern(_KEYWORD_FLAGS)})\b)"
+    r"|(?P<question>\?)",
+    re.IGNORECASE,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class Intents:
+    side_effect: bool
+    closing: bool
+    needs_clarification: bool
+
+
+def classify_intents(text: str) -> Intents:
+    """
+    Compute every intent flag for a user message in one scan.
+
+    - side_effect: safety / side-effect / condition-compatibility question,
+      e.g. "I also have PCOS, is it fine to use it?".
+    - closing: the message ends the conversation ("no thanks", "that's all").
+    - needs_clarification: a very short, generic request ("hair growth")
+      with no concrete symptom.
+    """
+    t = text.strip()
+    flags = 0
+    closing = False
+    for match in _PATTERN.finditer(t):
+        kind = match.lastgroup
+        if kind == "keyword":
+            flags |= _KEYWORD_FLAGS[match.group("keyword").lower()]
+        elif kind == "question":
+            flags |= _QUESTION
+        else:
+            closing = True
+
+    # A condition mentioned in a question about using/taking something is
+    # treated as safety intent as well.
+    condition_question = _CONDITION | _ACTION | _QUESTION
+    side_effect = bool(flags & _SAFETY) or flags & condition_question == condition_question
+
+    needs_clarification = (
+        len(t) < CLARIFY_MAX_LENGTH
+        and bool(flags & _GENERIC)
+        and not flags & _SYMPTOM
+    )
+
+    return Intents(
+        side_effect=side_effect,
+        closing=closing,
+        needs_clarification=needs_clarification,
+    )
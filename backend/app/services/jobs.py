@@ -0,0 +1,363 @@
+import json
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.core.metrics import metrics
+from app.db.session import SessionLocal
+from app.models.job import ACTIVE_STATUSES, Job
+
+
+settings = get_settings()
+
+# `func(db, progress, **params)` returns the job's JSON-serialisable result.
+# With the process executor it must be a module-level function.
+JobFunc = Callable[..., Dict[str, Any]]
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _use_processes() -> bool:
+    """
+    Jobs run in a separate, lower-priority process unless the vector index
+    is only visible to this process (Chroma's embedded client, or an
+    ephemeral store), or there is no shared catalogue version file to carry
+    the job's catalogue bump back to this process; then they run on a
+    thread here.
+    """
+    if not settings.catalogue_version_path:
+        return False
+    if settings.admin_job_executor == "auto":
+        return (
+            settings.vector_store_backend == "numpy"
+            and settings.vector_store_mode == "persistent"
+        )
+    return settings.admin_job_executor == "process"
+
+
+def _init_job_process() -> None:
+    if settings.admin_job_nice and hasattr(os, "nice"):
+        os.nice(settings.admin_job_nice)
+
+
+def _run_in_child(job_id: str, kind: str, func: JobFunc, params: Dict[str, Any]) -> str:
+    return jobs._execute(job_id, kind, func, params)
+
+
+class JobCancelled(Exception):
+    """
+    Raised inside a job, by its progress callback, once it was cancelled.
+    """
+
+
+class Progress:
+    """
+    Counters of one job, handed to the job function. Services call it with
+    increments, e.g. `progress(pages_fetched=1)`; it never touches the
+    database (the heartbeat thread flushes the counters) and raises
+    `JobCancelled` once the job has been cancelled, so every progress
+    report is also a cancellation point.
+    """
+
+    def __init__(self) -> None:
+        self.cancelled = threading.Event()
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, **increments: int) -> None:
+        with self._lock:
+            for name, value in increments.items():
+                self._counts[name] = self._counts.get(name, 0) + value
+        if self.cancelled.is_set():
+            raise JobCancelled()
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+
+class JobRunner:
+    """
+    Executor for admin jobs that needs no outside service: job rows live in
+    the app database, so any worker can report on or cancel a job another
+    worker started.
+
+    - `submit` inserts a queued row and hands the job to this process's
+      executor: one job at a time, never on the request threadpool. By
+      default that is a single spawned process at `admin_job_nice`, so a
+      scrape or index build competes with chat requests neither for the
+      GIL nor for CPU priority (see `_use_processes`).
+    - A partial unique index allows one queued or running job per kind
+      across all workers. Submitting a kind that is already active returns
+      the active job instead of starting another one.
+    - A heartbeat thread in each process writes the progress counters of
+      the jobs it runs and `heartbeat_at` of those it runs or has queued,
+      every `admin_job_heartbeat_s`, and picks up `cancel_requested`. An
+      active job whose heartbeat is older than `admin_job_stale_s` belonged
+      to a process that died; it is marked failed so its kind can run again.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._queued: Set[str] = set()  # submitted here, not finished
+        self._local: Dict[str, Progress] = {}  # running in this process
+        self._executor: Optional[Executor] = None
+
+    @property
+    def owner(self) -> str:
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def _start(self) -> None:
+        # Threads don't survive fork, so they start on first use in each
+        # process rather than at import (which may happen in a master).
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._queued, self._local, self._executor = set(), {}, None
+            threading.Thread(target=self._beat, name="admin-job-heartbeat", daemon=True).start()
+
+    def _executor_for_submit(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if _use_processes():
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=1,
+                        # Forking a server process with live threads is unsafe.
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=_init_job_process,
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=1, thread_name_prefix="admin-job"
+                    )
+            return self._executor
+
+    # -- API ----------------------------------------------------------------
+
+    def submit(self, db: Session, kind: str, func: JobFunc, **params: Any) -> Tuple[Job, bool]:
+        """
+        Queue `func` as a job of `kind`. Returns (job, created); `created`
+        is False when an active job of that kind was returned instead.
+        """
+        self._start()
+        for _ in range(3):
+            self._expire_stale(db)
+            job = Job(
+                id=uuid.uuid4().hex,
+                kind=kind,
+                status="queued",
+                params=json.dumps(params),
+                progress="{}",
+                owner=self.owner,
+                # Microseconds, unlike SQLite's CURRENT_TIMESTAMP, so
+                # `recent` orders jobs submitted in the same second.
+                created_at=_now(),
+                heartbeat_at=_now(),
+            )
+            db.add(job)
+            try:
+                db.commit()
+            except IntegrityError:
+                db.rollback()
+                active = (
+                    db.query(Job)
+                    .filter(Job.kind == kind, Job.status.in_(ACTIVE_STATUSES))
+                    .one_or_none()
+                )
+                if active is not None:
+                    return active, False
+                continue  # it finished in between; try again
+            with self._lock:
+                self._queued.add(job.id)
+            executor = self._executor_for_submit()
+            if isinstance(executor, ProcessPoolExecutor):
+                future = executor.submit(_run_in_child, job.id, kind, func, params)
+            else:
+                future = executor.submit(self._execute, job.id, kind, func, params)
+            future.add_done_callback(lambda f, job_id=job.id: self._done(job_id, kind, f))
+            metrics.incr("admin_jobs_submitted_total", kind=kind)
+            return job, True
+        raise RuntimeError(f"could not queue a {kind} job")
+
+    def get(self, db: Session, job_id: str) -> Optional[Job]:
+        self._expire_stale(db)
+        return db.get(Job, job_id)
+
+    def recent(self, db: Session, limit: int = 20) -> List[Job]:
+        self._expire_stale(db)
+        return db.query(Job).order_by(Job.created_at.desc()).limit(limit).all()
+
+    def cancel(self, db: Session, job_id: str) -> Optional[Job]:
+        """
+        Cancel a job: a queued job is cancelled at once, a running one at
+        its next progress report (within a heartbeat if another process
+        runs it). Finished jobs are returned unchanged.
+        """
+        db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == "queued")
+            .values(status="cancelled", cancel_requested=True, finished_at=_now())
+        )
+        db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status.in_(ACTIVE_STATUSES))
+            .values(cancel_requested=True)
+        )
+        db.commit()
+        progress = self._local.get(job_id)
+        if progress is not None:
+            progress.cancelled.set()
+        return db.get(Job, job_id)
+
+    def shutdown(self) -> None:
+        """
+        Cancel the jobs this process queued and wait for them to stop (app
+        shutdown).
+        """
+        with self._lock:
+            if self._pid != os.getpid() or self._executor is None:
+                return
+            queued, executor = list(self._queued), self._executor
+        if queued:
+            with SessionLocal() as db:
+                for job_id in queued:
+                    self.cancel(db, job_id)
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    # -- internals ----------------------------------------------------------
+
+    def _expire_stale(self, db: Session) -> None:
+        cutoff = _now() - timedelta(seconds=settings.admin_job_stale_s)
+        result = db.execute(
+            update(Job)
+            .where(Job.status.in_(ACTIVE_STATUSES), Job.heartbeat_at < cutoff)
+            .values(
+                status="failed",
+                error="abandoned: the process running it stopped sending heartbeats",
+                finished_at=_now(),
+            )
+        )
+        if result.rowcount:
+            db.commit()
+
+    def _finish(self, db: Session, job_id: str, progress: Progress, **values: Any) -> None:
+        db.execute(
+            update(Job)
+            .where(Job.id == job_id)
+            .values(progress=json.dumps(progress.snapshot()), finished_at=_now(), **values)
+        )
+        db.commit()
+
+    def _execute(self, job_id: str, kind: str, func: JobFunc, params: Dict[str, Any]) -> str:
+        """
+        Run one job in this process (the job thread, or the job process);
+        returns its final status.
+        """
+        self._start()
+        progress = Progress()
+        with self._lock:
+            self._local[job_id] = progress
+        try:
+            with SessionLocal() as db:
+                # Loses to a cancel that came first.
+                claimed = db.execute(
+                    update(Job)
+                    .where(Job.id == job_id, Job.status == "queued")
+                    .values(status="running", started_at=_now(), heartbeat_at=_now())
+                ).rowcount
+                db.commit()
+                if not claimed:
+                    return "cancelled"
+                try:
+                    with metrics.span(f"job.{kind}"):
+                        result = func(db, progress, **params)
+                    status, values = "succeeded", {"result": json.dumps(result)}
+                except JobCancelled:
+                    db.rollback()
+                    status, values = "cancelled", {}
+                except Exception as exc:
+                    db.rollback()
+                    status, values = "failed", {"error": f"{type(exc).__name__}: {exc}"}
+                self._finish(db, job_id, progress, status=status, **values)
+                return status
+        finally:
+            with self._lock:
+                self._local.pop(job_id, None)
+
+    def _done(self, job_id: str, kind: str, future: "Future[str]") -> None:
+        with self._lock:
+            self._queued.discard(job_id)
+        if future.cancelled():
+            return
+        exc = future.exception()
+        if exc is None:
+            metrics.incr("admin_jobs_finished_total", kind=kind, status=future.result())
+            return
+        # The job process died (or the job could not be handed to it).
+        if isinstance(exc, BrokenProcessPool):
+            with self._lock:
+                self._executor = None
+        with SessionLocal() as db:
+            db.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status.in_(ACTIVE_STATUSES))
+                .values(status="failed", error=f"{type(exc).__name__}: {exc}", finished_at=_now())
+            )
+            db.commit()
+        metrics.incr("admin_jobs_finished_total", kind=kind, status="failed")
+
+    def _beat(self) -> None:
+        while True:
+            time.sleep(settings.admin_job_heartbeat_s)
+            with self._lock:
+                queued, local = list(self._queued), dict(self._local)
+            if not queued and not local:
+                continue
+            try:
+                with SessionLocal() as db:
+                    now = _now()
+                    if queued:
+                        # Running jobs are kept alive by the process running them.
+                        db.execute(
+                            update(Job)
+                            .where(Job.id.in_(queued), Job.status == "queued")
+                            .values(heartbeat_at=now)
+                        )
+                    for job_id, progress in local.items():
+                        db.execute(
+                            update(Job)
+                            .where(Job.id == job_id, Job.status.in_(ACTIVE_STATUSES))
+                            .values(progress=json.dumps(progress.snapshot()), heartbeat_at=now)
+                        )
+                    cancelled = [
+                        job_id
+                        for (job_id,) in db.query(Job.id).filter(
+                            Job.id.in_(list(local)), Job.cancel_requested.is_(True)
+                        )
+                    ]
+                    db.commit()
+            except Exception:
+                # A database hiccup must not stop the heartbeat; jobs only
+                # go stale after `admin_job_stale_s` without one.
+                continue
+            for job_id in cancelled:
+                local[job_id].cancelled.set()
+
+
+jobs = JobRunner()
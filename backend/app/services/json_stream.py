@@ -0,0 +1,159 @@
+from typing import List
+
+
+_ESCAPES = {
+    '"': '"',
+    "\\": "\\",
+    "/": "/",
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+}
+
+
+_HEX_DIGITS = frozenset("0123456789abcdefABCDEF")
+_REPLACEMENT = "\ufffd"
+
+
+def _hex4(digits: str) -> int | None:
+    # `int(..., 16)` alone would also accept signs, spaces and underscores.
+    if len(digits) != 4 or not _HEX_DIGITS.issuperset(digits):
+        return None
+    return int(digits, 16)
+
+
+class StreamingStringField:
+    """
+    Incrementally extract one top-level string field from a JSON object that
+    arrives in arbitrary chunks (e.g. LLM tokens).
+
+    `feed()` returns the newly decoded characters of the field's value as
+    soon as they are complete, so `{"reply": "Hel` yields "Hel" before the
+    rest of the object exists. Escape sequences split across chunks are held
+    back until they can be decoded. Nested objects/arrays and other keys are
+    skipped; only the first occurrence of the field is streamed.
+    """
+
+    def __init__(self, field: str) -> None:
+        self.field = field
+        self.value = ""
+        self.done = False
+        self._buf = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._collect_key = False
+        self._key_chars: List[str] = []
+        self._last_key: str | None = None
+        self._expect_key = False
+        self._await_value = False
+        self._in_value = False
+
+    def feed(self, chunk: str) -> str:
+        if self.done:
+            return ""
+        self._buf += chunk
+        buf = self._buf
+        n = len(buf)
+        i = self._pos
+        out: List[str] = []
+
+        while i < n:
+            c = buf[i]
+
+            if self._in_value:
+                if c == '"':
+                    self._in_value = False
+                    self.done = True
+                    i += 1
+                    break
+                if c != "\\":
+                    out.append(c)
+                    i += 1
+                    continue
+                # Escape sequence: wait for the whole thing before decoding.
+                if i + 1 >= n:
+                    break
+                esc = buf[i + 1]
+                if esc != "u":
+                    out.append(_ESCAPES.get(esc, esc))
+                    i += 2
+                    continue
+                if i + 6 > n:
+                    break
+                code = _hex4(buf[i + 2 : i + 6])
+                if code is None:
+                    # Malformed escape from the model: pass it through as
+                    # text and let the final parse of the whole reply judge.
+                    out.append("\\u")
+                    i += 2
+                    continue
+                if 0xD800 <= code < 0xE000:
+                    # Surrogate: a high one combines with a following low
+                    # \uXXXX, which may still be on its way.
+                    tail = buf[i + 6 : i + 12]
+                    if code < 0xDC00 and len(tail) < 6 and "\\u".startswith(tail[:2]):
+                        break
+                    low = _hex4(tail[2:]) if tail[:2] == "\\u" else None
+                    if code < 0xDC00 and low is not None and 0xDC00 <= low < 0xE000:
+                        out.append(chr(0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)))
+                        i += 12
+                        continue
+                    # A lone surrogate can't be encoded for the client.
+                    out.append(_REPLACEMENT)
+                    i += 6
+                    continue
+                out.append(chr(code))
+                i += 6
+                continue
+
+            if self._in_string:
+                if c == "\\":
+                    if i + 1 >= n:
+                        break
+                    if self._collect_key:
+                        self._key_chars.append(buf[i : i + 2])
+                    i += 2
+                    continue
+                if c == '"':
+                    self._in_string = False
+                    if self._collect_key:
+                        self._last_key = "".join(self._key_chars)
+                        self._collect_key = False
+                elif self._collect_key:
+                    self._key_chars.append(c)
+                i += 1
+                continue
+
+            if self._await_value:
+                if c in " \t\r\n":
+                    i += 1
+                    continue
+                self._await_value = False
+                if c == '"':
+                    self._in_value = True
+                    i += 1
+                    continue
+
+            if c == '"':
+                self._in_string = True
+                self._collect_key = self._depth == 1 and self._expect_key
+                self._key_chars = []
+                self._expect_key = False
+            elif c in "{[":
+                self._depth += 1
+                self._expect_key = self._depth == 1 and c == "{"
+            elif c in "}]":
+                self._depth -= 1
+            elif c == "," and self._depth == 1:
+                self._expect_key = True
+            elif c == ":" and self._depth == 1:
+                self._await_value = self._last_key == self.field
+            i += 1
+
+        self._pos = i
+        text = "".join(out)
+        self.value += text
+        return text
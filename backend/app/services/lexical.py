@@ -0,0 +1,242 @@
+import math
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.render_cache import product_renders
+from app.services.vectorstore import normalize_category
+
+
+# Keeps version-like and decimal tokens whole ("2.0", "5.5"), so "Shampoo 2.0"
+# and "minoxidil 5%" match on their numbers.
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:\.[0-9]+)*")
+
+# Common English words plus the labels `build_product_text` puts in every
+# document; they carry no ranking signal.
+_STOPWORDS = frozenset(
+    """
+    a an and are as at be by can do does for from has have how i in is it its
+    me my of on or so that the this to what which with you your
+    title category price short description key benefits details
+    """.split()
+)
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+@dataclass(frozen=True, slots=True)
+class _Doc:
+    content_hash: str
+    terms: Dict[str, int]  # term -> frequency
+    length: int
+    category: Optional[str]
+
+
+@dataclass(frozen=True)
+class _Packed:
+    """
+    Read-only BM25 index in CSR layout: the postings of term `t` are
+    `doc_index[offsets[t]:offsets[t + 1]]` with matching precomputed BM25
+    weights, so scoring a query is a few slice-adds into one float array.
+    """
+
+    vocabulary: Dict[str, int]
+    offsets: np.ndarray  # int64, len(vocabulary) + 1
+    doc_index: np.ndarray  # int32
+    weights: np.ndarray  # float32
+    product_ids: np.ndarray  # int64, per document
+    categories: Dict[str, np.ndarray]  # category -> bool mask over documents
+
+
+_EMPTY = _Packed(
+    vocabulary={},
+    offsets=np.zeros(1, dtype=np.int64),
+    doc_index=np.empty(0, dtype=np.int32),
+    weights=np.empty(0, dtype=np.float32),
+    product_ids=np.empty(0, dtype=np.int64),
+    categories={},
+)
+
+
+def _pack(docs: Dict[int, _Doc]) -> _Packed:
+    if not docs:
+        return _EMPTY
+    product_ids = sorted(docs)
+    avg_length = sum(d.length for d in docs.values()) / len(docs) or 1.0
+
+    postings: Dict[str, List[Tuple[int, float]]] = {}
+    for index, pid in enumerate(product_ids):
+        doc = docs[pid]
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * doc.length / avg_length)
+        for term, tf in doc.terms.items():
+            postings.setdefault(term, []).append((index, tf * (BM25_K1 + 1) / (tf + norm)))
+
+    n_docs = len(product_ids)
+    vocabulary: Dict[str, int] = {}
+    offsets = np.zeros(len(postings) + 1, dtype=np.int64)
+    doc_index = np.empty(sum(len(p) for p in postings.values()), dtype=np.int32)
+    weights = np.empty(len(doc_index), dtype=np.float32)
+    position = 0
+    for term_id, (term, entries) in enumerate(postings.items()):
+        vocabulary[term] = term_id
+        # Lucene's non-negative idf variant.
+        idf = math.log(1 + (n_docs - len(entries) + 0.5) / (len(entries) + 0.5))
+        for index, tf_weight in entries:
+            doc_index[position] = index
+            weights[position] = idf * tf_weight
+            position += 1
+        offsets[term_id + 1] = position
+
+    categories: Dict[str, np.ndarray] = {}
+    for index, pid in enumerate(product_ids):
+        category = normalize_category(docs[pid].category)
+        if category:
+            mask = categories.setdefault(category, np.zeros(n_docs, dtype=bool))
+            mask[index] = True
+
+    return _Packed(
+        vocabulary=vocabulary,
+        offsets=offsets,
+        doc_index=doc_index,
+        weights=weights,
+        product_ids=np.asarray(product_ids, dtype=np.int64),
+        categories=categories,
+    )
+
+
+class LexicalIndex:
+    """
+    In-memory BM25 index over the same `build_product_text` documents the
+    vector store embeds.
+
+    `sync` takes the full catalogue and re-tokenises only products whose
+    rendered document changed; the packed arrays are then rebuilt from the
+    cached term counts (IDF and average length are corpus-wide, so every
+    change repacks). Searches read an immutable `_Packed` that is swapped
+    in with one assignment.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._docs: Dict[int, _Doc] = {}
+        self._packed = _EMPTY
+        self._source: Optional[Sequence] = None
+        self._pending: Optional[Sequence] = None
+
+    def __len__(self) -> int:
+        return len(self._packed.product_ids)
+
+    def sync(self, products: Sequence) -> bool:
+        """
+        Make the index hold exactly `products`. Returns True if it changed.
+
+        Passing the same sequence object again (e.g. an unchanged product
+        cache snapshot) is an O(1) no-op.
+        """
+        if products is self._source:
+            return False
+        with self._lock:
+            if products is self._source:
+                return False
+            docs: Dict[int, _Doc] = {}
+            changed = False
+            for product in products:
+                rendered = product_renders.get(product)
+                doc = self._docs.get(product.id)
+                if doc is None or doc.content_hash != rendered.content_hash:
+                    terms = tokenize(rendered.document)
+                    doc = _Doc(
+                        content_hash=rendered.content_hash,
+                        terms=dict(Counter(terms)),
+                        length=len(terms),
+                        category=product.category,
+                    )
+                    changed = True
+                docs[product.id] = doc
+            changed = changed or len(docs) != len(self._docs)
+            if changed:
+                self._packed = _pack(docs)
+                self._docs = docs
+            self._source = products
+            return changed
+
+    def refresh(self, products: Sequence) -> None:
+        """
+        Like `sync`, but off the caller's path: while the index has
+        something to serve, the sync runs on a background thread and
+        searches keep using the current index until it is swapped in. Used
+        by request handlers, so a catalogue change made by a scrape or index
+        build never puts a full repack in front of a chat request.
+        """
+        if products is self._source or products is self._pending:
+            return
+        if not len(self):
+            self.sync(products)
+            return
+        self._pending = products
+
+        def run() -> None:
+            self.sync(products)
+            if self._pending is products:
+                self._pending = None
+
+        threading.Thread(target=run, name="lexical-sync", daemon=True).start()
+
+    def search(
+        self, query: str, top_k: int = 8, category: Optional[str] = None
+    ) -> List[int]:
+        """
+        Ids of the best-scoring products for `query`, best first. Products
+        that share no term with the query are never returned. `category`
+        restricts the search to that category before ranking.
+        """
+        packed = self._packed
+        term_ids = [packed.vocabulary.get(t) for t in tokenize(query)]
+        term_counts = Counter(t for t in term_ids if t is not None)
+        if not term_counts:
+            return []
+
+        scores = np.zeros(len(packed.product_ids), dtype=np.float32)
+        for term_id, qtf in term_counts.items():
+            start, end = packed.offsets[term_id], packed.offsets[term_id + 1]
+            # A term's postings hold each document once, so fancy-index
+            # addition is safe here.
+            scores[packed.doc_index[start:end]] += qtf * packed.weights[start:end]
+
+        category = normalize_category(category)
+        if category is not None:
+            mask = packed.categories.get(category)
+            if mask is None:
+                return []
+            scores[~mask] = 0.0
+
+        matched = np.flatnonzero(scores)
+        if len(matched) > top_k:
+            matched = matched[np.argpartition(-scores[matched], top_k - 1)[:top_k]]
+        # Highest score first; ties go to the lower product id.
+        order = np.lexsort((packed.product_ids[matched], -scores[matched]))
+        return packed.product_ids[matched[order]].tolist()
+
+
+def reciprocal_rank_fusion(rankings: Iterable[Sequence[int]], k: int = 60) -> List[int]:
+    """
+    Merge ranked id lists with reciprocal rank fusion: each list adds
+    1 / (k + rank) to an id's score. Ties keep first-seen order.
+    """
+    scores: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, pid in enumerate(ranking, start=1):
+            scores[pid] = scores.get(pid, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=scores.__getitem__, reverse=True)
+
+
+lexical_index = LexicalIndex()
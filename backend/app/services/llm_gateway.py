@@ -0,0 +1,333 @@
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Deque, Dict, List, Optional, TypeVar
+
+import httpx
+
+from app.core.config import Settings, get_settings
+from app.core.metrics import metrics
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
+
+
+T = TypeVar("T")
+
+# Statuses worth retrying: timeouts, conflicts, rate limits, server errors.
+_RETRY_STATUSES = {408, 409, 429}
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    # The SDK is loaded with the first client; by the time a call has failed
+    # this import is a dictionary lookup.
+    from openai import APIConnectionError, APIStatusError
+
+    if isinstance(exc, APIConnectionError):  # includes APITimeoutError
+        return True
+    if isinstance(exc, APIStatusError):
+        return exc.status_code in _RETRY_STATUSES or exc.status_code >= 500
+    return False
+
+
+def _is_gone(exc: BaseException) -> bool:
+    from openai import APIStatusError
+
+    return isinstance(exc, APIStatusError) and exc.status_code == 404
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    response = getattr(exc, "response", None)
+    if response is None:
+        return None
+    for header, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        try:
+            return float(response.headers[header]) * scale
+        except (KeyError, ValueError):
+            continue
+    return None
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket shared by sync and async callers. `reserve`
+    takes a token immediately (the balance may go negative) and returns how
+    long the caller must wait before using it, so waiters queue fairly
+    without polling.
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+class LLMGateway:
+    """
+    The one way this app talks to the OpenAI-compatible provider.
+
+    - One pooled HTTP client each for sync and async calls, with explicit
+      connect/read timeouts; the SDK's own retries are off.
+    - A token bucket (`llm_rate_per_s`, `llm_burst`) and a cap on calls in
+      flight (`llm_max_in_flight`) shared by chat and embeddings, so a 429
+      storm queues here instead of piling up blocked threads.
+    - Retries with full-jitter exponential backoff on 429/5xx, timeouts and
+      connection errors, honouring `Retry-After`.
+    - Optional hedging (async, non-streaming): if a call is still running
+      after the p95 latency of recent calls of its kind, a second identical
+      request is sent and the first answer wins.
+    - Chat calls that still fail move on to `chat_fallback_model`.
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        self.settings = settings
+        self._timeout = httpx.Timeout(
+            settings.llm_read_timeout_s, connect=settings.llm_connect_timeout_s
+        )
+        self._limits = httpx.Limits(
+            max_connections=settings.llm_max_connections,
+            max_keepalive_connections=settings.llm_max_connections,
+        )
+        # Built on first use: importing the SDK and opening pools is left to
+        # the processes that actually call the provider.
+        self._client: Optional["OpenAI"] = None
+        self._async_client: Optional["AsyncOpenAI"] = None
+        self._client_lock = threading.Lock()
+
+        self._bucket = TokenBucket(settings.llm_rate_per_s, settings.llm_burst)
+        self._async_slots = asyncio.Semaphore(settings.llm_max_in_flight)
+        self._sync_slots = threading.BoundedSemaphore(settings.llm_max_in_flight)
+        self._latencies: Dict[str, Deque[float]] = {}
+        self.counters: Dict[str, int] = {
+            "requests": 0,
+            "retries": 0,
+            "hedges": 0,
+            "hedge_wins": 0,
+            "fallbacks": 0,
+            "failures": 0,
+        }
+
+    def _client_options(self) -> Dict[str, Any]:
+        return {
+            "api_key": self.settings.openai_api_key,
+            "base_url": self.settings.openai_base_url or None,
+            "timeout": self._timeout,
+            "max_retries": 0,  # retries happen here, with the shared limits
+        }
+
+    @property
+    def client(self) -> "OpenAI":
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    from openai import OpenAI
+
+                    self._client = OpenAI(
+                        **self._client_options(),
+                        http_client=httpx.Client(timeout=self._timeout, limits=self._limits),
+                    )
+        return self._client
+
+    @property
+    def async_client(self) -> "AsyncOpenAI":
+        # Recreated after `aclose`, like the shared httpx client in core.http.
+        if self._async_client is None or self._async_client.is_closed():
+            from openai import AsyncOpenAI
+
+            self._async_client = AsyncOpenAI(
+                **self._client_options(),
+                http_client=httpx.AsyncClient(timeout=self._timeout, limits=self._limits),
+            )
+        return self._async_client
+
+    # -- bookkeeping ---------------------------------------------------------
+
+    def _record(self, kind: str, seconds: float) -> None:
+        window = self._latencies.get(kind)
+        if window is None:
+            window = self._latencies[kind] = deque(maxlen=256)
+        window.append(seconds)
+        metrics.observe(f"llm.{kind}", seconds)
+
+    def record_usage(self, model: str, usage: Any) -> None:
+        """
+        Count the tokens of a response's `usage` block (also called for the
+        usage chunk of a stream, when the provider sends one).
+        """
+        for kind in ("prompt", "completion"):
+            tokens = getattr(usage, f"{kind}_tokens", None)
+            if tokens:
+                metrics.incr("llm_tokens_total", tokens, model=model, kind=kind)
+
+    def _hedge_delay(self, kind: str) -> Optional[float]:
+        if not self.settings.llm_hedge_enabled:
+            return None
+        window = self._latencies.get(kind)
+        if window is None or len(window) < self.settings.llm_hedge_min_samples:
+            return None
+        ordered = sorted(window)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    def _backoff(self, attempt: int, exc: BaseException) -> float:
+        ceiling = min(
+            self.settings.llm_backoff_max_s, self.settings.llm_backoff_base_s * 2**attempt
+        )
+        delay = random.uniform(0, ceiling)
+        hint = _retry_after(exc)
+        if hint is not None:
+            delay = max(delay, min(hint, self.settings.llm_backoff_max_s))
+        return delay
+
+    # -- async ----------------------------------------------------------------
+
+    async def _send(self, kind: str, make: Callable[[], Awaitable[T]]) -> T:
+        wait = self._bucket.reserve()
+        if wait:
+            await asyncio.sleep(wait)
+        async with self._async_slots:
+            self.counters["requests"] += 1
+            started = time.perf_counter()
+            result = await make()
+            self._record(kind, time.perf_counter() - started)
+            return result
+
+    async def _attempt(self, kind: str, make: Callable[[], Awaitable[T]], hedge: bool) -> T:
+        delay = self._hedge_delay(kind) if hedge else None
+        if delay is None:
+            return await self._send(kind, make)
+
+        primary = asyncio.ensure_future(self._send(kind, make))
+        pending = {primary}
+        error: Optional[BaseException] = None
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return primary.result()
+            self.counters["hedges"] += 1
+            backup = asyncio.ensure_future(self._send(kind, make))
+            pending.add(backup)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup:
+                            self.counters["hedge_wins"] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # The losing request (or both, if our caller was cancelled).
+            for task in pending:
+                task.cancel()
+
+    async def _call(self, kind: str, make: Callable[[], Awaitable[T]], hedge: bool = True) -> T:
+        attempts = self.settings.llm_max_retries + 1
+        for attempt in range(attempts):
+            try:
+                return await self._attempt(kind, make, hedge)
+            except Exception as exc:
+                if attempt == attempts - 1 or not _is_retryable(exc):
+                    self.counters["failures"] += 1
+                    raise
+                self.counters["retries"] += 1
+                await asyncio.sleep(self._backoff(attempt, exc))
+        raise AssertionError("unreachable")
+
+    def _chat_models(self, model: Optional[str]) -> List[str]:
+        primary = model or self.settings.chat_model
+        fallback = self.settings.chat_fallback_model
+        return [primary, fallback] if fallback and fallback != primary else [primary]
+
+    async def chat_completion(
+        self, messages: List[Dict[str, str]], model: Optional[str] = None, **kwargs: Any
+    ) -> Any:
+        """
+        `chat.completions.create` through the gateway. With `stream=True`
+        the returned stream is opened with retries, but a failure after the
+        first chunk is not retried.
+        """
+        models = self._chat_models(model)
+        for index, name in enumerate(models):
+            try:
+                response = await self._call(
+                    "chat",
+                    lambda name=name: self.async_client.chat.completions.create(
+                        model=name, messages=messages, **kwargs
+                    ),
+                    hedge=not kwargs.get("stream"),
+                )
+            except Exception as exc:
+                if index == len(models) - 1 or not (_is_gone(exc) or _is_retryable(exc)):
+                    raise
+                self.counters["fallbacks"] += 1
+                continue
+            if not kwargs.get("stream") and getattr(response, "usage", None) is not None:
+                self.record_usage(name, response.usage)
+            return response
+        raise AssertionError("unreachable")
+
+    async def embeddings_async(self, texts: List[str], model: str) -> Any:
+        response = await self._call(
+            "embeddings", lambda: self.async_client.embeddings.create(model=model, input=texts)
+        )
+        if getattr(response, "usage", None) is not None:
+            self.record_usage(model, response.usage)
+        return response
+
+    # -- sync (indexing, thread pools) ---------------------------------------
+
+    def embeddings(self, texts: List[str], model: str) -> Any:
+        attempts = self.settings.llm_max_retries + 1
+        for attempt in range(attempts):
+            try:
+                wait = self._bucket.reserve()
+                if wait:
+                    time.sleep(wait)
+                with self._sync_slots:
+                    self.counters["requests"] += 1
+                    started = time.perf_counter()
+                    response = self.client.embeddings.create(model=model, input=texts)
+                    self._record("embeddings", time.perf_counter() - started)
+                if getattr(response, "usage", None) is not None:
+                    self.record_usage(model, response.usage)
+                return response
+            except Exception as exc:
+                if attempt == attempts - 1 or not _is_retryable(exc):
+                    self.counters["failures"] += 1
+                    raise
+                self.counters["retries"] += 1
+                time.sleep(self._backoff(attempt, exc))
+        raise AssertionError("unreachable")
+
+    def warm_up(self) -> None:
+        """
+        Build both clients now instead of on the first call (startup warm-up).
+        """
+        self.client
+        self.async_client
+
+    async def aclose(self) -> None:
+        """
+        Close the async connection pool (app shutdown). The sync client lives
+        as long as the process; indexing threads may still be using it.
+        """
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
+
+
+gateway = LLMGateway(get_settings())
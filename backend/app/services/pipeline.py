@@ -0,0 +1,39 @@
+import asyncio
+from typing import Awaitable, Generic, TypeVar
+
+from app.core.metrics import metrics
+
+
+T = TypeVar("T")
+
+
+class Stage(Generic[T]):
+    """
+    A pipeline stage started eagerly as a background task, with a deadline
+    measured from when it was started.
+
+    Stages that don't depend on each other are started together and awaited
+    only where their output is needed, so their latencies overlap. If a
+    stage misses its deadline (or fails) the caller gets `default` and the
+    task is cancelled, instead of the whole request waiting on it.
+    """
+
+    def __init__(self, name: str, work: Awaitable[T], timeout: float) -> None:
+        self.name = name
+        self.task: asyncio.Future[T] = asyncio.ensure_future(work)
+        self.deadline = asyncio.get_running_loop().time() + timeout
+
+    async def result(self, default: T) -> T:
+        remaining = max(self.deadline - asyncio.get_running_loop().time(), 0.0)
+        try:
+            return await asyncio.wait_for(asyncio.shield(self.task), remaining)
+        except asyncio.TimeoutError:
+            self.task.cancel()
+            metrics.incr("stage_timeouts_total", stage=self.name)
+            return default
+        except Exception:
+            metrics.incr("stage_errors_total", stage=self.name)
+            return default
+
+    def cancel(self) -> None:
+        self.task.cancel()
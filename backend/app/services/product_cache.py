@@ -0,0 +1,146 @@
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.product import Product
+from app.services.catalogue import get_catalogue_version
+
+
+@dataclass(frozen=True, slots=True)
+class ProductRecord:
+    """
+    Immutable, detached copy of a product row. Has the same attributes as
+    `Product`, so prompt builders and `ProductRead` accept either.
+    """
+
+    id: int
+    title: str
+    price: Optional[float]
+    short_description: Optional[str]
+    long_description: Optional[str]
+    features: Optional[str]
+    image_url: Optional[str]
+    category: Optional[str]
+    source_url: Optional[str]
+
+
+_COLUMNS = tuple(ProductRecord.__dataclass_fields__)
+
+
+@dataclass(frozen=True, slots=True)
+class _Snapshot:
+    version: int
+    by_id: Dict[int, ProductRecord]
+    ordered: Tuple[ProductRecord, ...]  # by id
+
+
+def _snapshot(version: int, rows: Iterable[Any]) -> _Snapshot:
+    records = tuple(ProductRecord(*row) for row in rows)
+    return _Snapshot(version=version, by_id={r.id: r for r in records}, ordered=records)
+
+
+def _catalogue_query():
+    return select(*(getattr(Product, name) for name in _COLUMNS)).order_by(Product.id)
+
+
+class ProductCache:
+    """
+    Read-through, in-process copy of the whole product catalogue.
+
+    The catalogue is small and changes only through scrapes and index
+    builds, both of which bump the catalogue version. Lookups are served
+    from an immutable snapshot; the first lookup after a version bump
+    reloads it (one query) through the caller's session. Concurrent callers
+    may reload at the same time, which is harmless: the load is idempotent
+    and the snapshot is swapped in with a single assignment.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._snapshot: Optional[_Snapshot] = None
+        self.hits = 0
+        self.misses = 0
+
+    def _fresh(self) -> Optional[_Snapshot]:
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == get_catalogue_version():
+            self.hits += 1
+            return snapshot
+        self.misses += 1
+        return None
+
+    def load(self, db: Session) -> int:
+        """
+        (Re)load the catalogue with a sync session; returns its size.
+        """
+        # Read the version first: a bump during the query leaves the snapshot
+        # stale, so the next lookup reloads again.
+        version = get_catalogue_version()
+        snapshot = _snapshot(version, db.execute(_catalogue_query()))
+        with self._lock:
+            self._snapshot = snapshot
+        return len(snapshot.ordered)
+
+    async def load_async(self, db: AsyncSession) -> int:
+        """
+        (Re)load the catalogue with an async session; returns its size.
+        """
+        version = get_catalogue_version()
+        snapshot = _snapshot(version, await db.execute(_catalogue_query()))
+        with self._lock:
+            self._snapshot = snapshot
+        return len(snapshot.ordered)
+
+    def get(self, db: Session, product_id: int) -> Optional[ProductRecord]:
+        if self._fresh() is None:
+            self.load(db)
+        return self._snapshot.by_id.get(product_id)
+
+    async def get_many(self, db: AsyncSession, product_ids: List[int]) -> List[ProductRecord]:
+        """
+        Records for `product_ids`, in that order; unknown ids are skipped.
+        """
+        if self._fresh() is None:
+            await self.load_async(db)
+        by_id = self._snapshot.by_id
+        return [by_id[pid] for pid in product_ids if pid in by_id]
+
+    def all(self, db: Session) -> Tuple[ProductRecord, ...]:
+        """
+        The whole catalogue, ordered by id. The same tuple is returned until
+        the catalogue changes.
+        """
+        if self._fresh() is None:
+            self.load(db)
+        return self._snapshot.ordered
+
+    async def all_async(self, db: AsyncSession) -> Tuple[ProductRecord, ...]:
+        if self._fresh() is None:
+            await self.load_async(db)
+        return self._snapshot.ordered
+
+    async def first(self, db: AsyncSession, n: int) -> List[ProductRecord]:
+        """
+        The `n` products with the lowest ids.
+        """
+        if self._fresh() is None:
+            await self.load_async(db)
+        return list(self._snapshot.ordered[:n])
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        lookups = self.hits + self.misses
+        return {
+            "size": len(snapshot.ordered) if snapshot is not None else 0,
+            "version": snapshot.version if snapshot is not None else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+product_cache = ProductCache()
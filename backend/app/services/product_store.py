@@ -0,0 +1,135 @@
+import hashlib
+import json
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Mapping, Sequence, Set
+
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models.crawl_state import CrawlState
+from app.models.product import Product
+from app.services.crawler import FetchResult
+
+
+# Columns a scrape writes; `content_hash` covers exactly these.
+PRODUCT_FIELDS = (
+    "title",
+    "price",
+    "short_description",
+    "long_description",
+    "features",
+    "image_url",
+    "category",
+)
+
+# Rows per INSERT statement. Keeps each statement well under SQLite's
+# bound-parameter limit while a whole scrape is still one or two batches.
+UPSERT_BATCH_SIZE = 500
+
+
+def content_hash(fields: Mapping[str, Any]) -> str:
+    """
+    Stable sha256 of a product's scraped columns.
+    """
+    payload = json.dumps(
+        [fields.get(name) for name in PRODUCT_FIELDS], ensure_ascii=False, separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _insert_for(db: Session) -> Callable[..., Any]:
+    # `INSERT ... ON CONFLICT` is dialect-specific in SQLAlchemy.
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert
+    if dialect == "sqlite":
+        return sqlite.insert
+    raise NotImplementedError(f"Bulk upsert is not supported on {dialect}")
+
+
+@dataclass
+class UpsertResult:
+    # source_url -> product id, for every row passed in.
+    ids: Dict[str, int] = field(default_factory=dict)
+    # Products that were inserted or whose content changed.
+    changed_ids: Set[int] = field(default_factory=set)
+
+
+def upsert_products(db: Session, rows: Sequence[Mapping[str, Any]]) -> UpsertResult:
+    """
+    Insert or update scraped products keyed on `source_url`.
+
+    One SELECT fetches the stored content hashes; rows whose hash is
+    unchanged are skipped entirely, and the rest go out as batched
+    `INSERT ... ON CONFLICT (source_url) DO UPDATE ... RETURNING id`
+    statements. Does not commit.
+    """
+    result = UpsertResult()
+    if not rows:
+        return result
+
+    urls = [row["source_url"] for row in rows]
+    stored = {
+        url: (pid, digest)
+        for url, pid, digest in db.query(
+            Product.source_url, Product.id, Product.content_hash
+        ).filter(Product.source_url.in_(urls))
+    }
+
+    pending: List[Dict[str, Any]] = []
+    for row in rows:
+        values = {name: row.get(name) for name in PRODUCT_FIELDS}
+        values["source_url"] = row["source_url"]
+        values["content_hash"] = content_hash(values)
+        known = stored.get(values["source_url"])
+        if known is not None and known[1] == values["content_hash"]:
+            result.ids[values["source_url"]] = known[0]
+        else:
+            pending.append(values)
+
+    insert = _insert_for(db)
+    for start in range(0, len(pending), UPSERT_BATCH_SIZE):
+        stmt = insert(Product).values(pending[start : start + UPSERT_BATCH_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Product.source_url],
+            set_={name: stmt.excluded[name] for name in PRODUCT_FIELDS + ("content_hash",)},
+            # Another writer may have stored the same content meanwhile.
+            where=Product.content_hash.is_distinct_from(stmt.excluded.content_hash),
+        ).returning(Product.id, Product.source_url)
+        for pid, url in db.execute(stmt):
+            result.ids[url] = pid
+            result.changed_ids.add(pid)
+
+    # Rows a concurrent writer already brought up to date return nothing.
+    missing = [values["source_url"] for values in pending if values["source_url"] not in result.ids]
+    if missing:
+        result.ids.update(
+            db.query(Product.source_url, Product.id).filter(Product.source_url.in_(missing))
+        )
+    return result
+
+
+def upsert_crawl_states(db: Session, results: Sequence[FetchResult]) -> None:
+    """
+    Store the validators of fetched URLs in one batched upsert. Does not commit.
+    """
+    rows = {
+        r.url: {"url": r.url, "etag": r.etag, "last_modified": r.last_modified} for r in results
+    }
+    if not rows:
+        return
+    insert = _insert_for(db)
+    values = list(rows.values())
+    for start in range(0, len(values), UPSERT_BATCH_SIZE):
+        stmt = insert(CrawlState).values(values[start : start + UPSERT_BATCH_SIZE])
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[CrawlState.url],
+                set_={
+                    "etag": stmt.excluded.etag,
+                    "last_modified": stmt.excluded.last_modified,
+                    "fetched_at": func.now(),
+                },
+            )
+        )
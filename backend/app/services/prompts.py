@@ -0,0 +1,92 @@
+from typing import Any
+
+
+# System prompts are frozen module constants. Both variants share the same
+# leading text (advisor role, guidelines, JSON contract) and differ only in
+# their tail, so providers with automatic prompt caching can reuse the
+# prefix across every request.
+
+_BASE_PROMPT = (
+    "You are a careful, friendly hair & scalp care advisor for Traya.health products.\n"
+    "You ONLY recommend from the candidate products I give you.\n"
+    "\n"
+    "Conversation guidelines:\n"
+    "- First, briefly acknowledge and summarise the user's concerns in your own words.\n"
+    "- Then clearly say something like: 'Based on your concerns, here are some Traya products that can help:'\n"
+    "  before you describe any product recommendations, so the cards shown in the UI feel on-topic.\n"
+    "- Always recommend 2–4 products by their Product ID with clear, specific reasons that connect to the\n"
+    "  concerns mentioned (e.g. oily scalp, hair thinning, dandruff).\n"
+    "- You must end by asking ONE short follow-up such as "
+    "  'Do you have any other hair or scalp concerns you'd like to discuss?'\n"
+    "  and this follow-up should come AFTER you describe the recommended products.\n"
+    "- Do NOT repeat information the user has already clearly given (for example, if they already said they\n"
+    "  have hair fall, don't ask again whether they have hair fall).\n"
+)
+
+_JSON_INSTRUCTIONS = (
+    "\nReturn your answer as pure JSON with this shape:\n"
+    "{\n"
+    '  \"reply\": \"string explanation to the user, including recommendations and an optional single\n'
+    '            follow-up question at the end if needed\",\n'
+    '  \"recommendations\": [\n'
+    "    {\"product_id\": 123, \"reason\": \"short reason\"}\n"
+    "  ]\n"
+    "}\n"
+    "Do not include any extra text outside the JSON.\n"
+)
+
+SHARED_PROMPT_PREFIX = _BASE_PROMPT + _JSON_INSTRUCTIONS + "\nGuidelines for this conversation:\n"
+
+# Non-safety conversations still mention that we should be cautious and not invent side effects.
+SYSTEM_PROMPT = SHARED_PROMPT_PREFIX + (
+    "- If the user ever hints at side effects or safety, be cautious and suggest consulting a doctor.\n"
+)
+
+SAFETY_SYSTEM_PROMPT = SHARED_PROMPT_PREFIX + (
+    "- In this conversation the user is asking about safety, side effects, or whether products are okay "
+    "to use with a medical condition.\n"
+    "- First, directly answer the safety question in clear, cautious language BEFORE you talk about products.\n"
+    "- Use any provided safety context carefully: do not invent side effects, and be conservative.\n"
+    "- Always remind the user that you cannot give medical advice and they should consult their doctor,\n"
+    "  especially for conditions like PCOS, pregnancy, blood pressure issues, diabetes or thyroid problems.\n"
+)
+
+CANDIDATES_HEADER = "Here are the candidate products you can choose from:\n\n"
+
+
+def build_product_text(product: Any) -> str:
+    """
+    Build a rich text representation of a product for embeddings & context.
+    """
+    parts = [
+        f"Title: {product.title}",
+    ]
+    if product.category:
+        parts.append(f"Category: {product.category}")
+    if product.price is not None:
+        parts.append(f"Price: {product.price}")
+    if product.short_description:
+        parts.append(f"Short description: {product.short_description}")
+    if product.features:
+        parts.append(f"Key benefits and features: {product.features}")
+    if product.long_description:
+        parts.append(f"Details: {product.long_description}")
+    return "\n".join(parts)
+
+
+def build_context_block(product: Any) -> str:
+    """
+    Build the compact per-product block shown to the chat model.
+    """
+    ctx = [
+        f"Product ID: {product.id}",
+        f"Title: {product.title}",
+        f"Category: {product.category}",
+    ]
+    if product.price is not None:
+        ctx.append(f"Price: {product.price}")
+    if product.features:
+        ctx.append(f"Benefits and features: {product.features}")
+    if product.short_description:
+        ctx.append(f"Summary: {product.short_description}")
+    return "\n".join(ctx)
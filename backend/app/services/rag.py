@@ -1,26 +1,72 @@
+import asyncio
 import json
-from typing import List, Tuple
+import time
+from dataclasses import dataclass
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Collection,
+    Dict,
+    FrozenSet,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
-from openai import OpenAI
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.core.config import get_settings
+from app.core.metrics import metrics
 from app.models.product import Product
 from app.schemas.chat import ChatMessage, ChatResponse, RecommendedProduct
-from app.services.embeddings import embed_text
-from app.services.vectorstore import index_products, query_products
+from app.services.answer_cache import SemanticAnswerCache
+from app.services.catalogue import bump_catalogue_version
+from app.services.conversation import ConversationContext, build_context
+from app.services.embeddings import embed_texts, embed_texts_async
+from app.services.vectorstore import (
+    delete_products,
+    get_indexed_hashes,
+    index_products,
+    query_products_async,
+    query_products_many_async,
+)
+from app.services.intent import classify_intents
+from app.services.json_stream import StreamingStringField
+from app.services.lexical import lexical_index, reciprocal_rank_fusion
+from app.services.llm_gateway import gateway
+from app.services.pipeline import Stage
+from app.services.product_cache import ProductRecord, product_cache
+from app.services.prompts import (
+    CANDIDATES_HEADER,
+    SAFETY_SYSTEM_PROMPT,
+    SYSTEM_PROMPT,
+)
+from app.services.render_cache import product_renders, render_product
 from app.services.safety import search_duckduckgo_side_effects
 
 
 settings = get_settings()
-client = OpenAI(
-    api_key=settings.openai_api_key,
-    base_url=settings.openai_base_url or None,
-)
 
-# When using Groq's OpenAI-compatible API, use one of their chat models.
-# You can change this to any supported model name from your provider.
-CHAT_MODEL = "llama-3.1-8b-instant"
+# When using Groq's OpenAI-compatible API, use one of their chat models
+# (`CHAT_MODEL`, with `CHAT_FALLBACK_MODEL` as an optional backup).
+CHAT_MODEL = settings.chat_model
+
+# Products embedded and stored per step of `index_all_products`: enough to
+# keep every concurrent embeddings request busy.
+INDEX_CHUNK_SIZE = settings.embedding_batch_size * settings.embedding_max_concurrency
+
+answer_cache: Optional[SemanticAnswerCache] = (
+    SemanticAnswerCache(
+        threshold=settings.answer_cache_similarity_threshold,
+        ttl_s=settings.answer_cache_ttl_s,
+        max_entries=settings.answer_cache_max_entries,
+    )
+    if settings.answer_cache_enabled
+    else None
+)
 
 
 def is_side_effect_question(text: str) -> bool:
@@ -31,51 +77,7 @@ def is_side_effect_question(text: str) -> bool:
     This is intentionally broad so that questions like
     "I also have PCOS, is it fine to use it?" are treated as safety intent.
     """
-    t = text.lower()
-
-    # Direct safety wording
-    safety_keywords = [
-        "side effect",
-        "side-effect",
-        "side effects",
-        "is it safe",
-        "safe to use",
-        "is it okay",
-        "is it ok",
-        "is it fine",
-        "okay to use",
-        "ok to use",
-        "fine to use",
-        "harmful",
-        "allergy",
-        "allergic",
-        "contraindication",
-        "interaction",
-    ]
-
-    # Common condition words that usually imply a safety context when paired
-    # with a question.
-    condition_keywords = [
-        "pcos",
-        "pregnant",
-        "pregnancy",
-        "bp",
-        "blood pressure",
-        "diabetes",
-        "thyroid",
-    ]
-
-    if any(k in t for k in safety_keywords):
-        return True
-
-    # If the user mentions a condition and is asking a question containing
-    # "use", "take", or "have", treat it as safety intent as well.
-    if "?" in t and any(cond in t for cond in condition_keywords):
-        action_words = [" use ", " take ", " have ", " apply "]
-        if any(a in t for a in action_words):
-            return True
-
-    return False
+    return classify_intents(text).side_effect
 
 
 def is_closing_message(text: str) -> bool:
@@ -83,23 +85,7 @@ def is_closing_message(text: str) -> bool:
     Detect simple \"no more help\" / closing messages so we can just thank the
     user instead of recommending new products.
     """
-    t = text.strip().lower()
-    closers = [
-        "no",
-        "no thank you",
-        "no thanks",
-        "that's all",
-        "that is all",
-        "im fine",
-        "i'm fine",
-        "all good",
-        "ok thanks",
-        "okay thanks",
-        "thank you",
-        "thanks",
-        "thankyou",
-    ]
-    return any(t == c or t.endswith(c) for c in closers)
+    return classify_intents(text).closing
 
 
 def needs_clarification_first(text: str) -> bool:
@@ -110,113 +96,225 @@ def needs_clarification_first(text: str) -> bool:
     Example: "hair growth", "recommend something", "hair products" with no
     clear symptom such as dandruff, hair fall, itchy scalp, etc.
     """
-    t = text.strip().lower()
-
-    # If the query is extremely short, it's probably too vague.
-    if len(t) < 25:
-        # Allow simple 1–2 word intents like "hair growth", "hair fall".
-        generic_triggers = [
-            "hair growth",
-            "hair products",
-            "recommend something",
-            "recommend products",
-            "suggest something",
-        ]
-        symptom_keywords = [
-            "dandruff",
-            "itchy",
-            "itching",
-            "flaky",
-            "hair fall",
-            "hairfall",
-            "PCOS",
-            "pcos",
-            "dry scalp",
-            "oily scalp",
-            "split ends",
-        ]
-
-        if any(g in t for g in generic_triggers) and not any(
-            s in t for s in symptom_keywords
-        ):
-            return True
+    return classify_intents(text).needs_clarification
 
-    return False
 
-def build_product_text(product: Product) -> str:
+@metrics.timed("index.total")
+def index_all_products(
+    db: Session,
+    product_ids: Optional[Collection[int]] = None,
+    progress: Optional[Callable[..., None]] = None,
+) -> int:
     """
-    Build a rich text representation of a product for embeddings & context.
+    Incrementally sync the vector store with the products in the database.
+
+    Only products that are new or whose `build_product_text` output changed
+    are re-embedded; vectors for products that no longer exist are removed.
+    Pass `product_ids` (e.g. a scrape's `changed_ids`) to sync just those
+    products; removals are only detected by a full sync. The BM25 index is
+    then brought up to date with the whole catalogue (re-tokenising only
+    changed products). Returns the number of products synced.
+
+    Vectors are embedded and stored in chunks of `INDEX_CHUNK_SIZE`;
+    `progress` (see `services.jobs.Progress`) is called with increments of
+    `vectors_total`, `vectors_written` and `vectors_deleted`. If it raises,
+    the chunks already stored are kept and the next sync skips them.
     """
-    parts = [
-        f"Title: {product.title}",
-    ]
-    if product.category:
-        parts.append(f"Category: {product.category}")
-    if product.price is not None:
-        parts.append(f"Price: {product.price}")
-    if product.short_description:
-        parts.append(f"Short description: {product.short_description}")
-    if product.features:
-        parts.append(f"Key benefits and features: {product.features}")
-    if product.long_description:
-        parts.append(f"Details: {product.long_description}")
-    return "\n".join(parts)
-
+    with metrics.span("index.load"):
+        query = db.query(Product)
+        if product_ids is not None:
+            query = query.filter(Product.id.in_(list(product_ids)))
+        products: List[Product] = query.all()
+        indexed_hashes = get_indexed_hashes()
+        rendered = [render_product(p) for p in products]
 
-def index_all_products(db: Session) -> int:
-    """
-    Index all products from the database into the vector store.
-    Returns the number of indexed items.
-    """
-    products: List[Product] = db.query(Product).all()
     items: List[Tuple[int, str, dict]] = []
-    for p in products:
-        text = build_product_text(p)
+    for p, r in zip(products, rendered):
+        if indexed_hashes.get(p.id) == r.content_hash:
+            continue
         # Chroma metadata values must be str/int/float/bool, not None
         metadata = {
             "product_id": p.id,
             "title": p.title,
+            "content_hash": r.content_hash,
         }
         if p.category is not None:
             metadata["category"] = p.category
-        items.append((p.id, text, metadata))
-
-    index_products(items)
-    return len(items)
+        items.append((p.id, r.document, metadata))
 
+    current_ids = {p.id for p in products}
+    removed_ids = (
+        [pid for pid in indexed_hashes if pid not in current_ids] if product_ids is None else []
+    )
 
-def retrieve_candidate_products(db: Session, query: str, top_k: int = 8) -> List[Product]:
+    if progress is not None:
+        progress(vectors_total=len(items))
+    written = 0
+    try:
+        for start in range(0, len(items), INDEX_CHUNK_SIZE):
+            chunk = items[start : start + INDEX_CHUNK_SIZE]
+            with metrics.span("index.embed"):
+                embeddings = embed_texts([text for _, text, _ in chunk])
+            with metrics.span("index.store"):
+                index_products(chunk, embeddings)
+            written += len(chunk)
+            if progress is not None:
+                progress(vectors_written=len(chunk))
+        with metrics.span("index.store"):
+            delete_products(removed_ids)
+        if progress is not None:
+            progress(vectors_deleted=len(removed_ids))
+    finally:
+        if written or removed_ids:
+            bump_catalogue_version()
+    # Reuse the renders for prompt assembly until the products change again.
+    product_renders.prime(products, rendered)
+    with metrics.span("index.lexical"):
+        lexical_index.sync(product_cache.all(db))
+    return len(products)
+
+
+async def embed_query(query: str) -> List[float]:
+    with metrics.span("chat.embed"):
+        [query_embedding] = await embed_texts_async([query])
+    return query_embedding
+
+
+async def search_product_ids(
+    query_embedding: List[float], top_k: int = 8, category: Optional[str] = None
+) -> List[int]:
     """
-    Use the vector store to retrieve top-k similar products for the query.
+    Return the ids of the top-k products most similar to an embedded query.
     """
-    result = query_products(query, top_k=top_k)
+    with metrics.span("chat.vector_query"):
+        result = await query_products_async(query_embedding, top_k=top_k, category=category)
     ids = result.get("ids", [[]])[0]
-    if not ids:
+    return [int(pid) for pid in ids]
+
+
+async def lexical_search_ids(
+    db: AsyncSession, query: str, top_k: int = 8, category: Optional[str] = None
+) -> List[int]:
+    """
+    BM25 keyword search over the product documents. Exact names and
+    ingredients ("Shampoo 2.0", "minoxidil 5%") rank here even when the
+    embedding of a short query is vague.
+    """
+    # A no-op unless the catalogue changed since the last sync; a changed
+    # catalogue is re-indexed in the background.
+    products = await product_cache.all_async(db)
+    with metrics.span("chat.lexical"):
+        lexical_index.refresh(products)
+        return lexical_index.search(query, top_k=top_k, category=category)
+
+
+async def _hybrid_ids(
+    db: AsyncSession,
+    query: str,
+    dense_ids: List[int],
+    top_k: int,
+    category: Optional[str] = None,
+) -> List[int]:
+    """
+    Fuse vector-search ids with BM25 ids by reciprocal rank fusion.
+    """
+    if not settings.hybrid_search_enabled:
+        return dense_ids
+    lexical_ids = await lexical_search_ids(db, query, top_k=top_k, category=category)
+    return reciprocal_rank_fusion([dense_ids, lexical_ids], k=settings.rrf_k)[:top_k]
+
+
+async def _vector_search(
+    query: str, top_k: int
+) -> Tuple[Optional[List[float]], List[int]]:
+    query_embedding = await embed_query(query)
+    return query_embedding, await search_product_ids(query_embedding, top_k=top_k)
+
+
+async def hydrate_products(db: AsyncSession, int_ids: List[int]) -> List[ProductRecord]:
+    """
+    Load products by id, preserving the order of `int_ids`. Served from the
+    in-process product cache; `db` is only used to reload it after the
+    catalogue changed.
+    """
+    if not int_ids:
         return []
-    int_ids = [int(pid) for pid in ids]
-    products = db.query(Product).filter(Product.id.in_(int_ids)).all()
+    with metrics.span("chat.hydrate"):
+        return await product_cache.get_many(db, int_ids)
 
-    # Preserve the order from Chroma
-    ordered = {p.id: p for p in products}
-    return [ordered[pid] for pid in int_ids if pid in ordered]
+
+async def retrieve_candidate_products(
+    db: AsyncSession, query: str, top_k: int = 8, category: Optional[str] = None
+) -> List[ProductRecord]:
+    """
+    Retrieve the top-k products for the query: vector search fused with
+    BM25 keyword search, optionally restricted to one `category`.
+    """
+    query_embedding = await embed_query(query)
+    dense_ids = await search_product_ids(query_embedding, top_k=top_k, category=category)
+    return await hydrate_products(
+        db, await _hybrid_ids(db, query, dense_ids, top_k=top_k, category=category)
+    )
 
 
-def run_rag_chat(db: Session, messages: List[ChatMessage]) -> ChatResponse:
+def safety_search_query(latest_query: str) -> str:
     """
-    Core RAG pipeline:
-    - Take latest user query
-    - Retrieve similar products
-    - Ask OpenAI to respond with JSON containing reply + recommendations
+    Web search query for safety questions. It depends only on the user's
+    wording (not on retrieval results) so the search can start immediately.
+    """
+    return f"{latest_query} Traya side effects"
+
+
+@dataclass
+class PreparedChat:
+    openai_messages: List[Dict[str, str]]
+    # What the semantic answer cache keys on.
+    query_embedding: Optional[List[float]]
+    candidate_ids: FrozenSet[int]
+    safety_intent: bool
+    context_key: str = ""
+
+
+@dataclass
+class _Turn:
+    latest_query: str
+    safety_intent: bool
+    context: ConversationContext
+
+
+# Products shown when retrieval finds nothing (e.g. a cold index).
+FALLBACK_PRODUCTS = 5
+# Candidate slots kept for products recommended in recent turns.
+MAX_CARRIED_PRODUCTS = 3
+
+
+def _with_carried(ids: List[int], carried_ids: List[int], top_k: int) -> List[int]:
+    """
+    Retrieved ids, with the most recently recommended products that
+    retrieval missed appended in the last slots, so a follow-up can still
+    talk about them.
+    """
+    extra = [pid for pid in carried_ids if pid not in ids][:MAX_CARRIED_PRODUCTS]
+    if not extra:
+        return ids[:top_k]
+    return ids[: max(0, top_k - len(extra))] + extra
+
+
+def _triage(messages: List[ChatMessage]) -> Union[ChatResponse, _Turn]:
+    """
+    Early exits that need no retrieval or LLM call; otherwise the latest
+    user query and its safety intent.
     """
     user_messages = [m for m in messages if m.role == "user"]
     if not user_messages:
         return ChatResponse(reply="Please ask a question about your hair or scalp concerns.")
 
     latest_query = user_messages[-1].content
+    intents = classify_intents(latest_query)
 
     # If the user is clearly closing the conversation (e.g. \"no\", \"thank you\"),
     # don't run retrieval or call the LLM – just send a friendly goodbye.
-    if is_closing_message(latest_query):
+    if intents.closing:
         return ChatResponse(
             reply=(
                 "You're welcome! I'm glad I could help. "
@@ -226,7 +324,7 @@ def run_rag_chat(db: Session, messages: List[ChatMessage]) -> ChatResponse:
         )
     # For very generic first messages, just ask for clarification and do not
     # show any product cards yet.
-    if len(user_messages) == 1 and needs_clarification_first(latest_query):
+    if len(user_messages) == 1 and intents.needs_clarification:
         return ChatResponse(
             reply=(
                 "It sounds like you're exploring Traya products in a general way. "
@@ -236,96 +334,66 @@ def run_rag_chat(db: Session, messages: List[ChatMessage]) -> ChatResponse:
             ),
             recommended_products=[],
         )
-    safety_intent = is_side_effect_question(latest_query)
-
-    # Retrieve a larger pool so the model can pick a richer set of options.
-    candidates = retrieve_candidate_products(db, latest_query, top_k=8)
-
-    if not candidates:
-        # Fallback: if vector search returns nothing (e.g., cold index),
-        # use a simple text search over all products as a backup.
-        all_products: List[Product] = db.query(Product).all()
-        candidates = all_products[:5]
-
-    # Build context string
-    context_chunks = []
-    for p in candidates:
-        ctx = [
-            f"Product ID: {p.id}",
-            f"Title: {p.title}",
-            f"Category: {p.category}",
-        ]
-        if p.price is not None:
-            ctx.append(f"Price: {p.price}")
-        if p.features:
-            ctx.append(f"Benefits and features: {p.features}")
-        if p.short_description:
-            ctx.append(f"Summary: {p.short_description}")
-        context_chunks.append("\n".join(ctx))
-
-    context_text = "\n\n".join(context_chunks)
-
-    # Optionally fetch extra safety / side‑effect information from DuckDuckGo
-    safety_context = None
-    if safety_intent:
-        # Include both the user's wording and product names in the search query
-        titles = ", ".join(p.title for p in candidates)
-        search_query = f"{latest_query} {titles} side effects"
-        safety_context = search_duckduckgo_side_effects(search_query)
-
-    base_prompt = (
-        "You are a careful, friendly hair & scalp care advisor for Traya.health products.\n"
-        "You ONLY recommend from the candidate products I give you.\n"
-        "\n"
-        "Conversation guidelines:\n"
-        "- First, briefly acknowledge and summarise the user's concerns in your own words.\n"
-        "- Then clearly say something like: 'Based on your concerns, here are some Traya products that can help:'\n"
-        "  before you describe any product recommendations, so the cards shown in the UI feel on-topic.\n"
-        "- Always recommend 2–4 products by their Product ID with clear, specific reasons that connect to the\n"
-        "  concerns mentioned (e.g. oily scalp, hair thinning, dandruff).\n"
-        "- You must end by asking ONE short follow-up such as "
-        "  'Do you have any other hair or scalp concerns you'd like to discuss?'\n"
-        "  and this follow-up should come AFTER you describe the recommended products.\n"
-        "- Do NOT repeat information the user has already clearly given (for example, if they already said they\n"
-        "  have hair fall, don't ask again whether they have hair fall).\n"
+    context = build_context(
+        messages,
+        query_turns=settings.chat_query_turns,
+        query_max_tokens=settings.chat_query_max_tokens,
+        history_max_tokens=settings.chat_history_max_tokens,
     )
-
-    safety_prompt_extra = (
-        "- In this conversation the user is asking about safety, side effects, or whether products are okay "
-        "to use with a medical condition.\n"
-        "- First, directly answer the safety question in clear, cautious language BEFORE you talk about products.\n"
-        "- Use any provided safety context carefully: do not invent side effects, and be conservative.\n"
-        "- Always remind the user that you cannot give medical advice and they should consult their doctor,\n"
-        "  especially for conditions like PCOS, pregnancy, blood pressure issues, diabetes or thyroid problems.\n"
+    return _Turn(latest_query=latest_query, safety_intent=intents.side_effect, context=context)
+
+
+def _start_safety_search(turn: _Turn) -> Optional[Stage[Optional[str]]]:
+    # The web search only needs the user's wording, so it runs concurrently
+    # with retrieval and is dropped if it misses its deadline.
+    if not turn.safety_intent:
+        return None
+    return Stage(
+        "safety_search",
+        search_duckduckgo_side_effects(safety_search_query(turn.latest_query)),
+        timeout=settings.safety_search_timeout_s,
     )
 
-    json_instructions = (
-        "\nReturn your answer as pure JSON with this shape:\n"
-        "{\n"
-        '  \"reply\": \"string explanation to the user, including recommendations and an optional single\n'
-        '            follow-up question at the end if needed\",\n'
-        '  \"recommendations\": [\n'
-        "    {\"product_id\": 123, \"reason\": \"short reason\"}\n"
-        "  ]\n"
-        "}\n"
-        "Do not include any extra text outside the JSON."
-    )
 
-    if safety_intent:
-        system_prompt = base_prompt + safety_prompt_extra + json_instructions
-    else:
-        # Non-safety conversations still mention that we should be cautious and not invent side effects.
-        non_safety_extra = (
-            "- If the user ever hints at side effects or safety, be cautious and suggest consulting a doctor.\n"
-        )
-        system_prompt = base_prompt + non_safety_extra + json_instructions
+async def _assemble(
+    turn: _Turn,
+    query_embedding: Optional[List[float]],
+    candidates: List[ProductRecord],
+    safety_stage: Optional[Stage[Optional[str]]],
+) -> Union[ChatResponse, PreparedChat]:
+    """
+    Answer-cache lookup and prompt assembly for retrieved candidates.
+    """
+    candidate_id_set = frozenset(p.id for p in candidates)
+    if answer_cache is not None and query_embedding is not None:
+        with metrics.span("chat.answer_cache"):
+            cached = answer_cache.lookup(
+                query_embedding, candidate_id_set, turn.safety_intent, turn.context.cache_key
+            )
+        if cached is not None:
+            if safety_stage is not None:
+                safety_stage.cancel()
+            return cached
+
+    # Context is a join of per-product blocks rendered at index time.
+    context_text = "\n\n".join(product_renders.get(p).context_block for p in candidates)
+
+    # Optionally use extra safety / side‑effect information from DuckDuckGo
+    safety_context = None
+    if safety_stage is not None:
+        with metrics.span("chat.safety_wait"):
+            safety_context = await safety_stage.result(default=None)
 
-    prompt_context = (
-        "Here are the candidate products you can choose from:\n\n"
-        f"{context_text}\n\n"
-        "User's latest query:\n"
-        f"{latest_query}\n"
-    )
+    system_prompt = SAFETY_SYSTEM_PROMPT if turn.safety_intent else SYSTEM_PROMPT
+
+    prompt_context = f"{CANDIDATES_HEADER}{context_text}\n\n"
+    # Earlier turns, already cut to the history token budget.
+    if turn.context.history:
+        prompt_context += f"Conversation so far:\n{turn.context.history_text()}\n\n"
+    if turn.context.carried_ids:
+        carried = ", ".join(map(str, turn.context.carried_ids))
+        prompt_context += f"Products recommended earlier in this conversation: {carried}\n\n"
+    prompt_context += f"User's latest query:\n{turn.latest_query}\n"
 
     if safety_context:
         prompt_context += (
@@ -338,37 +406,276 @@ def run_rag_chat(db: Session, messages: List[ChatMessage]) -> ChatResponse:
         {"role": "system", "content": system_prompt},
         {"role": "user", "content": prompt_context},
     ]
+    return PreparedChat(
+        openai_messages=openai_messages,
+        query_embedding=query_embedding,
+        candidate_ids=candidate_id_set,
+        safety_intent=turn.safety_intent,
+        context_key=turn.context.cache_key,
+    )
 
-    response = client.chat.completions.create(
-        model=CHAT_MODEL,
-        messages=openai_messages,
-        response_format={"type": "json_object"},
+
+async def _prepare_chat(
+    db: AsyncSession, messages: List[ChatMessage]
+) -> Union[ChatResponse, PreparedChat]:
+    """
+    Everything before the LLM call: early exits, retrieval, safety lookup and
+    prompt assembly. Returns either a finished `ChatResponse` (no LLM needed,
+    or a semantic cache hit) or the prepared request for the chat model.
+    """
+    with metrics.span("chat.triage"):
+        turn = _triage(messages)
+    if isinstance(turn, ChatResponse):
+        return turn
+
+    # Stage graph (each arrow is a dependency):
+    #   intent -> vector search -> BM25 fusion -> carried ids -> hydrate
+    #          -> context -> prompt
+    #   intent -> safety web search (speculative) -----------------> prompt
+    safety_stage = _start_safety_search(turn)
+
+    # Retrieve a larger pool so the model can pick a richer set of options.
+    # The retrieval query folds in earlier user turns, so follow-ups like
+    # "is it safe with PCOS?" still find the products being discussed.
+    query = turn.context.retrieval_query
+    search_stage = Stage(
+        "vector_search",
+        _vector_search(query, top_k=8),
+        timeout=settings.retrieval_timeout_s,
     )
+    query_embedding, candidate_ids = await search_stage.result(default=(None, []))
+    # Keyword matches still come through if the vector search timed out.
+    candidate_ids = await _hybrid_ids(db, query, candidate_ids, top_k=8)
+    candidate_ids = _with_carried(candidate_ids, turn.context.carried_ids, top_k=8)
+    candidates = await hydrate_products(db, candidate_ids)
 
-    content = response.choices[0].message.content or "{}"
+    if not candidates:
+        # Fallback: if retrieval returns nothing (e.g., cold index),
+        # use the first few products as a backup.
+        candidates = await product_cache.first(db, FALLBACK_PRODUCTS)
+
+    return await _assemble(turn, query_embedding, candidates, safety_stage)
+
+
+def _remember_answer(prepared: PreparedChat, response: ChatResponse) -> None:
+    if answer_cache is None or prepared.query_embedding is None:
+        return
+    answer_cache.store(
+        prepared.query_embedding,
+        prepared.candidate_ids,
+        prepared.safety_intent,
+        response,
+        prepared.context_key,
+    )
 
-    try:
-        data = json.loads(content)
-    except json.JSONDecodeError:
-        # Fallback: return plain reply
-        return ChatResponse(
-            reply="I'm sorry, I had trouble formatting my answer. "
-            "Please try asking your question again.",
-            recommended_products=[],
-        )
 
-    reply = data.get("reply", "")
-    recs_raw = data.get("recommendations", [])
+FORMAT_ERROR_REPLY = (
+    "I'm sorry, I had trouble formatting my answer. "
+    "Please try asking your question again."
+)
+
 
+def _parse_recommendations(recs_raw: Any) -> List[RecommendedProduct]:
     recommendations: List[RecommendedProduct] = []
+    if not isinstance(recs_raw, list):
+        return recommendations
     for rec in recs_raw:
         try:
             pid = int(rec.get("product_id"))
             reason = str(rec.get("reason", ""))
-        except (TypeError, ValueError):
+        except (AttributeError, TypeError, ValueError):
             continue
         recommendations.append(RecommendedProduct(product_id=pid, reason=reason))
+    return recommendations
+
+
+@metrics.timed("chat.total")
+async def run_rag_chat(db: AsyncSession, messages: List[ChatMessage]) -> ChatResponse:
+    """
+    Core RAG pipeline:
+    - Build the conversation context (latest query, recent turns, carried products)
+    - Retrieve similar products
+    - Ask OpenAI to respond with JSON containing reply + recommendations
+    """
+    prepared = await _prepare_chat(db, messages)
+    if isinstance(prepared, ChatResponse):
+        return prepared
+    return await _complete(prepared)
+
+
+async def _complete(prepared: PreparedChat) -> ChatResponse:
+    """
+    Call the chat model for a prepared request and parse its JSON answer.
+    """
+    with metrics.span("chat.llm"):
+        response = await gateway.chat_completion(
+            prepared.openai_messages,
+            model=CHAT_MODEL,
+            response_format={"type": "json_object"},
+        )
+
+    content = response.choices[0].message.content or "{}"
+
+    with metrics.span("chat.parse"):
+        try:
+            data = json.loads(content)
+        except json.JSONDecodeError:
+            # Fallback: return plain reply
+            return ChatResponse(reply=FORMAT_ERROR_REPLY, recommended_products=[])
+
+        reply = data.get("reply", "")
+        recommendations = _parse_recommendations(data.get("recommendations", []))
+
+    chat_response = ChatResponse(reply=reply, recommended_products=recommendations)
+    _remember_answer(prepared, chat_response)
+    return chat_response
+
+
+async def _vector_search_many(
+    queries: List[str], top_k: int
+) -> Tuple[List[List[float]], List[List[int]]]:
+    """
+    Embed all queries in one batched call and search them in one
+    multi-query vector-store call.
+    """
+    embeddings = await embed_texts_async(queries)
+    result = await query_products_many_async(embeddings, top_k=top_k)
+    return embeddings, [[int(pid) for pid in ids] for ids in result.get("ids") or []]
+
+
+async def run_rag_chat_batch(
+    db: AsyncSession, conversations: List[List[ChatMessage]], concurrency: int
+) -> AsyncIterator[Tuple[int, Union[ChatResponse, Exception]]]:
+    """
+    Answer many independent conversations, yielding (index, result) pairs in
+    completion order; a failed conversation yields its exception instead of
+    aborting the batch.
+
+    Retrieval is done for the whole batch at once: one embeddings call for
+    all retrieval queries, one multi-query vector search and one product
+    hydration. Only the per-conversation safety search and chat-model call
+    fan out, at most `concurrency` at a time.
+    """
+    turns: List[Tuple[int, _Turn]] = []
+    for index, messages in enumerate(conversations):
+        turn = _triage(messages)
+        if isinstance(turn, ChatResponse):
+            yield index, turn
+        else:
+            turns.append((index, turn))
+    if not turns:
+        return
+
+    queries = [turn.context.retrieval_query for _, turn in turns]
+    with metrics.span("chat_batch.retrieval"):
+        try:
+            embeddings, dense = await _vector_search_many(queries, top_k=8)
+        except Exception:
+            # Keyword retrieval alone still gives every conversation candidates.
+            embeddings, dense = [None] * len(turns), [[] for _ in turns]
+        candidate_ids = [
+            _with_carried(
+                await _hybrid_ids(db, query, ids, top_k=8), turn.context.carried_ids, top_k=8
+            )
+            for query, ids, (_, turn) in zip(queries, dense, turns)
+        ]
+        wanted = sorted({pid for ids in candidate_ids for pid in ids})
+        by_id = {p.id: p for p in await product_cache.get_many(db, wanted)}
+        fallback = await product_cache.first(db, FALLBACK_PRODUCTS)
+
+    limit = asyncio.Semaphore(concurrency)
+
+    async def answer(
+        index: int, turn: _Turn, embedding: Optional[List[float]], ids: List[int]
+    ) -> Tuple[int, Union[ChatResponse, Exception]]:
+        async with limit:
+            try:
+                candidates = [by_id[pid] for pid in ids if pid in by_id] or fallback
+                prepared = await _assemble(turn, embedding, candidates, _start_safety_search(turn))
+                if isinstance(prepared, ChatResponse):
+                    return index, prepared
+                return index, await _complete(prepared)
+            except Exception as exc:
+                return index, exc
+
+    tasks = [
+        asyncio.ensure_future(answer(index, turn, embedding, ids))
+        for (index, turn), embedding, ids in zip(turns, embeddings, candidate_ids)
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # The consumer went away (e.g. the client disconnected).
+        for task in tasks:
+            task.cancel()
 
-    return ChatResponse(reply=reply, recommended_products=recommendations)
 
+async def stream_rag_chat(
+    db: AsyncSession, messages: List[ChatMessage]
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Streaming variant of `run_rag_chat`, yielding (event, data) pairs:
 
+    - ("token", {"text": ...}) for each new piece of the `reply` string,
+      pulled out of the partial JSON as the model generates it;
+    - ("recommendations", {"recommended_products": [...]}) once the full
+      object has been received and validated;
+    - ("done", {"reply": ...}) with the complete reply text.
+    """
+    started = time.perf_counter()
+    prepared = await _prepare_chat(db, messages)
+    if isinstance(prepared, ChatResponse):
+        yield "token", {"text": prepared.reply}
+        yield "recommendations", {
+            "recommended_products": [r.model_dump() for r in prepared.recommended_products]
+        }
+        yield "done", {"reply": prepared.reply}
+        return
+
+    stream = await gateway.chat_completion(
+        prepared.openai_messages,
+        model=CHAT_MODEL,
+        response_format={"type": "json_object"},
+        stream=True,
+    )
+
+    reply_field = StreamingStringField("reply")
+    content_parts: List[str] = []
+    first_token = True
+    async for chunk in stream:
+        # Providers that report usage on streams send it on the last chunk.
+        if getattr(chunk, "usage", None) is not None:
+            gateway.record_usage(chunk.model or CHAT_MODEL, chunk.usage)
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if not delta:
+            continue
+        content_parts.append(delta)
+        text = reply_field.feed(delta)
+        if text:
+            if first_token:
+                metrics.observe("chat.stream_first_token", time.perf_counter() - started)
+                first_token = False
+            yield "token", {"text": text}
+    metrics.observe("chat.stream_total", time.perf_counter() - started)
+
+    reply = reply_field.value
+    try:
+        data = json.loads("".join(content_parts) or "{}")
+    except json.JSONDecodeError:
+        data = {}
+        if not reply:
+            reply = FORMAT_ERROR_REPLY
+            yield "token", {"text": reply}
+
+    recommendations = _parse_recommendations(data.get("recommendations", []))
+    if data:
+        _remember_answer(
+            prepared, ChatResponse(reply=reply, recommended_products=recommendations)
+        )
+    yield "recommendations", {
+        "recommended_products": [r.model_dump() for r in recommendations]
+    }
+    yield "done", {"reply": reply}
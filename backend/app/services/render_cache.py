@@ -0,0 +1,66 @@
+import hashlib
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+from app.services.catalogue import get_catalogue_version
+from app.services.prompts import build_context_block, build_product_text
+
+
+@dataclass(frozen=True, slots=True)
+class RenderedProduct:
+    document: str  # text that gets embedded (build_product_text)
+    context_block: str  # block shown to the chat model
+    content_hash: str  # sha256 of `document`
+
+
+def render_product(product: Any) -> RenderedProduct:
+    document = build_product_text(product)
+    return RenderedProduct(
+        document=document,
+        context_block=build_context_block(product),
+        content_hash=hashlib.sha256(document.encode("utf-8")).hexdigest(),
+    )
+
+
+class ProductRenderCache:
+    """
+    Per-product rendered strings, keyed by product id.
+
+    The indexer renders every product once and `prime`s the cache with the
+    result; request-time `get` calls reuse those strings (rendering lazily
+    on a miss). Everything is dropped when the catalogue version moves, so
+    edited products are re-rendered.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: Dict[int, RenderedProduct] = {}
+        self._version = get_catalogue_version()
+
+    def get(self, product: Any) -> RenderedProduct:
+        self._check_version()
+        rendered = self._entries.get(product.id)
+        if rendered is None:
+            rendered = render_product(product)
+            self._entries[product.id] = rendered
+        return rendered
+
+    def prime(self, products: List[Any], rendered: List[RenderedProduct]) -> None:
+        """
+        Store renders produced at index time so requests never re-render.
+        """
+        self._check_version()
+        with self._lock:
+            for product, r in zip(products, rendered):
+                self._entries[product.id] = r
+
+    def _check_version(self) -> None:
+        version = get_catalogue_version()
+        if version != self._version:
+            with self._lock:
+                self._entries = {}
+                self._version = version
+
+
+product_renders = ProductRenderCache()
@@ -1,22 +1,96 @@
-import httpx
-from typing import Optional
+import re
+from typing import Any, Dict, Optional
 
 from app.core.config import get_settings
+from app.core.http import get_async_http_client
+from app.core.metrics import metrics
+from app.services.cache import SingleFlight, TTLCache
 
 
 settings = get_settings()
 
+# Safety context keyed on the normalised query. Empty results and errors are
+# cached too, but only for `safety_cache_negative_ttl_s`.
+_cache: TTLCache[Optional[str]] = TTLCache(
+    max_entries=settings.safety_cache_max_entries,
+    path=settings.safety_cache_path,
+    save_delay_s=settings.safety_cache_save_s,
+)
+_inflight: SingleFlight[Optional[str]] = SingleFlight()
 
-def search_duckduckgo_side_effects(query: str) -> Optional[str]:
+_NON_WORD = re.compile(r"[^\w\s]+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_safety_query(query: str) -> str:
+    """
+    Cache key for a search query: case, punctuation and spacing differences
+    ("Is it safe with PCOS?" vs "is it safe with pcos") map to the same key.
+    """
+    return _WHITESPACE.sub(" ", _NON_WORD.sub(" ", query.lower())).strip()
+
+
+def safety_cache_stats() -> Dict[str, Any]:
+    return _cache.stats()
+
+
+def flush_safety_cache() -> None:
+    _cache.flush()
+
+
+def _extract_safety_snippet(data: Dict[str, Any]) -> Optional[str]:
+    # Prefer AI overview if present
+    ai_overview = data.get("ai_overview")
+    if isinstance(ai_overview, dict) and ai_overview.get("answer"):
+        return ai_overview["answer"]
+
+    # Fallback to first few organic snippets
+    organic = data.get("organic_results") or []
+    snippets: list[str] = []
+    for item in organic[:3]:
+        snippet = item.get("snippet")
+        if snippet:
+            snippets.append(snippet)
+
+    if snippets:
+        return "\n".join(snippets)
+
+    return None
+
+
+@metrics.timed("safety.search")
+async def search_duckduckgo_side_effects(query: str) -> Optional[str]:
     """
     Call DuckDuckGo via SearchApi.io and return a short text snippet that can
     be used as safety / side‑effect context for the LLM.
 
     This uses the `SEARCHAPI_API_KEY` and base URL configured in `.env`.
+    Results are cached per normalised query, and concurrent identical
+    lookups share a single request.
     """
     if not settings.searchapi_api_key:
         return None
 
+    key = normalize_safety_query(query)
+    hit, cached = _cache.get(key)
+    if hit:
+        return cached
+    return await _inflight.run(key, lambda: _fetch_and_cache(key, query))
+
+
+async def _fetch_and_cache(key: str, query: str) -> Optional[str]:
+    result = await _fetch_side_effects(query)
+    ttl = (
+        settings.safety_cache_ttl_s
+        if result
+        else settings.safety_cache_negative_ttl_s
+    )
+    _cache.set(key, result, ttl=ttl)
+    return result
+
+
+@metrics.timed("safety.fetch")
+async def _fetch_side_effects(query: str) -> Optional[str]:
     params = {
         "engine": "duckduckgo",
         "q": query,
@@ -24,36 +98,16 @@ def search_duckduckgo_side_effects(query: str) -> Optional[str]:
     headers = {"Authorization": f"Bearer {settings.searchapi_api_key}"}
 
     try:
-        resp = httpx.get(
+        resp = await get_async_http_client().get(
             settings.searchapi_base_url,
             params=params,
             headers=headers,
             timeout=10.0,
         )
         resp.raise_for_status()
-        data = resp.json()
-
-        # Prefer AI overview if present
-        ai_overview = data.get("ai_overview")
-        if isinstance(ai_overview, dict) and ai_overview.get("answer"):
-            return ai_overview["answer"]
-
-        # Fallback to first few organic snippets
-        organic = data.get("organic_results") or []
-        snippets: list[str] = []
-        for item in organic[:3]:
-            snippet = item.get("snippet")
-            if snippet:
-                snippets.append(snippet)
-
-        if snippets:
-            return "\n".join(snippets)
+        return _extract_safety_snippet(resp.json())
 
     except Exception:
         # In case of any network / parsing error, just return None so the
         # chatbot can fall back to its normal behaviour.
         return None
-
-    return None
-
-
@@ -1,126 +1,308 @@
-from typing import List
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import repeat
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
-import httpx
 from bs4 import BeautifulSoup
 from sqlalchemy.orm import Session
 
+from app.core.config import get_settings
+from app.core.metrics import metrics
+from app.models.crawl_state import CrawlState
 from app.models.product import Product
+from app.services.catalogue import bump_catalogue_version
+from app.services.crawler import Crawler, FetchResult
+from app.services.html_extract import PageFields, extract_page_fields, resolve_backend
+from app.services.product_store import upsert_crawl_states, upsert_products
+from app.services.structured_data import (
+    feed_products,
+    fields_from_json_ld,
+    fields_from_shopify_product,
+    guess_category,
+    parse_json,
+)
 
 
-BASE_URL = "https://traya.health"
+settings = get_settings()
 
+BASE_URL = settings.traya_base_url.rstrip("/")
 
-def _fetch_html(url: str) -> str:
-    # Follow redirects because Traya may redirect old product URLs
-    resp = httpx.get(url, timeout=20.0, follow_redirects=True)
-    resp.raise_for_status()
-    return resp.text
+# Shopify caps `limit` on /products.json at 250.
+FEED_PAGE_SIZE = 250
 
 
-def _parse_product_page(url: str) -> Product | None:
+def _parse_price(text: str | None) -> float | None:
+    if not text:
+        return None
+    text = text.strip().replace("₹", "").replace(",", "")
+    try:
+        return float("".join(ch for ch in text if (ch.isdigit() or ch == ".")))
+    except ValueError:
+        return None
+
+
+def _fields_from_html(page: PageFields) -> Dict[str, Any] | None:
     """
-    Very simple HTML parser for a Traya product page.
+    Best-effort Product columns from a page's markup alone.
     NOTE: This is intentionally lightweight and may need adjustments
     if Traya's HTML structure changes.
     """
-    html = _fetch_html(url)
-    soup = BeautifulSoup(html, "html.parser")
-
     # Title
-    title_tag = soup.find("h1")
-    title = title_tag.get_text(strip=True) if title_tag else None
-    if not title:
+    if not page.title:
         return None
 
-    # Price (best-effort)
-    price = None
-    price_tag = soup.find(string=lambda s: s and "₹" in s)
-    if price_tag:
-        text = price_tag.strip().replace("₹", "").replace(",", "")
-        try:
-            price = float("".join(ch for ch in text if (ch.isdigit() or ch == ".")))
-        except ValueError:
-            price = None
-
-    # Short description / tagline
-    short_desc = None
-    meta_desc = soup.find("meta", attrs={"name": "description"})
-    if meta_desc and meta_desc.get("content"):
-        short_desc = meta_desc["content"].strip()
-
     # Long description and features (best-effort from paragraphs and list items)
-    paragraphs = [p.get_text(" ", strip=True) for p in soup.find_all("p")]
-    lis = [li.get_text(" ", strip=True) for li in soup.find_all("li")]
-    long_description = "\n".join(paragraphs) if paragraphs else None
+    long_description = "\n".join(page.paragraphs) if page.paragraphs else None
 
     # Try to infer features/benefits from list items
-    features_text = "\n".join(lis) if lis else None
-
-    # Image
-    image_url = None
-    og_image = soup.find("meta", property="og:image")
-    if og_image and og_image.get("content"):
-        image_url = og_image["content"]
-
-    # Very simple category extraction from breadcrumbs or tags if available
-    category = None
-    if "shampoo" in (long_description or "").lower():
-        category = "shampoo"
-    elif "serum" in (long_description or "").lower():
-        category = "serum"
-    elif "capsule" in (long_description or "").lower():
-        category = "supplement"
-
-    product = Product(
-        title=title,
-        price=price,
-        short_description=short_desc,
-        long_description=long_description,
-        features=features_text,
-        image_url=image_url,
-        category=category,
-        source_url=url,
-    )
-    return product
+    features_text = "\n".join(page.list_items) if page.list_items else None
+
+    return {
+        "title": page.title,
+        "price": _parse_price(page.price_text),
+        "short_description": page.meta_description,
+        "long_description": long_description,
+        "features": features_text,
+        "image_url": page.og_image,
+        "category": guess_category(long_description),
+    }
 
 
-def scrape_traya_products(db: Session, limit: int = 80) -> List[Product]:
+def _fields_from_page(page: PageFields) -> Dict[str, Any] | None:
     """
-    Scrape a set of Traya products.
-    This uses a simple catalogue URL; in a real project you might
-    need a more sophisticated crawler or a scraping API.
+    Product columns from a product page: its JSON-LD Product block when
+    there is one, otherwise the markup heuristics.
     """
-    # Example collection page; adjust if structure changes
-    collection_url = f"{BASE_URL}/collections/all"
-    html = _fetch_html(collection_url)
-    soup = BeautifulSoup(html, "html.parser")
+    fields = fields_from_json_ld(page.json_ld)
+    if fields is None:
+        return _fields_from_html(page)
+    # JSON-LD has no benefit list; the page's tagline beats its description.
+    fields["short_description"] = page.meta_description or fields["short_description"]
+    fields["features"] = "\n".join(page.list_items) if page.list_items else None
+    return fields
+
 
+def _extract_page(html: str, backend: str) -> PageFields | None:
+    try:
+        return extract_page_fields(html, backend)
+    except Exception:
+        # One page the parser rejects must not abort the whole scrape.
+        return None
+
+
+def _extract_pages(pages: List[str]) -> List[PageFields | None]:
+    """
+    Extract the fields of many pages (None for a page that fails to parse).
+    Large crawls are spread over a process pool, since parsing is CPU-bound
+    and would otherwise hold the GIL.
+    """
+    backend = resolve_backend(settings.html_parser_backend)
+    if len(pages) < settings.html_parse_pool_min_pages:
+        return [_extract_page(html, backend) for html in pages]
+
+    workers = settings.html_parse_max_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(
+            pool.map(
+                _extract_page,
+                pages,
+                repeat(backend),
+                chunksize=max(1, len(pages) // (workers * 4)),
+            )
+        )
+
+
+def _extract_product_links(html: str, base_url: str, limit: int) -> List[str]:
+    soup = BeautifulSoup(html, "html.parser")
     product_links: List[str] = []
     for a in soup.find_all("a", href=True):
         href = a["href"]
         if "/products/" in href:
-            full_url = href if href.startswith("http") else f"{BASE_URL}{href}"
+            full_url = href if href.startswith("http") else f"{base_url}{href}"
             if full_url not in product_links:
                 product_links.append(full_url)
         if len(product_links) >= limit:
             break
+    return product_links
+
+
+@dataclass
+class _CrawlResult:
+    # Product URLs in catalogue order.
+    product_links: List[str]
+    # (product URL, Product columns) from the feed or `.js` endpoints.
+    structured: List[Tuple[str, Dict[str, Any]]] = field(default_factory=list)
+    # Product pages that still need parsing (no `.js` endpoint).
+    pages: List[FetchResult] = field(default_factory=list)
+    # Conditional fetches whose validators to store: pages that yielded a
+    # product or were unchanged. A page that yielded nothing is not stored,
+    # so the next crawl fetches it in full instead of getting a 304.
+    fetched: List[FetchResult] = field(default_factory=list)
+    states: Dict[str, CrawlState] = field(default_factory=dict)
+
+
+async def _fetch_feed(crawler: Crawler, base_url: str, limit: int) -> List[Dict[str, Any]] | None:
+    """
+    Page through the store's `/products.json` feed. Returns None when the
+    store doesn't serve one.
+    """
+    page_size = min(limit, FEED_PAGE_SIZE)
+    products: List[Dict[str, Any]] = []
+    page = 1
+    while len(products) < limit:
+        result = await crawler.fetch(f"{base_url}/products.json?limit={page_size}&page={page}")
+        batch = feed_products(parse_json(result.text)) if result.ok else None
+        if batch is None and page == 1:
+            return None
+        if not batch:
+            break
+        products.extend(batch)
+        if len(batch) < page_size:
+            break
+        page += 1
+    return products[:limit] or None
+
+
+async def _crawl(
+    db: Session, base_url: str, limit: int, progress: Optional[Callable[..., None]] = None
+) -> _CrawlResult:
+    """
+    Fetch the catalogue, preferring structured data:
+
+    1. the paginated `/products.json` feed (dozens of products per request);
+    2. otherwise the collection page's links, each fetched as
+       `/products/<handle>.js`;
+    3. and the HTML product page only where the `.js` endpoint is missing.
+
+    Per-product requests run concurrently and are conditional on the
+    validators stored from the last crawl.
+    """
+    async with Crawler(
+        max_concurrency=settings.crawler_max_concurrency,
+        per_host_rate=settings.crawler_per_host_rate,
+        max_retries=settings.crawler_max_retries,
+        on_fetch=(lambda result: progress(pages_fetched=1)) if progress is not None else None,
+    ) as crawler:
+        feed = await _fetch_feed(crawler, base_url, limit)
+        if feed is not None:
+            crawl = _CrawlResult(product_links=[])
+            for data in feed:
+                url = f"{base_url}/products/{data['handle']}"
+                fields = fields_from_shopify_product(data)
+                if fields is not None and url not in crawl.product_links:
+                    crawl.product_links.append(url)
+                    crawl.structured.append((url, fields))
+            return crawl
+
+        # Example collection page; adjust if structure changes
+        listing = await crawler.fetch(f"{base_url}/collections/all")
+        if not listing.ok:
+            raise RuntimeError(f"Failed to fetch Traya collection page (HTTP {listing.status})")
+        crawl = _CrawlResult(product_links=_extract_product_links(listing.text or "", base_url, limit))
 
-    created_products: List[Product] = []
-    for url in product_links:
-        existing = db.query(Product).filter_by(source_url=url).first()
-        if existing:
-            created_products.append(existing)
-            continue
+        # One query for the validators of every URL instead of one per URL.
+        js_urls = [f"{url.split('?')[0]}.js" for url in crawl.product_links]
+        crawl.states = {
+            s.url: s
+            for s in db.query(CrawlState).filter(
+                CrawlState.url.in_(crawl.product_links + js_urls)
+            )
+        }
 
-        product = _parse_product_page(url)
-        if product:
-            db.add(product)
-            created_products.append(product)
+        def conditional(url: str) -> Tuple[str, str | None, str | None]:
+            state = crawl.states.get(url)
+            return (url, state.etag, state.last_modified) if state else (url, None, None)
 
-    db.commit()
-    for p in created_products:
-        db.refresh(p)
+        js_results = await crawler.fetch_all([conditional(url) for url in js_urls])
+        html_links: List[str] = []
+        for url, result in zip(crawl.product_links, js_results):
+            fields = fields_from_shopify_product(parse_json(result.text)) if result.ok else None
+            if fields is not None:
+                crawl.structured.append((url, fields))
+                crawl.fetched.append(result)
+            elif result.not_modified:
+                # Unchanged since the last crawl: keep whatever we already have.
+                crawl.fetched.append(result)
+            else:
+                html_links.append(url)
 
-    return created_products
+        html_results = await crawler.fetch_all([conditional(url) for url in html_links])
+        crawl.fetched.extend(result for result in html_results if result.not_modified)
+        # Their validators are stored only once they yield a product.
+        crawl.pages = [result for result in html_results if result.ok]
+    return crawl
 
 
+@dataclass
+class ScrapeResult:
+    # Ids of the products behind the scraped links, in catalogue order.
+    product_ids: List[int]
+    # Products inserted or changed by this scrape; feed these to
+    # `index_all_products(db, product_ids=...)` to re-embed only them.
+    changed_ids: Set[int]
+
+
+@metrics.timed("scrape.total")
+def scrape_traya_products(
+    db: Session, limit: int = 80, progress: Optional[Callable[..., None]] = None
+) -> ScrapeResult:
+    """
+    Scrape a set of Traya products.
+
+    Structured data is preferred: Shopify's `/products.json` feed, then
+    per-product `.js` JSON, then JSON-LD / markup on the HTML page. Requests
+    go through a pooled, rate-limited client; pages that haven't changed
+    since the last crawl answer 304 and are skipped.
+
+    Products are upserted on `source_url` in a constant number of batched
+    statements, and rows whose content hash is unchanged are not written.
+
+    `progress` (see `services.jobs.Progress`) is called with increments of
+    `pages_fetched`, `pages_parsed`, `products_upserted` and
+    `products_changed`; it may raise to abort the scrape, in which case the
+    caller rolls back and nothing is written.
+    """
+    with metrics.span("scrape.crawl"):
+        crawl = asyncio.run(_crawl(db, BASE_URL, limit, progress))
+
+    scraped: Dict[str, Dict[str, Any]] = {}
+    with metrics.span("scrape.extract"):
+        for url, fields in crawl.structured:
+            scraped.setdefault(url, fields)
+        page_fields = _extract_pages([result.text or "" for result in crawl.pages])
+        for result, page in zip(crawl.pages, page_fields):
+            if page is None:
+                metrics.incr("scrape_parse_errors_total")
+                continue
+            fields = _fields_from_page(page)
+            if fields is not None:
+                scraped.setdefault(result.url, fields)
+                crawl.fetched.append(result)
+
+    if progress is not None:
+        progress(pages_parsed=len(crawl.pages))
+    with metrics.span("scrape.upsert"):
+        upserted = upsert_products(
+            db, [{**fields, "source_url": url} for url, fields in scraped.items()]
+        )
+        upsert_crawl_states(db, crawl.fetched)
+        # Last cancellation point: a cancel here rolls the upsert back.
+        if progress is not None:
+            progress(products_upserted=len(scraped), products_changed=len(upserted.changed_ids))
+        db.commit()
+    if upserted.changed_ids:
+        bump_catalogue_version()
+
+    ids = dict(upserted.ids)
+    # Links answered with 304 weren't re-parsed; look up the ids they have.
+    unparsed = [url for url in crawl.product_links if url not in ids]
+    if unparsed:
+        ids.update(
+            db.query(Product.source_url, Product.id).filter(Product.source_url.in_(unparsed))
+        )
+    return ScrapeResult(
+        product_ids=[ids[url] for url in crawl.product_links if url in ids],
+        changed_ids=upserted.changed_ids,
+    )
@@ -0,0 +1,184 @@
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.services.html_extract import extract_page_fields
+
+
+# Product fields from machine-readable sources, in order of preference:
+# - Shopify's storefront feed, `/products.json?limit=250&page=N` (many
+#   products per request, variant prices as "699.00" strings);
+# - Shopify's per-product `/products/<handle>.js` (prices in paise);
+# - schema.org `Product` blocks in a page's JSON-LD.
+# Each function returns a dict of Product column values (everything but
+# `source_url`), or None when the payload isn't a usable product.
+
+
+def parse_json(text: Optional[str]) -> Any:
+    """
+    `json.loads` that returns None for anything that isn't valid JSON (an
+    HTML error page, a truncated body).
+    """
+    if not text:
+        return None
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
+
+
+def guess_category(text: Optional[str]) -> Optional[str]:
+    """
+    Very simple category heuristic from free text.
+    """
+    text = (text or "").lower()
+    if "shampoo" in text:
+        return "shampoo"
+    if "serum" in text:
+        return "serum"
+    if "capsule" in text:
+        return "supplement"
+    return None
+
+
+def feed_products(payload: Any) -> Optional[List[Dict[str, Any]]]:
+    """
+    Products of one `/products.json` page; None if the payload isn't a feed.
+    """
+    if not isinstance(payload, dict) or not isinstance(payload.get("products"), list):
+        return None
+    return [p for p in payload["products"] if isinstance(p, dict) and p.get("handle")]
+
+
+def _absolute_url(url: Any) -> Optional[str]:
+    if isinstance(url, dict):
+        url = url.get("src") or url.get("url")
+    if not isinstance(url, str) or not url:
+        return None
+    return f"https:{url}" if url.startswith("//") else url
+
+
+def _to_float(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _shopify_price(data: Dict[str, Any]) -> Optional[float]:
+    """
+    Lowest price among available variants (all variants if none are
+    available). The feed sends "699.00" strings; `.js` sends integer paise.
+    """
+    variants = [v for v in data.get("variants") or [] if isinstance(v, dict)]
+    pool = [v for v in variants if v.get("available", True)] or variants
+    prices = []
+    for variant in pool:
+        raw = variant.get("price")
+        price = raw / 100 if isinstance(raw, int) else _to_float(raw)
+        if price is not None:
+            prices.append(price)
+    if prices:
+        return min(prices)
+    raw = data.get("price")
+    return raw / 100 if isinstance(raw, int) else _to_float(raw)
+
+
+def _description_fields(html: str) -> Dict[str, Optional[str]]:
+    """
+    Split a product description (HTML or plain text) into summary,
+    long description and features, the way product pages are split.
+    """
+    if "<" in html:
+        fields = extract_page_fields(html)
+        paragraphs, items = fields.paragraphs, fields.list_items
+    else:
+        paragraphs = [line.strip() for line in html.splitlines() if line.strip()]
+        items = []
+    paragraphs = [p for p in paragraphs if p]
+    return {
+        "short_description": paragraphs[0] if paragraphs else None,
+        "long_description": "\n".join(paragraphs) if paragraphs else None,
+        "features": "\n".join(i for i in items if i) or None,
+    }
+
+
+def fields_from_shopify_product(data: Any) -> Optional[Dict[str, Any]]:
+    """
+    Map a Shopify product (feed entry or `/products/<handle>.js`) to
+    Product columns.
+    """
+    if not isinstance(data, dict) or not data.get("title"):
+        return None
+
+    description = data.get("body_html") or data.get("description") or ""
+    fields = _description_fields(description)
+
+    images = data.get("images") or []
+    image_url = _absolute_url(data.get("featured_image")) or (
+        _absolute_url(images[0]) if images else None
+    )
+
+    product_type = (data.get("product_type") or data.get("type") or "").strip().lower()
+    return {
+        "title": data["title"].strip(),
+        "price": _shopify_price(data),
+        **fields,
+        "image_url": image_url,
+        "category": product_type or guess_category(fields["long_description"]),
+    }
+
+
+def _json_ld_products(node: Any) -> Iterable[Dict[str, Any]]:
+    """
+    Every schema.org Product in a JSON-LD document (top level, lists, @graph).
+    """
+    if isinstance(node, list):
+        for item in node:
+            yield from _json_ld_products(item)
+    elif isinstance(node, dict):
+        types = node.get("@type")
+        types = types if isinstance(types, list) else [types]
+        if "Product" in types:
+            yield node
+        elif "@graph" in node:
+            yield from _json_ld_products(node["@graph"])
+
+
+def _json_ld_price(offers: Any) -> Optional[float]:
+    if isinstance(offers, dict):
+        if offers.get("@type") == "AggregateOffer" and "lowPrice" in offers:
+            return _to_float(offers["lowPrice"])
+        offers = [offers]
+    if not isinstance(offers, list):
+        return None
+    prices = [_to_float(o.get("price")) for o in offers if isinstance(o, dict)]
+    prices = [p for p in prices if p is not None]
+    return min(prices) if prices else None
+
+
+def fields_from_json_ld(blocks: List[str]) -> Optional[Dict[str, Any]]:
+    """
+    Map the first schema.org Product in a page's JSON-LD blocks to Product
+    columns. Features are left to the page's HTML.
+    """
+    for block in blocks:
+        for product in _json_ld_products(parse_json(block)):
+            name = product.get("name")
+            if not isinstance(name, str) or not name.strip():
+                continue
+            image = product.get("image")
+            if isinstance(image, list):
+                image = image[0] if image else None
+            description = product.get("description")
+            description = description.strip() if isinstance(description, str) else ""
+            category = product.get("category")
+            category = category.strip().lower() if isinstance(category, str) else ""
+            return {
+                "title": name.strip(),
+                "price": _json_ld_price(product.get("offers")),
+                "short_description": description or None,
+                "long_description": description or None,
+                "image_url": _absolute_url(image),
+                "category": category or guess_category(description),
+            }
+    return None
@@ -1,46 +1,189 @@
-from typing import Any, Dict, List, Tuple
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
-import chromadb
+from app.core.config import get_settings
 
 
-# Use an in-memory (ephemeral) Chroma client for simplicity and to avoid
-# local configuration/version issues. The index can be rebuilt at runtime
-# using the /admin/build-index endpoint.
-_client = chromadb.EphemeralClient()
+settings = get_settings()
 
-_collection = _client.get_or_create_collection(name="traya_products")
+
+def normalize_category(category: Optional[str]) -> Optional[str]:
+    """
+    Form in which categories are stored and compared by every index (the
+    vector stores and BM25), so a filter for "Hair Care" matches "hair care"
+    on both sides of the fusion. Blank means no category.
+    """
+    return (category or "").strip().lower() or None
+
+
+class VectorStore(ABC):
+    """
+    Storage and exact/approximate nearest-neighbour search over product
+    embeddings. Vectors are always computed by `services.embeddings` and
+    passed in; stores never embed text themselves.
+    """
+
+    @abstractmethod
+    def reset(self) -> None:
+        """
+        Delete every vector.
+        """
+
+    @abstractmethod
+    def indexed_hashes(self) -> Dict[int, str]:
+        """
+        product_id -> content hash for everything in the store.
+        """
+
+    @abstractmethod
+    def upsert(
+        self, items: List[Tuple[int, str, Dict[str, Any]]], embeddings: List[List[float]]
+    ) -> None:
+        """
+        Insert or replace (product_id, text, metadata) items with their vectors.
+        """
+
+    @abstractmethod
+    def delete(self, product_ids: List[int]) -> None:
+        ...
+
+    @abstractmethod
+    def query(
+        self, query_embeddings: List[List[float]], top_k: int, category: Optional[str]
+    ) -> Dict[str, Any]:
+        """
+        Nearest products for each query vector, in Chroma's result shape:
+        `{"ids": [[str, ...], ...], "distances": [[float, ...], ...]}`
+        with one inner list per query, closest first.
+        """
+
+
+def _create_store() -> VectorStore:
+    """
+    Backends are imported on first use, so a NumPy deployment never loads
+    chromadb.
+    """
+    backend = settings.vector_store_backend
+    if backend == "numpy":
+        from app.services.vectorstore_numpy import NumpyVectorStore
+
+        path = None if settings.vector_store_mode == "ephemeral" else settings.numpy_store_path
+        return NumpyVectorStore(path, embedding_model=settings.embedding_model)
+    if backend == "chroma":
+        from app.services.vectorstore_chroma import ChromaVectorStore
+
+        return ChromaVectorStore()
+    raise ValueError(f"Unknown vector store backend: {backend!r}")
+
+
+_store: Optional[VectorStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> VectorStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = _create_store()
+    return _store
+
+
+# Vector-store calls are blocking; async callers hop onto this bounded pool
+# so a burst of chats can't exhaust the event loop's default executor.
+_executor = ThreadPoolExecutor(
+    max_workers=settings.vector_store_max_workers,
+    thread_name_prefix="vectorstore",
+)
+
+
+def warm_up() -> int:
+    """
+    Open the configured store and load its index (startup warm-up);
+    returns the number of indexed products.
+    """
+    return len(get_store().indexed_hashes())
 
 
 def reset_collection() -> None:
     """
     Danger: deletes all vectors. Useful for local development.
     """
-    _client.delete_collection("traya_products")
+    get_store().reset()
+
+
+def get_indexed_hashes() -> Dict[int, str]:
+    """
+    Return a mapping of product_id -> content hash for everything currently
+    in the index. Entries written before hashes were stored map to "".
+    """
+    return get_store().indexed_hashes()
 
 
 def index_products(
     items: List[Tuple[int, str, Dict[str, Any]]],
+    embeddings: List[List[float]],
 ) -> None:
     """
-    Index a list of products in Chroma.
+    Insert or replace a list of products in the vector store.
 
-    Each item: (product_id, text, metadata_dict)
+    Each item: (product_id, text, metadata_dict); `embeddings` holds the
+    matching vector for each item, in the same order.
     """
-    if not items:
-        return
+    if items:
+        get_store().upsert(items, embeddings)
 
-    ids = [str(pid) for pid, _, _ in items]
-    documents = [text for _, text, _ in items]
-    metadatas = [meta for _, _, meta in items]
 
-    _collection.add(ids=ids, documents=documents, metadatas=metadatas)
+def delete_products(product_ids: Iterable[int]) -> None:
+    """
+    Remove the vectors for the given product ids.
+    """
+    ids = list(product_ids)
+    if ids:
+        get_store().delete(ids)
+
+
+def query_products(
+    query_embedding: List[float], top_k: int = 5, category: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Query similar products for an already-embedded query, optionally only
+    within one `category` (filtered before the nearest-neighbour search).
+    Returns the raw result (see `VectorStore.query`).
+    """
+    return get_store().query([query_embedding], top_k, category)
+
+
+def query_products_many(
+    query_embeddings: List[List[float]], top_k: int = 5, category: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    `query_products` for several queries at once; one search call for all.
+    """
+    if not query_embeddings:
+        return {"ids": [], "distances": []}
+    return get_store().query(query_embeddings, top_k, category)
 
 
-def query_products(query: str, top_k: int = 5) -> Dict[str, Any]:
+async def query_products_async(
+    query_embedding: List[float], top_k: int = 5, category: Optional[str] = None
+) -> Dict[str, Any]:
     """
-    Query similar products for a free-text query.
-    Returns Chroma's raw query result.
+    Async wrapper around `query_products` that runs on the vector-store pool.
     """
-    return _collection.query(query_texts=[query], n_results=top_k)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _executor, query_products, query_embedding, top_k, category
+    )
 
 
+async def query_products_many_async(
+    query_embeddings: List[List[float]], top_k: int = 5, category: Optional[str] = None
+) -> Dict[str, Any]:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _executor, query_products_many, query_embeddings, top_k, category
+    )
@@ -0,0 +1,118 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+import chromadb
+
+from app.core.config import get_settings
+from app.services.vectorstore import VectorStore, normalize_category
+
+
+settings = get_settings()
+
+COLLECTION_NAME = "traya_products"
+
+
+def _create_client():
+    """
+    Persistent mode keeps the index on disk at `chroma_path`, so a restarted
+    (or newly spawned) worker simply opens the existing collection instead of
+    waiting for /admin/build-index. Ephemeral mode is kept for throwaway
+    local runs.
+    """
+    if settings.vector_store_mode == "ephemeral":
+        return chromadb.EphemeralClient()
+    return chromadb.PersistentClient(path=settings.chroma_path)
+
+
+def _normalize_categories(collection) -> None:
+    """
+    Rewrite the category of items stored before categories were normalised
+    (see `normalize_category`); their vectors are kept.
+    """
+    result = collection.get(include=["metadatas"])
+    ids, metadatas = [], []
+    for pid, meta in zip(result.get("ids") or [], result.get("metadatas") or []):
+        category = (meta or {}).get("category")
+        normalized = normalize_category(category)
+        if normalized is not None and normalized != category:
+            ids.append(pid)
+            metadatas.append({**meta, "category": normalized})
+    if ids:
+        collection.update(ids=ids, metadatas=metadatas)
+
+
+class ChromaVectorStore(VectorStore):
+    """
+    Chroma collection with cosine HNSW search.
+    """
+
+    def __init__(self) -> None:
+        self._client = _create_client()
+        self._collection = self._open_collection()
+
+    def _open_collection(self):
+        """
+        Embeddings are computed by `services.embeddings` and passed in
+        explicitly, so the collection has no embedding function of its own.
+        The embedding model is recorded on the collection; an index built
+        with another model (or Chroma's built-in default) is dropped, as its
+        vectors aren't comparable.
+        """
+        metadata = {"embedding_model": settings.embedding_model, "hnsw:space": "cosine"}
+        # Not `get_or_create_collection`: it overwrites an existing
+        # collection's metadata, which would hide a model mismatch.
+        try:
+            collection = self._client.get_collection(COLLECTION_NAME, embedding_function=None)
+        except ValueError:  # chromadb 0.5: the collection does not exist
+            collection = None
+        if collection is not None:
+            if (collection.metadata or {}).get("embedding_model") == settings.embedding_model:
+                _normalize_categories(collection)
+                return collection
+            self._client.delete_collection(COLLECTION_NAME)
+        return self._client.create_collection(
+            name=COLLECTION_NAME,
+            metadata=metadata,
+            embedding_function=None,
+        )
+
+    def reset(self) -> None:
+        self._client.delete_collection(COLLECTION_NAME)
+        self._collection = self._open_collection()
+
+    def indexed_hashes(self) -> Dict[int, str]:
+        result = self._collection.get(include=["metadatas"])
+        hashes: Dict[int, str] = {}
+        for pid, meta in zip(result.get("ids") or [], result.get("metadatas") or []):
+            hashes[int(pid)] = str((meta or {}).get("content_hash", ""))
+        return hashes
+
+    def upsert(
+        self, items: List[Tuple[int, str, Dict[str, Any]]], embeddings: List[List[float]]
+    ) -> None:
+        metadatas = []
+        for _, _, meta in items:
+            meta = dict(meta)
+            category = normalize_category(meta.pop("category", None))
+            if category is not None:
+                meta["category"] = category
+            metadatas.append(meta)
+        self._collection.upsert(
+            ids=[str(pid) for pid, _, _ in items],
+            embeddings=embeddings,
+            documents=[text for _, text, _ in items],
+            metadatas=metadatas,
+        )
+
+    def delete(self, product_ids: List[int]) -> None:
+        self._collection.delete(ids=[str(pid) for pid in product_ids])
+
+    def query(
+        self, query_embeddings: List[List[float]], top_k: int, category: Optional[str]
+    ) -> Dict[str, Any]:
+        if self._collection.count() == 0:
+            return {"ids": [[] for _ in query_embeddings]}
+        category = normalize_category(category)
+        where = {"category": category} if category is not None else None
+        return self._collection.query(
+            query_embeddings=query_embeddings, n_results=top_k, where=where
+        )
@@ -0,0 +1,232 @@
+import json
+import os
+import secrets
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.vectorstore import VectorStore, normalize_category
+
+
+META_FILE = "index.json"
+# Reloads retried when the file named by the JSON vanished meanwhile.
+_LOAD_ATTEMPTS = 3
+
+
+@dataclass(frozen=True)
+class _State:
+    ids: np.ndarray  # int64, one per row
+    hashes: Tuple[str, ...]
+    categories: np.ndarray  # object (str or None), one per row
+    matrix: np.ndarray  # float32 (rows, dim), unit-length rows; may be a memmap
+    stamp: Optional[Tuple[int, int]] = None  # (mtime_ns, size) of the meta file
+
+
+def _empty_state(stamp: Optional[Tuple[int, int]] = None) -> _State:
+    return _State(
+        ids=np.empty(0, dtype=np.int64),
+        hashes=(),
+        categories=np.empty(0, dtype=object),
+        matrix=np.empty((0, 0), dtype=np.float32),
+        stamp=stamp,
+    )
+
+
+def _normalize(vectors: Any) -> np.ndarray:
+    matrix = np.array(vectors, dtype=np.float32, ndmin=2)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    Exact cosine search over a float32 matrix of unit-length embeddings.
+
+    With a `path`, the matrix lives in a `.npy` file opened with
+    `mmap_mode="r"`, so every worker process on the host shares one copy in
+    the page cache; ids, hashes and categories sit in a small JSON file next
+    to it. Writers build a new `.npy` under a fresh name and atomically
+    replace the JSON pointing at it; readers notice the JSON changed (one
+    `stat` per query) and remap. Without a `path` everything stays in memory.
+
+    A search is one matrix product for all queries plus an `argpartition`
+    per query, which for a catalogue of hundreds or thousands of products
+    is faster than an approximate index and always exact.
+    """
+
+    def __init__(self, path: Optional[str], embedding_model: str) -> None:
+        self.embedding_model = embedding_model
+        self._dir = Path(path) if path else None
+        self._write_lock = threading.Lock()
+        self._state = _empty_state()
+        if self._dir is not None:
+            self._dir.mkdir(parents=True, exist_ok=True)
+            self._state = self._load()
+
+    # -- persistence --------------------------------------------------------
+
+    def _stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self._dir / META_FILE)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _load(self) -> _State:
+        for _ in range(_LOAD_ATTEMPTS - 1):
+            try:
+                return self._read()
+            except FileNotFoundError:
+                # Two commits since the JSON was read removed the file it
+                # named; the JSON now names a newer one.
+                continue
+        return self._read()
+
+    def _read(self) -> _State:
+        stamp = self._stamp()
+        if stamp is None:
+            return _empty_state()
+        meta = json.loads((self._dir / META_FILE).read_text(encoding="utf-8"))
+        # Vectors from another embedding model aren't comparable; start over.
+        if meta.get("embedding_model") != self.embedding_model or not meta.get("ids"):
+            return _empty_state(stamp)
+        return _State(
+            ids=np.asarray(meta["ids"], dtype=np.int64),
+            hashes=tuple(meta["hashes"]),
+            # Normalised here too, for indexes written before categories were.
+            categories=np.asarray(
+                [normalize_category(c) for c in meta["categories"]], dtype=object
+            ),
+            matrix=np.load(self._dir / meta["file"], mmap_mode="r"),
+            stamp=stamp,
+        )
+
+    def _current(self) -> _State:
+        state = self._state
+        if self._dir is not None and self._stamp() != state.stamp:
+            state = self._state = self._load()
+        return state
+
+    def _commit(self, ids: np.ndarray, hashes: List[str], categories: List, matrix: np.ndarray) -> None:
+        if self._dir is None:
+            self._state = _State(
+                ids=ids,
+                hashes=tuple(hashes),
+                categories=np.asarray(categories, dtype=object),
+                matrix=matrix,
+            )
+            return
+
+        old = self._dir / META_FILE
+        current = json.loads(old.read_text(encoding="utf-8")) if old.exists() else {}
+        previous, stale = current.get("file"), current.get("previous")
+        name = f"vectors-{secrets.token_hex(6)}.npy"
+        with open(self._dir / f"{name}.tmp", "wb") as f:
+            np.save(f, np.ascontiguousarray(matrix, dtype=np.float32))
+        os.replace(self._dir / f"{name}.tmp", self._dir / name)
+
+        meta = {
+            "embedding_model": self.embedding_model,
+            "file": name,
+            # Kept until the next commit, for readers that read the old JSON
+            # just before this one replaced it.
+            "previous": previous,
+            "ids": ids.tolist(),
+            "hashes": list(hashes),
+            "categories": list(categories),
+        }
+        tmp = self._dir / f"{META_FILE}.tmp"
+        tmp.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(tmp, old)
+        # Files are unlinked one commit late, so a reader between reading the
+        # JSON and mapping its file still finds it. Processes that still map
+        # an unlinked file keep reading it until they remap; unlinking
+        # doesn't invalidate an existing mapping.
+        if stale and stale not in (name, previous):
+            (self._dir / stale).unlink(missing_ok=True)
+        self._state = self._load()
+
+    # -- VectorStore --------------------------------------------------------
+
+    def reset(self) -> None:
+        with self._write_lock:
+            self._commit(np.empty(0, dtype=np.int64), [], [], np.empty((0, 0), dtype=np.float32))
+
+    def indexed_hashes(self) -> Dict[int, str]:
+        state = self._current()
+        return dict(zip(state.ids.tolist(), state.hashes))
+
+    def upsert(
+        self, items: List[Tuple[int, str, Dict[str, Any]]], embeddings: List[List[float]]
+    ) -> None:
+        vectors = _normalize(embeddings)
+        with self._write_lock:
+            state = self._current()
+            if len(state.ids) and state.matrix.shape[1] != vectors.shape[1]:
+                state = _empty_state()  # embedding size changed; rebuild
+            row_of = {pid: row for row, pid in enumerate(state.ids.tolist())}
+            ids = state.ids.tolist()
+            hashes = list(state.hashes)
+            categories = state.categories.tolist()
+            matrix = np.array(state.matrix, dtype=np.float32) if len(ids) else vectors[:0]
+            appended: List[np.ndarray] = []
+            for (pid, _, meta), vector in zip(items, vectors):
+                row = row_of.get(pid)
+                if row is None:
+                    row = row_of[pid] = len(ids)
+                    ids.append(pid)
+                    hashes.append("")
+                    categories.append(None)
+                    appended.append(vector)
+                else:
+                    matrix[row] = vector
+                hashes[row] = str(meta.get("content_hash", ""))
+                categories[row] = normalize_category(meta.get("category"))
+            if appended:
+                matrix = np.vstack([matrix, np.stack(appended)])
+            self._commit(np.asarray(ids, dtype=np.int64), hashes, categories, matrix)
+
+    def delete(self, product_ids: List[int]) -> None:
+        with self._write_lock:
+            state = self._current()
+            keep = ~np.isin(state.ids, np.asarray(product_ids, dtype=np.int64))
+            if keep.all():
+                return
+            self._commit(
+                state.ids[keep],
+                [h for h, k in zip(state.hashes, keep) if k],
+                state.categories[keep].tolist(),
+                np.asarray(state.matrix)[keep],
+            )
+
+    def query(
+        self, query_embeddings: List[List[float]], top_k: int, category: Optional[str]
+    ) -> Dict[str, Any]:
+        state = self._current()
+        rows = np.arange(len(state.ids))
+        category = normalize_category(category)
+        if category is not None:
+            rows = np.flatnonzero(state.categories == category)
+        if not len(rows) or top_k <= 0:
+            return {
+                "ids": [[] for _ in query_embeddings],
+                "distances": [[] for _ in query_embeddings],
+            }
+
+        queries = _normalize(query_embeddings)
+        matrix = state.matrix if category is None else state.matrix[rows]
+        # (rows, queries) cosine similarities in one product.
+        scores = matrix @ queries.T
+        k = min(top_k, len(rows))
+        ids: List[List[str]] = []
+        distances: List[List[float]] = []
+        for column in scores.T:
+            top = np.argpartition(-column, k - 1)[:k] if k < len(column) else np.arange(len(column))
+            top = top[np.argsort(-column[top], kind="stable")]
+            ids.append([str(pid) for pid in state.ids[rows[top]].tolist()])
+            distances.append((1.0 - column[top]).tolist())
+        return {"ids": ids, "distances": distances}
@@ -0,0 +1,137 @@
+"""
+Conversation context: bounded prompts and follow-up retrieval.
+
+1. Replays a long conversation and reports, per turn, the estimated tokens
+   of conversation text put in the prompt (history window plus latest
+   query) next to what sending the whole history would cost. The window
+   must stay within `chat_history_max_tokens` plus the latest query.
+2. Runs labeled two-turn conversations whose follow-up ("is it safe with
+   PCOS?") doesn't name the product, through BM25 over the recorded Traya
+   feed, with the latest message alone and with the context retrieval
+   query; then checks that carried product ids keep the product in the
+   candidates either way.
+3. Times the token estimate, uncached and cached.
+
+Run from `backend/`:
+
+    python -m benchmarks.bench_conversation
+"""
+
+import sys
+import timeit
+from typing import List
+
+from app.core.config import get_settings
+from app.schemas.chat import ChatMessage
+from app.services.conversation import build_context, estimate_tokens
+from app.services.lexical import LexicalIndex
+from app.services.rag import _with_carried
+from benchmarks.bench_retrieval import load_catalogue, score
+
+
+TURNS = 40
+CANDIDATES = 8
+# The context query must reach this MRR on the labeled follow-ups.
+MIN_CONTEXT_MRR = 0.9
+
+# (first user message, follow-up, relevant handle)
+FOLLOW_UPS = [
+    ("I want minoxidil for my crown", "is it safe if I have PCOS?", "minoxidil-5"),
+    ("looking for an onion and ginseng shampoo", "how often should I use it?", "shampoo-2-0"),
+    ("dandruff and an itchy scalp", "can I use it every day?", "defence-shampoo"),
+    ("ashwagandha capsules for stress hair fall", "any side effects?", "hair-ras"),
+    ("redensyl procapil serum", "how long until I see results?", "recap-serum"),
+    ("oil for split ends and dry scalp", "is that okay for kids?", "scalp-oil"),
+]
+
+REPLY = (
+    "Thanks for sharing that. Based on what you described, a gentle routine with a "
+    "sulphate free shampoo twice a week and a nourishing scalp oil before washing can "
+    "help. If the hair fall continues for more than three months, a dermatologist can "
+    "check for underlying causes such as thyroid issues, iron deficiency or stress."
+)
+
+
+def _context(messages: List[ChatMessage]):
+    settings = get_settings()
+    return build_context(
+        messages,
+        query_turns=settings.chat_query_turns,
+        query_max_tokens=settings.chat_query_max_tokens,
+        history_max_tokens=settings.chat_history_max_tokens,
+    )
+
+
+def prompt_growth() -> bool:
+    budget = get_settings().chat_history_max_tokens
+    messages: List[ChatMessage] = []
+    worst = 0
+    print(f"{'turn':>5} {'full history':>13} {'window':>7}")
+    for turn in range(1, TURNS + 1):
+        messages.append(ChatMessage(role="user", content=f"question {turn}: {REPLY[:90]}"))
+        context = _context(messages)
+        full = sum(estimate_tokens(m.content) for m in messages)
+        window = estimate_tokens(context.history_text()) + estimate_tokens(context.latest_query)
+        worst = max(worst, window - estimate_tokens(context.latest_query))
+        if turn in (1, 2, 5, 10, 20, TURNS):
+            print(f"{turn:>5} {full:>13} {window:>7}")
+        messages.append(
+            ChatMessage(role="assistant", content=REPLY, recommended_product_ids=[turn])
+        )
+    ok = worst <= budget
+    print(f"{'ok' if ok else 'FAIL'} history window peaks at {worst} tokens (budget {budget})")
+    return ok
+
+
+def follow_up_retrieval() -> bool:
+    catalogue = load_catalogue()
+    index = LexicalIndex()
+    index.sync(list(catalogue.values()))
+
+    latest_only, with_context, carried = [], [], []
+    relevant = []
+    for first, follow_up, handle in FOLLOW_UPS:
+        pid = catalogue[handle].id
+        relevant.append({pid})
+        messages = [
+            ChatMessage(role="user", content=first),
+            ChatMessage(role="assistant", content=REPLY, recommended_product_ids=[pid]),
+            ChatMessage(role="user", content=follow_up),
+        ]
+        context = _context(messages)
+        latest_only.append(index.search(follow_up, top_k=CANDIDATES))
+        with_context.append(index.search(context.retrieval_query, top_k=CANDIDATES))
+        carried.append(_with_carried(latest_only[-1], context.carried_ids, CANDIDATES))
+
+    results = {
+        "latest message": score(latest_only, relevant),
+        "context query": score(with_context, relevant),
+        "latest + carried ids": score(carried, relevant),
+    }
+    for name, metrics in results.items():
+        shown = ", ".join(f"{k} {v:.3f}" for k, v in metrics.items())
+        print(f"{name:>21}: {shown}")
+    in_candidates = all(r & set(ids) for r, ids in zip(relevant, carried))
+    ok = results["context query"]["mrr"] >= MIN_CONTEXT_MRR and in_candidates
+    print(f"{'ok' if ok else 'FAIL'} follow-up retrieval")
+    return ok
+
+
+def estimate_timing() -> None:
+    uncached = estimate_tokens.__wrapped__
+    number = 20000
+    cold = timeit.timeit(lambda: uncached(REPLY), number=number) / number * 1e6
+    estimate_tokens(REPLY)
+    warm = timeit.timeit(lambda: estimate_tokens(REPLY), number=number) / number * 1e6
+    print(f"estimate_tokens on {len(REPLY)} chars: {cold:.1f} us uncached, {warm:.2f} us cached")
+
+
+def main() -> None:
+    ok = prompt_growth()
+    ok = follow_up_retrieval() and ok
+    estimate_timing()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
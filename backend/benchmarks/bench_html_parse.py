@@ -0,0 +1,133 @@
+"""
+Equality check + per-page timing for product-page parsing.
+
+Runs the original BeautifulSoup extraction from services/scraper_traya.py
+and every installed `app.services.html_extract` backend over the saved
+Traya product pages in `benchmarks/fixtures/traya/products/`, checks that
+they extract the same fields, and prints the time per page.
+
+The fixtures are trimmed, Shopify-theme shaped copies of Traya product
+pages (head metadata, theme scripts, nav and footer lists, JSON-LD).
+
+Run from `backend/`:
+
+    python -m benchmarks.bench_html_parse
+"""
+
+import sys
+import timeit
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, List
+
+from bs4 import BeautifulSoup
+
+from app.services.html_extract import PageFields, _BACKENDS, extract_page_fields
+
+
+FIXTURES = Path(__file__).parent / "fixtures" / "traya" / "products"
+
+# Small malformed snippets. The stdlib backend must match BeautifulSoup's
+# html.parser tree on these too; the C-backed parsers build HTML5 trees
+# (e.g. `<p>` closes at the next block element), so differences there are
+# reported but not failures.
+EDGE_CASES = [
+    "<h1>  Hair <b>Ras</b> </h1><p>one<p>two</p></p><li>a<li>b",
+    "<!-- was ₹999 --><p>now <s>₹</s> 699</p>",
+    "<script>var p = '₹1';</script><h1>X</h1><p>a<script>b</script>c</p>",
+    "<p>line<br>break</p><template><p>hidden</p></template><h1></h1><h1>second</h1>",
+    "<meta name=description content=''><meta name=description content='later'>"
+    "<meta property=og:image content=a.jpg><h1>T</h1>",
+    "<h1>A &amp; B</h1><p>5 < 6 &#8377;7</p></div></span><ul><li>x</ul>",
+    '<?xml version="1.0" encoding="utf-8"?><html><h1>Caf\u00e9</h1><p>\u20b9 499</p></html>',
+]
+
+
+def legacy_extract(html: str) -> PageFields:
+    """
+    The BeautifulSoup lookups the scraper used before, one `find` per field.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    fields = PageFields()
+
+    title_tag = soup.find("h1")
+    if title_tag:
+        fields.title = title_tag.get_text(strip=True)
+
+    price_tag = soup.find(string=lambda s: s and "₹" in s)
+    if price_tag:
+        fields.price_text = str(price_tag)
+
+    meta_desc = soup.find("meta", attrs={"name": "description"})
+    if meta_desc and meta_desc.get("content"):
+        fields.meta_description = meta_desc["content"].strip()
+
+    fields.paragraphs = [p.get_text(" ", strip=True) for p in soup.find_all("p")]
+    fields.list_items = [li.get_text(" ", strip=True) for li in soup.find_all("li")]
+
+    og_image = soup.find("meta", property="og:image")
+    if og_image and og_image.get("content"):
+        fields.og_image = og_image["content"]
+
+    # Not part of the old scraper; collected for the structured-data path.
+    fields.json_ld = [s.get_text() for s in soup.find_all("script", type="application/ld+json")]
+    return fields
+
+
+def installed_backends() -> List[str]:
+    names = []
+    for name, (module, _) in _BACKENDS.items():
+        try:
+            __import__(module)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def diff(expected: PageFields, got: PageFields) -> Dict[str, tuple]:
+    a, b = asdict(expected), asdict(got)
+    return {k: (a[k], b[k]) for k in a if a[k] != b[k]}
+
+
+def main() -> None:
+    pages = {path.name: path.read_text(encoding="utf-8") for path in sorted(FIXTURES.glob("*.html"))}
+    backends = installed_backends()
+    failures = 0
+
+    for name, html in pages.items():
+        expected = legacy_extract(html)
+        for backend in backends:
+            mismatch = diff(expected, extract_page_fields(html, backend))
+            if mismatch:
+                failures += 1
+                print(f"FAIL {backend} on {name}: {mismatch}")
+
+    for i, html in enumerate(EDGE_CASES):
+        expected = legacy_extract(html)
+        for backend in backends:
+            mismatch = diff(expected, extract_page_fields(html, backend))
+            if not mismatch:
+                continue
+            if backend == "stdlib":
+                failures += 1
+                print(f"FAIL stdlib on edge case {i}: {mismatch}")
+            else:
+                print(f"  ({backend} differs on malformed edge case {i}: {mismatch})")
+
+    print(f"fixtures: {len(pages)} pages x {len(backends)} backends, {failures} mismatches")
+
+    number = 50
+    runs = number * len(pages)
+    corpus = list(pages.values())
+    legacy = timeit.timeit(lambda: [legacy_extract(h) for h in corpus], number=number)
+    print(f"{'beautifulsoup (legacy)':>24}: {legacy / runs * 1e3:.3f} ms/page")
+    for backend in backends:
+        t = timeit.timeit(lambda: [extract_page_fields(h, backend) for h in corpus], number=number)
+        print(f"{backend:>24}: {t / runs * 1e3:.3f} ms/page ({legacy / t:.1f}x)")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Startup cost of the API: import time and time to ready.
+
+`import app.main` runs in fresh interpreters (best of `--runs`). Checks:
+
+- the heavy optional modules (the OpenAI SDK, chromadb, the HTML parsers)
+  are not imported; they load on first use or in the startup warm-up;
+- `app.schemas.chat` (what the CLI and the schemas need) stays free of
+  the web framework's routing, the database engine and the SDK;
+- what the app adds on top of its framework imports (FastAPI,
+  SQLAlchemy, httpx, NumPy, pydantic-settings) stays under
+  `APP_IMPORT_BUDGET_S`. The framework share is printed but not checked,
+  as it depends on the machine.
+
+`--boot` also starts uvicorn with `STARTUP_WARMUP` off and on and prints
+the time until `/products` answers. Exits non-zero if a check fails.
+
+Run from `backend/`:
+
+    python -m benchmarks.bench_import [--runs 5] [--boot]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from benchmarks.loadtest import BACKEND, free_port, spawn, wait_ready
+
+
+FRAMEWORK = (
+    "fastapi",
+    "sqlalchemy.orm",
+    "sqlalchemy.ext.asyncio",
+    "httpx",
+    "numpy",
+    "pydantic_settings",
+    "orjson",
+)
+FORBIDDEN = ("openai", "chromadb", "bs4", "lxml", "selectolax")
+SCHEMA_FORBIDDEN = ("fastapi.routing", "sqlalchemy.engine", "openai", "numpy")
+APP_IMPORT_BUDGET_S = 0.35
+
+_PROBE = """
+import json, sys, time
+for name in {preload!r}:
+    __import__(name)
+started = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+elapsed = time.perf_counter() - started
+print(json.dumps({{"s": elapsed, "modules": sorted(sys.modules)}}))
+"""
+
+
+def _env(scratch: Path) -> Dict[str, str]:
+    return {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{scratch / 'import.db'}",
+        "OPENAI_API_KEY": "bench",
+        "CHROMA_PATH": str(scratch / "chroma"),
+        "NUMPY_STORE_PATH": str(scratch / "vector_index"),
+        "EMBEDDING_CACHE_PATH": ":memory:",
+    }
+
+
+def probe(
+    modules: Tuple[str, ...], env: Dict[str, str], runs: int, preload: Tuple[str, ...] = ()
+) -> Tuple[float, List[str]]:
+    """
+    Best-of-`runs` time to import `modules` in a fresh interpreter that has
+    already imported `preload`, and the modules loaded by then.
+    """
+    best, loaded = float("inf"), []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(preload=preload, modules=modules)],
+            cwd=BACKEND,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        if result["s"] < best:
+            best, loaded = result["s"], result["modules"]
+    return best, loaded
+
+
+def _imported(loaded: List[str], roots: Tuple[str, ...]) -> List[str]:
+    return [root for root in roots if root in loaded]
+
+
+def boot_s(env: Dict[str, str], scratch: Path, warmup: bool) -> float:
+    port = free_port()
+    started = time.perf_counter()
+    process = spawn(
+        ["-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        {**env, "STARTUP_WARMUP": str(warmup).lower()},
+        scratch / f"uvicorn-{warmup}.log",
+    )
+    try:
+        wait_ready(f"http://127.0.0.1:{port}/products?limit=1", process)
+        return time.perf_counter() - started
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_import")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--boot", action="store_true", help="also time uvicorn to ready")
+    args = parser.parse_args(argv)
+
+    scratch = Path(tempfile.mkdtemp(prefix="import-"))
+    env = _env(scratch)
+    ok = True
+
+    framework_s, _ = probe(FRAMEWORK, env, args.runs)
+    app_s, loaded = probe(("app.main",), env, args.runs, preload=FRAMEWORK)
+    print(f"framework imports: {framework_s * 1000:7.1f} ms")
+    print(f"app on top:        {app_s * 1000:7.1f} ms (budget {APP_IMPORT_BUDGET_S * 1000:.0f} ms)")
+    if app_s > APP_IMPORT_BUDGET_S:
+        print("FAIL: app import over budget")
+        ok = False
+    heavy = _imported(loaded, FORBIDDEN)
+    if heavy:
+        print(f"FAIL: import app.main loads {', '.join(heavy)}")
+        ok = False
+
+    _, loaded = probe(("app.schemas.chat",), env, 1)
+    heavy = _imported(loaded, SCHEMA_FORBIDDEN)
+    if heavy:
+        print(f"FAIL: import app.schemas.chat loads {', '.join(heavy)}")
+        ok = False
+
+    if args.boot:
+        for warmup in (False, True):
+            print(f"boot to ready, warm-up {'on ' if warmup else 'off'}: "
+                  f"{boot_s(env, scratch, warmup) * 1000:7.1f} ms")
+
+    print("ok" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""
+Microbenchmark + golden cases for chat intent classification.
+
+Compares `app.services.intent.classify_intents` (one compiled pattern, one
+pass) with the original per-function keyword scans it replaced, and checks
+the golden cases below against the new classifier.
+
+Run from `backend/`:
+
+    python -m benchmarks.bench_intent
+"""
+
+import sys
+import timeit
+
+from app.services.intent import classify_intents
+
+
+# (message, side_effect, closing, needs_clarification)
+GOLDEN = [
+    ("I also have PCOS, is it fine to use it?", True, False, False),
+    ("What are the side effects of Hair Ras?", True, False, False),
+    ("is it safe with PCOS", True, False, False),
+    ("Any side-effects?", True, False, False),
+    ("I'm pregnant, can I use this shampoo?", True, False, False),
+    ("I have high blood pressure, can I take the capsules?", True, False, False),
+    ("I have bp, can I take minoxidil?", True, False, False),
+    ("I'm allergic to peanuts", True, False, False),
+    ("My bpm is high when I run, can I use this?", False, False, False),
+    ("I have a dry itchy scalp and my hair is thinning.", False, False, False),
+    ("dandruff and hair fall", False, False, False),
+    ("no", False, True, False),
+    ("No thanks", False, True, False),
+    ("that's all", False, True, False),
+    ("ok thanks", False, True, False),
+    ("Thank you", False, True, False),
+    ("I play the piano", False, False, False),
+    ("hair growth", False, False, True),
+    ("recommend something", False, False, True),
+    ("hair products", False, False, True),
+    ("hair growth for dandruff", False, False, False),
+    ("hair growth products for thinning crown area please", False, False, False),
+]
+
+
+# The original heuristics from services/rag.py, kept for comparison.
+def legacy_is_side_effect_question(text: str) -> bool:
+    t = text.lower()
+    safety_keywords = [
+        "side effect", "side-effect", "side effects", "is it safe", "safe to use",
+        "is it okay", "is it ok", "is it fine", "okay to use", "ok to use",
+        "fine to use", "harmful", "allergy", "allergic", "contraindication",
+        "interaction",
+    ]
+    condition_keywords = [
+        "pcos", "pregnant", "pregnancy", "bp", "blood pressure", "diabetes", "thyroid",
+    ]
+    if any(k in t for k in safety_keywords):
+        return True
+    if "?" in t and any(cond in t for cond in condition_keywords):
+        action_words = [" use ", " take ", " have ", " apply "]
+        if any(a in t for a in action_words):
+            return True
+    return False
+
+
+def legacy_is_closing_message(text: str) -> bool:
+    t = text.strip().lower()
+    closers = [
+        "no", "no thank you", "no thanks", "that's all", "that is all", "im fine",
+        "i'm fine", "all good", "ok thanks", "okay thanks", "thank you", "thanks",
+        "thankyou",
+    ]
+    return any(t == c or t.endswith(c) for c in closers)
+
+
+def legacy_needs_clarification_first(text: str) -> bool:
+    t = text.strip().lower()
+    if len(t) < 25:
+        generic_triggers = [
+            "hair growth", "hair products", "recommend something",
+            "recommend products", "suggest something",
+        ]
+        symptom_keywords = [
+            "dandruff", "itchy", "itching", "flaky", "hair fall", "hairfall",
+            "PCOS", "pcos", "dry scalp", "oily scalp", "split ends",
+        ]
+        if any(g in t for g in generic_triggers) and not any(
+            s in t for s in symptom_keywords
+        ):
+            return True
+    return False
+
+
+def legacy_classify(text: str):
+    return (
+        legacy_is_side_effect_question(text),
+        legacy_is_closing_message(text),
+        legacy_needs_clarification_first(text),
+    )
+
+
+def check_golden() -> int:
+    failures = 0
+    for text, *expected in GOLDEN:
+        intents = classify_intents(text)
+        got = [intents.side_effect, intents.closing, intents.needs_clarification]
+        if got != expected:
+            failures += 1
+            print(f"FAIL {text!r}: expected {expected}, got {got}")
+        legacy = list(legacy_classify(text))
+        if legacy != expected:
+            print(f"  (legacy differs on {text!r}: {legacy})")
+    return failures
+
+
+def main() -> None:
+    failures = check_golden()
+    print(f"golden cases: {len(GOLDEN) - failures}/{len(GOLDEN)} passed")
+
+    corpus = [text for text, *_ in GOLDEN]
+    number = 2000
+    new = timeit.timeit(lambda: [classify_intents(t) for t in corpus], number=number)
+    old = timeit.timeit(lambda: [legacy_classify(t) for t in corpus], number=number)
+    per_call = 1e6 / (number * len(corpus))
+    print(f"classify_intents: {new * per_call:.2f} µs/message")
+    print(f"legacy (3 scans): {old * per_call:.2f} µs/message")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+LLM gateway behaviour against the local OpenAI stub with injected faults.
+
+Each scenario runs a burst of calls through a fresh `LLMGateway` and checks
+the outcome: 429 and 5xx storms are absorbed by retries, a failing primary
+chat model falls back to the secondary one, the token bucket holds the
+configured rate, and hedging cuts the latency tail when a few requests are
+slow. Exits non-zero if any check fails.
+
+Run from `backend/`:
+
+    python -m benchmarks.bench_llm_gateway
+"""
+
+import asyncio
+import socket
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+import httpx
+
+from app.core.config import get_settings
+from app.services.llm_gateway import LLMGateway
+from benchmarks.stub_openai import serve_in_thread
+
+
+PRIMARY = "primary-model"
+FALLBACK = "fallback-model"
+MESSAGES = [{"role": "user", "content": "Product ID: 1\nProduct ID: 2\ndandruff"}]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _gateway(base_url: str, **overrides: Any) -> LLMGateway:
+    settings = get_settings().model_copy(
+        update={
+            "openai_base_url": base_url,
+            "chat_model": PRIMARY,
+            "chat_fallback_model": None,
+            "llm_rate_per_s": 0.0,
+            "llm_max_retries": 5,
+            "llm_backoff_base_s": 0.01,
+            "llm_backoff_max_s": 0.2,
+            "llm_hedge_enabled": False,
+            **overrides,
+        }
+    )
+    return LLMGateway(settings)
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def _burst(gateway: LLMGateway, n: int, concurrency: int) -> Dict[str, Any]:
+    limit = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def one() -> None:
+        nonlocal errors
+        async with limit:
+            started = time.perf_counter()
+            try:
+                await gateway.chat_completion(MESSAGES, response_format={"type": "json_object"})
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(n)))
+    elapsed = time.perf_counter() - started
+    await gateway.aclose()
+    return {
+        "elapsed": elapsed,
+        "errors": errors,
+        "p50": _percentile(latencies, 0.50),
+        "p99": _percentile(latencies, 0.99),
+        **gateway.counters,
+    }
+
+
+def main() -> None:
+    port = _free_port()
+    server = serve_in_thread(port)
+    base_url = f"http://127.0.0.1:{port}/v1"
+    stub = httpx.Client(base_url=f"http://127.0.0.1:{port}")
+    failures = 0
+
+    def check(name: str, ok: bool, result: Dict[str, Any]) -> None:
+        nonlocal failures
+        failures += not ok
+        shown = ", ".join(
+            f"{k} {v:.3f}" if isinstance(v, float) else f"{k} {v}" for k, v in result.items()
+        )
+        print(f"{'ok' if ok else 'FAIL':>4} {name}: {shown}")
+
+    storm = {"error_rate": 0.3, "error_status": 429, "retry_after": 0.01, "seed": 1}
+    stub.post("/_config", json=storm)
+    result = asyncio.run(_burst(_gateway(base_url), 200, 20))
+    check("429 storm", result["errors"] == 0 and result["retries"] > 0, result)
+
+    stub.post("/_config", json={"error_rate": 0.2, "error_status": 503, "seed": 2})
+    result = asyncio.run(_burst(_gateway(base_url), 200, 20))
+    check("503s", result["errors"] == 0 and result["retries"] > 0, result)
+
+    stub.post("/_config", json={"failing_models": [PRIMARY]})
+    gateway = _gateway(base_url, chat_fallback_model=FALLBACK, llm_max_retries=1)
+    result = asyncio.run(_burst(gateway, 50, 10))
+    check("fallback model", result["errors"] == 0 and result["fallbacks"] == 50, result)
+
+    stub.post("/_config", json={})
+    rate, burst, n = 50.0, 5, 100
+    gateway = _gateway(base_url, llm_rate_per_s=rate, llm_burst=burst)
+    result = asyncio.run(_burst(gateway, n, 50))
+    check(f"token bucket {rate:.0f}/s", result["elapsed"] >= (n - burst) / rate * 0.95, result)
+
+    # A few very slow requests (rarer than 5%, so p95 is a fast latency):
+    # hedging should cut the tail.
+    slow = {"latency_ms": 5, "slow_rate": 0.03, "slow_ms": 400, "seed": 3}
+    stub.post("/_config", json=slow)
+    plain = asyncio.run(_burst(_gateway(base_url), 400, 8))
+    stub.post("/_config", json=slow)
+    hedged = asyncio.run(_burst(_gateway(base_url, llm_hedge_enabled=True), 400, 8))
+    check("no hedging", True, {k: plain[k] for k in ("p50", "p99", "requests")})
+    check(
+        "hedging",
+        hedged["p99"] < plain["p99"] and hedged["hedges"] > 0,
+        {k: hedged[k] for k in ("p50", "p99", "requests", "hedges", "hedge_wins")},
+    )
+
+    # Sync embeddings (the indexing path) from a thread pool through 429s.
+    stub.post("/_config", json={"error_rate": 0.3, "error_status": 429, "seed": 4})
+    gateway = _gateway(base_url)
+    with ThreadPoolExecutor(8) as pool:
+        results = list(
+            pool.map(lambda i: gateway.embeddings([f"text {i}"], model="emb"), range(100))
+        )
+    check(
+        "sync embeddings",
+        len(results) == 100 and gateway.counters["failures"] == 0,
+        dict(gateway.counters),
+    )
+
+    server.should_exit = True
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
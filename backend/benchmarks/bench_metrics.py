@@ -0,0 +1,99 @@
+"""
+Cost and accuracy of the instrumentation layer (`app/core/metrics.py`).
+
+Checks that histogram quantiles stay within the bucket precision of the
+exact values on a long-tailed latency sample, and that the spans one chat
+request records cost well under 1% of a fast request (one served without a
+model call, `FAST_REQUEST_S`). Also times span recording from several
+threads at once. Exits non-zero if a check fails.
+
+Run from `backend/`:
+
+    python -m benchmarks.bench_metrics
+"""
+
+import random
+import sys
+import timeit
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.metrics import Histogram, Metrics, request_timings
+
+
+# Spans recorded by one non-streaming chat request (see Server-Timing).
+SPANS_PER_REQUEST = 12
+# A chat request answered from caches without an LLM call.
+FAST_REQUEST_S = 0.010
+MAX_OVERHEAD = 0.01
+MAX_QUANTILE_ERROR = 0.02
+
+
+def quantile_accuracy() -> bool:
+    rng = random.Random(0)
+    values = sorted(rng.lognormvariate(-4, 1.2) for _ in range(200_000))
+    histogram = Histogram()
+    for value in values:
+        histogram.record(value)
+    worst = 0.0
+    for q, estimate in histogram.quantiles((0.5, 0.9, 0.95, 0.99, 0.999)).items():
+        exact = values[int(q * len(values)) - 1]
+        error = abs(estimate - exact) / exact
+        worst = max(worst, error)
+        print(f"  p{q * 100:g}: {estimate * 1000:.3f} ms (exact {exact * 1000:.3f} ms)")
+    ok = worst <= MAX_QUANTILE_ERROR
+    print(f"{'ok' if ok else 'FAIL'} quantile error {worst:.2%}")
+    return ok
+
+
+def span_overhead() -> bool:
+    registry = Metrics()
+    number = 200_000
+
+    def one_span() -> None:
+        with registry.span("stage"):
+            pass
+
+    bare = timeit.timeit(one_span, number=number) / number
+    with request_timings():
+        in_request = timeit.timeit(one_span, number=number) / number
+    per_request = SPANS_PER_REQUEST * max(bare, in_request)
+    share = per_request / FAST_REQUEST_S
+    print(f"  span {bare * 1e6:.2f} us, inside a request {in_request * 1e6:.2f} us")
+    ok = share < MAX_OVERHEAD
+    print(
+        f"{'ok' if ok else 'FAIL'} {SPANS_PER_REQUEST} spans = {per_request * 1e6:.1f} us, "
+        f"{share:.3%} of a {FAST_REQUEST_S * 1000:.0f} ms request"
+    )
+    return ok
+
+
+def threaded_recording() -> None:
+    registry = Metrics()
+    per_thread, threads = 50_000, 8
+
+    def work(_: int) -> None:
+        for _ in range(per_thread):
+            registry.observe("stage", 0.001)
+
+    started = timeit.default_timer()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(work, range(threads)))
+    elapsed = timeit.default_timer() - started
+    count = registry.histogram("stage").count
+    print(
+        f"  {threads} threads: {count} observations, "
+        f"{elapsed / count * 1e6:.2f} us each (lost: {threads * per_thread - count})"
+    )
+
+
+def main() -> None:
+    print("quantiles")
+    ok = quantile_accuracy()
+    print("overhead")
+    ok = span_overhead() and ok
+    threaded_recording()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
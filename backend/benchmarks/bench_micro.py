@@ -0,0 +1,123 @@
+"""
+Microbenchmarks for the hot paths, comparable between commits.
+
+- `build_product_text` per product;
+- `classify_intents` per message (the golden messages of `bench_intent`);
+- `index_all_products`: a cold build (every product embedded through the
+  OpenAI stub), then an incremental no-op re-index;
+- `retrieve_candidate_products` per query (labeled queries of
+  `bench_retrieval`, embeddings already cached): vector search, BM25
+  fusion and hydration.
+
+Runs in-process against the OpenAI stub in a thread, a scratch SQLite
+database and a NumPy vector store, over the recorded Traya catalogue
+inflated to `--copies` times its size. `--output` writes the results as
+JSON.
+
+Run from `backend/`:
+
+    python -m benchmarks.bench_micro [--copies 100] [--output micro.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+import timeit
+from pathlib import Path
+from typing import Any, Dict
+
+from benchmarks.loadtest import free_port, git_commit
+from benchmarks.stub_openai import serve_in_thread
+
+
+def _configure(scratch: Path, port: int) -> None:
+    # Must run before anything imports the app settings.
+    os.environ.update(
+        DATABASE_URL=f"sqlite:///{scratch / 'micro.db'}",
+        OPENAI_API_KEY="bench",
+        OPENAI_BASE_URL=f"http://127.0.0.1:{port}/v1",
+        VECTOR_STORE_BACKEND="numpy",
+        NUMPY_STORE_PATH=str(scratch / "vector_index"),
+        EMBEDDING_CACHE_PATH=str(scratch / "embeddings.sqlite3"),
+        SEARCHAPI_API_KEY="",
+    )
+
+
+def per_call_us(func, items, repeat: int) -> float:
+    elapsed = timeit.timeit(lambda: [func(item) for item in items], number=repeat)
+    return round(elapsed / (repeat * len(items)) * 1e6, 3)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_micro")
+    parser.add_argument("--copies", type=int, default=100, help="catalogue size multiplier")
+    parser.add_argument("--output", type=Path, help="write the results as JSON")
+    args = parser.parse_args(argv)
+
+    port = free_port()
+    server = serve_in_thread(port)
+    _configure(Path(tempfile.mkdtemp(prefix="micro-")), port)
+
+    from app.db.schema import create_schema
+    from app.db.session import AsyncSessionLocal, SessionLocal, async_engine, engine
+    from app.models.product import Product
+    from app.services.intent import classify_intents
+    from app.services.prompts import build_product_text
+    from app.services.rag import index_all_products, retrieve_candidate_products
+    from benchmarks.bench_intent import GOLDEN
+    from benchmarks.bench_retrieval import LABELED, inflated, load_catalogue
+
+    create_schema(engine)
+    products = inflated(list(load_catalogue().values()), args.copies)
+    with SessionLocal() as db:
+        db.add_all(
+            Product(**{k: getattr(p, k) for k in p.__slots__ if k != "id"}) for p in products
+        )
+        db.commit()
+
+    results: Dict[str, Any] = {"products": len(products)}
+    results["build_product_text_us"] = per_call_us(build_product_text, products, repeat=20)
+    messages = [case[0] for case in GOLDEN]
+    results["classify_intents_us"] = per_call_us(classify_intents, messages, repeat=500)
+
+    with SessionLocal() as db:
+        started = time.perf_counter()
+        index_all_products(db)
+        results["index_cold_s"] = round(time.perf_counter() - started, 3)
+        started = time.perf_counter()
+        index_all_products(db)
+        results["index_noop_s"] = round(time.perf_counter() - started, 3)
+
+    queries = [query for query, _ in LABELED]
+
+    async def retrieve_all(repeat: int) -> float:
+        async with AsyncSessionLocal() as db:
+            started = time.perf_counter()
+            for _ in range(repeat):
+                for query in queries:
+                    await retrieve_candidate_products(db, query, top_k=8)
+            return time.perf_counter() - started
+
+    async def retrieval() -> float:
+        await retrieve_all(1)  # embeddings and product cache warm-up
+        elapsed = await retrieve_all(20)
+        await async_engine.dispose()
+        return elapsed
+
+    results["retrieve_candidate_products_us"] = round(
+        asyncio.run(retrieval()) / (20 * len(queries)) * 1e6, 1
+    )
+    server.should_exit = True
+
+    for name, value in results.items():
+        print(f"{name:>32}: {value}")
+    if args.output:
+        report = {"meta": {"git_commit": git_commit(), "copies": args.copies}, "results": results}
+        args.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Labeled retrieval benchmark for the BM25 index and rank fusion.
+
+Builds the catalogue from the recorded Traya feed, runs a set of labeled
+queries (exact product names, ingredients, concerns) and reports
+recall@k and MRR for BM25 alone. With `--dense` it also embeds the
+catalogue and the queries through the configured embeddings API and
+reports vector-only and fused (RRF) rankings for comparison.
+
+The lexical path is then timed per query, on the fixture catalogue and on
+a catalogue inflated to a few thousand documents.
+
+Run from `backend/`:
+
+    python -m benchmarks.bench_retrieval [--dense]
+"""
+
+import sys
+import timeit
+from typing import Dict, List, Sequence, Set
+
+import numpy as np
+
+from app.services.lexical import LexicalIndex, reciprocal_rank_fusion
+from app.services.product_cache import ProductRecord
+from app.services.render_cache import product_renders
+from app.services.structured_data import feed_products, fields_from_shopify_product, parse_json
+from benchmarks.bench_scrape_sources import FIXTURES
+
+
+TOP_K = 3
+RRF_K = 60
+# BM25 alone must reach this MRR on the labeled queries.
+MIN_LEXICAL_MRR = 0.9
+
+# (query, relevant handles)
+LABELED = [
+    ("minoxidil", {"minoxidil-5"}),
+    ("Minoxidil 5%", {"minoxidil-5"}),
+    ("Shampoo 2.0", {"shampoo-2-0"}),
+    ("Hair Ras", {"hair-ras"}),
+    ("ashwagandha capsules", {"hair-ras"}),
+    ("redensyl procapil serum", {"recap-serum"}),
+    ("onion and ginseng shampoo", {"shampoo-2-0"}),
+    ("dandruff and itchy scalp", {"defence-shampoo"}),
+    ("oil for dry scalp", {"scalp-oil"}),
+    ("male pattern hair loss on the crown", {"minoxidil-5"}),
+    ("sulphate free shampoo", {"defence-shampoo", "shampoo-2-0"}),
+    ("split ends", {"scalp-oil"}),
+    ("improve hair density", {"recap-serum"}),
+    ("hair fall from stress", {"hair-ras"}),
+]
+
+
+def load_catalogue() -> Dict[str, ProductRecord]:
+    payload = parse_json((FIXTURES / "products.json").read_text(encoding="utf-8"))
+    catalogue: Dict[str, ProductRecord] = {}
+    for pid, product in enumerate(feed_products(payload) or [], start=1):
+        fields = fields_from_shopify_product(product)
+        catalogue[product["handle"]] = ProductRecord(
+            id=pid, source_url=f"{product['handle']}", **fields
+        )
+    return catalogue
+
+
+def score(rankings: List[List[int]], relevant: List[Set[int]]) -> Dict[str, float]:
+    recall = mrr = 0.0
+    for ranking, wanted in zip(rankings, relevant):
+        recall += len(wanted.intersection(ranking[:TOP_K])) / len(wanted)
+        rank = next((i for i, pid in enumerate(ranking, start=1) if pid in wanted), None)
+        mrr += 1.0 / rank if rank else 0.0
+    return {f"recall@{TOP_K}": recall / len(rankings), "mrr": mrr / len(rankings)}
+
+
+def dense_rankings(products: Sequence[ProductRecord], queries: List[str]) -> List[List[int]]:
+    from app.services.embeddings import embed_texts
+
+    docs = np.asarray(embed_texts([product_renders.get(p).document for p in products]))
+    docs /= np.linalg.norm(docs, axis=1, keepdims=True)
+    ids = np.asarray([p.id for p in products])
+    rankings = []
+    for vector in embed_texts(queries):
+        q = np.asarray(vector) / np.linalg.norm(vector)
+        rankings.append(ids[np.argsort(-(docs @ q))].tolist())
+    return rankings
+
+
+def inflated(products: Sequence[ProductRecord], copies: int) -> List[ProductRecord]:
+    out = []
+    for n in range(copies):
+        for p in products:
+            out.append(
+                ProductRecord(
+                    id=n * 1000 + p.id,
+                    title=f"{p.title} batch{n}",
+                    price=p.price,
+                    short_description=p.short_description,
+                    long_description=p.long_description,
+                    features=p.features,
+                    image_url=p.image_url,
+                    category=p.category,
+                    source_url=f"{p.source_url}-{n}",
+                )
+            )
+    return out
+
+
+def time_search(index: LexicalIndex, queries: List[str], number: int = 200) -> float:
+    """
+    Mean microseconds per query.
+    """
+    elapsed = timeit.timeit(
+        lambda: [index.search(q, top_k=8) for q in queries], number=number
+    )
+    return elapsed / (number * len(queries)) * 1e6
+
+
+def main() -> None:
+    catalogue = load_catalogue()
+    products = list(catalogue.values())
+    queries = [q for q, _ in LABELED]
+    relevant = [{catalogue[h].id for h in handles} for _, handles in LABELED]
+
+    index = LexicalIndex()
+    index.sync(products)
+    lexical = [index.search(q, top_k=8) for q in queries]
+
+    failures = 0
+    handle_of = {p.id: h for h, p in catalogue.items()}
+    for query, ranking, wanted in zip(queries, lexical, relevant):
+        if not ranking or ranking[0] not in wanted:
+            failures += 1
+            top = handle_of.get(ranking[0]) if ranking else None
+            print(f"MISS {query!r}: top {top}")
+
+    results = {"bm25": score(lexical, relevant)}
+    if "--dense" in sys.argv[1:]:
+        dense = dense_rankings(products, queries)
+        results["dense"] = score(dense, relevant)
+        results["rrf"] = score(
+            [reciprocal_rank_fusion([d, l], k=RRF_K) for d, l in zip(dense, lexical)], relevant
+        )
+
+    print(f"{len(products)} products, {len(queries)} labeled queries")
+    for name, metrics in results.items():
+        line = ", ".join(f"{k} {v:.3f}" for k, v in metrics.items())
+        print(f"{name:>6}: {line}")
+
+    print(f"bm25 search: {time_search(index, queries):.1f} us/query ({len(index)} docs)")
+    for copies in (100, 500):
+        big = LexicalIndex()
+        big_products = inflated(products, copies)
+        build = timeit.timeit(lambda: big.sync(list(big_products)), number=1)
+        print(
+            f"bm25 search: {time_search(big, queries, number=20):.1f} us/query "
+            f"({len(big)} docs, built in {build * 1000:.0f} ms)"
+        )
+
+    if results["bm25"]["mrr"] < MIN_LEXICAL_MRR:
+        failures += 1
+        print(f"FAIL bm25 mrr below {MIN_LEXICAL_MRR}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
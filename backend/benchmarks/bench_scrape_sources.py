@@ -0,0 +1,94 @@
+"""
+Structured-data extraction against recorded Traya/Shopify fixtures.
+
+Maps every product through each scrape source the scraper knows -- the
+`/products.json` feed, `/products/<handle>.js`, the page's JSON-LD and the
+bare HTML heuristics -- checks the structured sources agree on the fields
+they carry exactly (title, price, category), and compares what each
+strategy costs in requests and bytes for the recorded catalogue.
+
+Run from `backend/`:
+
+    python -m benchmarks.bench_scrape_sources
+"""
+
+import math
+import sys
+from pathlib import Path
+
+from app.services.html_extract import extract_page_fields
+from app.services.scraper_traya import FEED_PAGE_SIZE, _fields_from_html, _fields_from_page
+from app.services.structured_data import (
+    feed_products,
+    fields_from_shopify_product,
+    parse_json,
+)
+
+
+FIXTURES = Path(__file__).parent / "fixtures" / "traya"
+
+# Expected (price, category) per handle; Hair Ras has a 1 and a 3 month
+# variant and the cheaper one is the product price.
+EXPECTED = {
+    "hair-ras": (699.0, "supplement"),
+    "defence-shampoo": (399.0, "shampoo"),
+    "recap-serum": (899.0, "serum"),
+    "scalp-oil": (349.0, "oil"),
+    "minoxidil-5": (599.0, "serum"),
+    "shampoo-2-0": (449.0, "shampoo"),
+}
+
+EXACT_FIELDS = ("title", "price", "category")
+
+
+def main() -> None:
+    feed_text = (FIXTURES / "products.json").read_text(encoding="utf-8")
+    feed = {p["handle"]: p for p in feed_products(parse_json(feed_text)) or []}
+    failures = 0
+
+    html_bytes = len((FIXTURES / "collections" / "all.html").read_bytes())
+    js_bytes = html_bytes
+    for handle, (price, category) in EXPECTED.items():
+        js_text = (FIXTURES / "products" / f"{handle}.js").read_text(encoding="utf-8")
+        page_bytes = (FIXTURES / "products" / f"{handle}.html").read_bytes()
+        html_bytes += len(page_bytes)
+        js_bytes += len(js_text.encode("utf-8"))
+        page = extract_page_fields(page_bytes.decode("utf-8"))
+
+        sources = {
+            "feed": fields_from_shopify_product(feed.get(handle)),
+            "js": fields_from_shopify_product(parse_json(js_text)),
+            "json-ld": _fields_from_page(page),
+        }
+        for name, fields in sources.items():
+            if fields is None:
+                failures += 1
+                print(f"FAIL {handle}: no product from {name}")
+                continue
+            if (fields["price"], fields["category"]) != (price, category):
+                failures += 1
+                print(f"FAIL {handle} via {name}: {fields['price']}, {fields['category']}")
+            if not fields["image_url"] or not fields["image_url"].startswith("https://"):
+                failures += 1
+                print(f"FAIL {handle} via {name}: image {fields['image_url']!r}")
+        exact = {name: tuple(f[k] for k in EXACT_FIELDS) for name, f in sources.items() if f}
+        if len(set(exact.values())) > 1:
+            failures += 1
+            print(f"FAIL {handle}: sources disagree {exact}")
+
+        legacy = _fields_from_html(page)
+        if legacy and legacy["price"] != price:
+            print(f"  (markup heuristics price {legacy['price']} for {handle})")
+
+    count = len(EXPECTED)
+    feed_requests = max(1, math.ceil(count / FEED_PAGE_SIZE))
+    print(f"{count} products, {failures} mismatches")
+    print(f"{'feed':>8}: {feed_requests:>4} requests, {len(feed_text.encode('utf-8')):>7} bytes")
+    print(f"{'.js':>8}: {count + 1:>4} requests, {js_bytes:>7} bytes")
+    print(f"{'html':>8}: {count + 1:>4} requests, {html_bytes:>7} bytes")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
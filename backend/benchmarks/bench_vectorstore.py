@@ -0,0 +1,119 @@
+"""
+Vector-store backends: exactness, query latency and import cost.
+
+Indexes the same random unit vectors (catalogue-sized, embedding-sized)
+into the NumPy and Chroma backends, checks the NumPy results equal a brute
+force ranking, reports how much of it Chroma's approximate search recovers,
+and times single and batched queries. Import time of each backend module is
+measured in a fresh interpreter (the NumPy backend's only dependency is
+numpy itself).
+
+Run from `backend/`:
+
+    python -m benchmarks.bench_vectorstore [n_products]
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from pathlib import Path
+
+import numpy as np
+
+from app.services.vectorstore_numpy import NumpyVectorStore
+
+
+DIM = 1536
+TOP_K = 8
+N_QUERIES = 32
+
+
+def import_seconds(module: str) -> float:
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, env=os.environ, check=True
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    rng = np.random.default_rng(7)
+    vectors = rng.normal(size=(n, DIM)).astype(np.float32)
+    queries = rng.normal(size=(N_QUERIES, DIM)).astype(np.float32)
+    items = [(i, f"doc {i}", {"content_hash": str(i)}) for i in range(1, n + 1)]
+
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    expected = [
+        [str(i + 1) for i in np.argsort(-(unit @ (q / np.linalg.norm(q))))[:TOP_K]]
+        for q in queries
+    ]
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        store = NumpyVectorStore(tmp, embedding_model="bench")
+        started = time.perf_counter()
+        store.upsert(items, vectors.tolist())
+        build = time.perf_counter() - started
+        got = store.query(queries.tolist(), TOP_K, None)["ids"]
+        if got != expected:
+            failures += 1
+            print("FAIL numpy results differ from brute force")
+        single = timeit.timeit(
+            lambda: store.query([queries[0].tolist()], TOP_K, None), number=200
+        ) / 200
+        batch = timeit.timeit(lambda: store.query(queries.tolist(), TOP_K, None), number=20) / 20
+        size = sum(p.stat().st_size for p in Path(tmp).glob("*.npy"))
+        print(f"{n} vectors x {DIM} dims, top {TOP_K}")
+        print(
+            f"{'numpy':>7}: build {build * 1000:7.1f} ms, query {single * 1e6:7.0f} us, "
+            f"{N_QUERIES} batched {batch * 1e6 / N_QUERIES:7.0f} us/query, "
+            f"exact, {size / 1e6:.1f} MB mapped"
+        )
+
+    try:
+        import chromadb
+    except ImportError:
+        print(f"{'chroma':>7}: not installed")
+    else:
+        client = chromadb.EphemeralClient()
+        collection = client.create_collection(
+            f"bench_{os.getpid()}", metadata={"hnsw:space": "cosine"}, embedding_function=None
+        )
+        started = time.perf_counter()
+        collection.upsert(
+            ids=[str(pid) for pid, _, _ in items],
+            embeddings=vectors.tolist(),
+            metadatas=[meta for _, _, meta in items],
+        )
+        build = time.perf_counter() - started
+        result = collection.query(query_embeddings=queries.tolist(), n_results=TOP_K)["ids"]
+        recall = np.mean([len(set(r) & set(e)) / TOP_K for r, e in zip(result, expected)])
+        single = timeit.timeit(
+            lambda: collection.query(query_embeddings=[queries[0].tolist()], n_results=TOP_K),
+            number=50,
+        ) / 50
+        batch = timeit.timeit(
+            lambda: collection.query(query_embeddings=queries.tolist(), n_results=TOP_K),
+            number=5,
+        ) / 5
+        print(
+            f"{'chroma':>7}: build {build * 1000:7.1f} ms, query {single * 1e6:7.0f} us, "
+            f"{N_QUERIES} batched {batch * 1e6 / N_QUERIES:7.0f} us/query, "
+            f"recall@{TOP_K} {recall:.3f}"
+        )
+
+    for module in ("numpy", "chromadb"):
+        try:
+            print(f"import {module}: {import_seconds(module) * 1000:.0f} ms")
+        except subprocess.CalledProcessError:
+            print(f"import {module}: failed")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
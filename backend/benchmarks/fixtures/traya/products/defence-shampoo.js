@@ -0,0 +1 @@
+{"id": 7002, "title": "Defence Shampoo", "handle": "defence-shampoo", "description": "<p>Defence Shampoo gently cleanses the scalp and controls dandruff-causing fungus without stripping natural oils.</p><p>Use 2-3 times a week. Massage into wet scalp, leave for 2 minutes and rinse.</p><p>Free from sulphates &amp; parabens. Safe for colour-treated hair.</p><ul><li>Controls dandruff &amp; itchy scalp</li><li>Sulphate free</li><li>Keeps scalp pH balanced</li></ul>", "published_at": "2024-06-01T10:00:00+05:30", "created_at": "2024-06-01T10:00:00+05:30", "vendor": "Traya", "type": "Shampoo", "tags": ["shampoo", "dandruff", "scalp"], "price": 39900, "price_min": 39900, "price_max": 39900, "available": true, "price_varies": false, "compare_at_price": null, "variants": [{"id": 700201, "title": "Default Title", "option1": "Default Title", "option2": null, "option3": null, "sku": "TR-700201", "requires_shipping": true, "taxable": true, "featured_image": null, "available": true, "name": "Defence Shampoo - Default Title", "public_title": null, "options": ["Default Title"], "price": 39900, "compare_at_price": null}], "images": ["//traya.health/cdn/shop/files/defence-shampoo.jpg?v=1700000000"], "featured_image": "//traya.health/cdn/shop/files/defence-shampoo.jpg?v=1700000000", "url": "/products/defence-shampoo"}
\ No newline at end of file
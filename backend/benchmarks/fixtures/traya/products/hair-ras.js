@@ -0,0 +1 @@
+{"id": 7001, "title": "Hair Ras", "handle": "hair-ras", "description": "<p>Hair Ras is a blend of 11 Ayurvedic herbs including Bhringraj, Ashwagandha and Amla that work on the root causes of hair fall.</p><p>Take 2 capsules a day after meals. Visible reduction in hair fall in 3-5 months when used as part of a Traya hair plan.</p><p>Suitable for men and women. Consult your doctor if you are pregnant, breastfeeding or on medication.</p><ul><li>Reduces hair fall caused by stress and poor digestion</li><li>Improves hair strength and thickness</li><li>Balances Pitta dosha</li><li>100% natural capsules</li></ul>", "published_at": "2024-06-01T10:00:00+05:30", "created_at": "2024-06-01T10:00:00+05:30", "vendor": "Traya", "type": "Supplement", "tags": ["ayurveda", "hair fall", "supplement"], "price": 69900, "price_min": 69900, "price_max": 189900, "available": true, "price_varies": true, "compare_at_price": 79900, "variants": [{"id": 700101, "title": "1 Month", "option1": "1 Month", "option2": null, "option3": null, "sku": "TR-700101", "requires_shipping": true, "taxable": true, "featured_image": null, "available": true, "name": "Hair Ras - 1 Month", "public_title": "1 Month", "options": ["1 Month"], "price": 69900, "compare_at_price": 79900}, {"id": 700102, "title": "3 Months", "option1": "3 Months", "option2": null, "option3": null, "sku": "TR-700102", "requires_shipping": true, "taxable": true, "featured_image": null, "available": true, "name": "Hair Ras - 3 Months", "public_title": "3 Months", "options": ["3 Months"], "price": 189900, "compare_at_price": 239700}], "images": ["//traya.health/cdn/shop/files/hair-ras.jpg?v=1700000000"], "featured_image": "//traya.health/cdn/shop/files/hair-ras.jpg?v=1700000000", "url": "/products/hair-ras"}
\ No newline at end of file
@@ -0,0 +1 @@
+{"id": 7005, "title": "Minoxidil 5% Topical Solution", "handle": "minoxidil-5", "description": "<p>Minoxidil 5% is an FDA approved topical solution for male pattern hair loss.</p><p>Use only as prescribed by your Traya doctor. Apply 1 ml twice a day to the affected area of a dry scalp.</p><p>Not recommended for women who are pregnant or breastfeeding. Consult your doctor if you have heart disease or blood pressure issues.</p><ul><li>Regrows hair on the crown</li><li>Prolongs the growth phase</li><li>Clinically proven</li></ul>", "published_at": "2024-06-01T10:00:00+05:30", "created_at": "2024-06-01T10:00:00+05:30", "vendor": "Traya", "type": "Serum", "tags": ["minoxidil", "hair regrowth", "serum"], "price": 59900, "price_min": 59900, "price_max": 59900, "available": true, "price_varies": false, "compare_at_price": null, "variants": [{"id": 700501, "title": "Default Title", "option1": "Default Title", "option2": null, "option3": null, "sku": "TR-700501", "requires_shipping": true, "taxable": true, "featured_image": null, "available": true, "name": "Minoxidil 5% Topical Solution - Default Title", "public_title": null, "options": ["Default Title"], "price": 59900, "compare_at_price": null}], "images": ["//traya.health/cdn/shop/files/minoxidil-5.jpg?v=1700000000"], "featured_image": "//traya.health/cdn/shop/files/minoxidil-5.jpg?v=1700000000", "url": "/products/minoxidil-5"}
\ No newline at end of file
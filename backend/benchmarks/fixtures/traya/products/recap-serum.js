@@ -0,0 +1 @@
+{"id": 7003, "title": "Recap Serum", "handle": "recap-serum", "description": "<p>Recap Serum combines Redensyl, Procapil and Capilia Longa to support follicles in the growth phase.</p><p>Apply 1 ml on a dry scalp at night &amp; massage for 2 minutes. Do not rinse.</p><p>Non-sticky, lightweight serum for daily use.</p><ul><li>Supports new hair growth</li><li>Improves hair density</li><li>Non sticky formula</li><li>Dermatologically tested</li></ul>", "published_at": "2024-06-01T10:00:00+05:30", "created_at": "2024-06-01T10:00:00+05:30", "vendor": "Traya", "type": "Serum", "tags": ["serum", "hair growth", "density"], "price": 89900, "price_min": 89900, "price_max": 89900, "available": true, "price_varies": false, "compare_at_price": 99900, "variants": [{"id": 700301, "title": "Default Title", "option1": "Default Title", "option2": null, "option3": null, "sku": "TR-700301", "requires_shipping": true, "taxable": true, "featured_image": null, "available": true, "name": "Recap Serum - Default Title", "public_title": null, "options": ["Default Title"], "price": 89900, "compare_at_price": 99900}], "images": ["//traya.health/cdn/shop/files/recap-serum.jpg?v=1700000000"], "featured_image": "//traya.health/cdn/shop/files/recap-serum.jpg?v=1700000000", "url": "/products/recap-serum"}
\ No newline at end of file
@@ -0,0 +1 @@
+{"id": 7004, "title": "Scalp Oil", "handle": "scalp-oil", "description": "<p>A light Ayurvedic oil cooked with 13 herbs that nourishes dry scalp and strengthens hair roots.</p><p>Massage into the scalp 2 hours before washing, 2-3 times a week.</p><ul><li>Nourishes dry scalp</li><li>Strengthens roots</li><li>Reduces split ends</li></ul>", "published_at": "2024-06-01T10:00:00+05:30", "created_at": "2024-06-01T10:00:00+05:30", "vendor": "Traya", "type": "Oil", "tags": ["oil", "scalp", "nourishment"], "price": 34900, "price_min": 34900, "price_max": 34900, "available": true, "price_varies": false, "compare_at_price": null, "variants": [{"id": 700401, "title": "Default Title", "option1": "Default Title", "option2": null, "option3": null, "sku": "TR-700401", "requires_shipping": true, "taxable": true, "featured_image": null, "available": true, "name": "Scalp Oil - Default Title", "public_title": null, "options": ["Default Title"], "price": 34900, "compare_at_price": null}], "images": ["//traya.health/cdn/shop/files/scalp-oil.jpg?v=1700000000"], "featured_image": "//traya.health/cdn/shop/files/scalp-oil.jpg?v=1700000000", "url": "/products/scalp-oil"}
\ No newline at end of file
@@ -0,0 +1 @@
+{"id": 7006, "title": "Shampoo 2.0", "handle": "shampoo-2-0", "description": "<p>Shampoo 2.0 is a mild cleanser enriched with onion and ginseng that supports hair growth while keeping the scalp clean.</p><p>Suitable for daily use on all hair types.</p><ul><li>Gentle daily cleansing</li><li>Onion &amp; Ginseng for stronger hair</li><li>Sulphate free</li></ul>", "published_at": "2024-06-01T10:00:00+05:30", "created_at": "2024-06-01T10:00:00+05:30", "vendor": "Traya", "type": "Shampoo", "tags": ["shampoo", "hair fall", "gentle"], "price": 44900, "price_min": 44900, "price_max": 44900, "available": true, "price_varies": false, "compare_at_price": 49900, "variants": [{"id": 700601, "title": "Default Title", "option1": "Default Title", "option2": null, "option3": null, "sku": "TR-700601", "requires_shipping": true, "taxable": true, "featured_image": null, "available": true, "name": "Shampoo 2.0 - Default Title", "public_title": null, "options": ["Default Title"], "price": 44900, "compare_at_price": 49900}], "images": ["//traya.health/cdn/shop/files/shampoo-2-0.jpg?v=1700000000"], "featured_image": "//traya.health/cdn/shop/files/shampoo-2-0.jpg?v=1700000000", "url": "/products/shampoo-2-0"}
\ No newline at end of file
@@ -0,0 +1,558 @@
+"""
+Load test for the FastAPI app against local stand-ins for every upstream.
+
+Starts the OpenAI stub (`stub_openai`, with a configurable time to first
+token and generation speed), the SearchApi stub and the static Traya site
+as subprocesses, then the app under uvicorn (`--workers N`), or gunicorn
+with `gunicorn.conf.py` (`--server gunicorn`, preloaded master), in a
+scratch directory (SQLite database, vector index, caches). It scrapes and
+indexes the stub catalogue through the admin jobs API, checks that every
+worker serves the new catalogue version, and replays a query corpus -- one
+JSON object per line, in the `python -m app.cli chat-batch` input format;
+`fixtures/chat_queries.jsonl` by default -- at each concurrency level,
+spread over the chat and product endpoints by `--mix`.
+
+For every level it reports throughput, p50/p95/p99 per endpoint, p50/p95/
+p99 per pipeline stage (from the `Server-Timing` headers of `/chat`
+responses, so all workers are covered) and the memory of each worker: RSS,
+and PSS, which splits pages shared between processes (the preloaded
+copy-on-write state, mapped files) among them. With `--background-jobs`
+every level runs against a catalogue that keeps growing: scrape and
+index-build jobs run back to back during the level, so their effect on
+chat latency shows up in a comparison with a run without the flag.
+`--output` writes the report as JSON; `--compare` prints the change
+against an earlier report, e.g. one taken on the previous commit.
+
+Run from `backend/`:
+
+    python -m benchmarks.loadtest --concurrency 1,8,32 --requests 300 \\
+        --output after.json --compare before.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+
+BACKEND = Path(__file__).resolve().parent.parent
+DEFAULT_CORPUS = Path(__file__).parent / "fixtures" / "chat_queries.jsonl"
+DEFAULT_MIX = "chat=6,stream=2,products=1,product=1"
+_TEXT_KEYS = ("query", "content", "message", "body")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    """
+    Nearest-rank p50/p95/p99 of `values` (seconds), in milliseconds.
+    """
+    if not values:
+        return {}
+    ordered = sorted(values)
+    return {
+        f"p{q}_ms": round(ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))] * 1000, 3)
+        for q in (50, 95, 99)
+    }
+
+
+def load_corpus(path: Path) -> List[List[Dict[str, Any]]]:
+    conversations = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        if "messages" in record:
+            conversations.append(record["messages"])
+        else:
+            text = next(record[k] for k in _TEXT_KEYS if isinstance(record.get(k), str))
+            conversations.append([{"role": "user", "content": text}])
+    return conversations
+
+
+def parse_mix(spec: str) -> List[str]:
+    endpoints = []
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        endpoints += [name.strip()] * int(weight or 1)
+    return endpoints
+
+
+def parse_server_timing(header: Optional[str]) -> Dict[str, float]:
+    stages: Dict[str, float] = {}
+    for entry in (header or "").split(","):
+        name, _, params = entry.strip().partition(";")
+        if name and params.startswith("dur="):
+            stages[name] = float(params[4:]) / 1000
+    return stages
+
+
+# -- processes -----------------------------------------------------------------
+
+
+def spawn(args: List[str], env: Dict[str, str], log: Path) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, *args],
+        cwd=BACKEND,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=log.open("w"),
+    )
+
+
+def wait_ready(url: str, process: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"{process.args} exited with {process.returncode}")
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise SystemExit(f"{url} not ready after {timeout:.0f}s")
+
+
+def worker_pids(master: int) -> List[int]:
+    """
+    Pids of the workers under `master` (the master itself when it serves
+    requests, i.e. uvicorn with one worker).
+    """
+    children = []
+    for entry in Path("/proc").iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / "stat").read_text()
+            cmdline = (entry / "cmdline").read_bytes()
+        except OSError:
+            continue
+        ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        if ppid == master and b"resource_tracker" not in cmdline:
+            children.append(int(entry.name))
+    return sorted(children) or [master]
+
+
+def _proc_kb(path: str, field: str) -> Optional[float]:
+    try:
+        for line in Path(path).read_text().splitlines():
+            if line.startswith(field):
+                return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def rss_mb(pid: int) -> Optional[float]:
+    return _proc_kb(f"/proc/{pid}/status", "VmRSS:")
+
+
+def pss_mb(pid: int) -> Optional[float]:
+    return _proc_kb(f"/proc/{pid}/smaps_rollup", "Pss:")
+
+
+def check_catalogue_version(base_url: str, workers: int, settle_s: float = 1.0) -> str:
+    """
+    After a scrape or index build served by one worker, every worker must
+    serve the new catalogue (same `/products` ETag) once the version file
+    has been re-read.
+    """
+    time.sleep(settle_s)
+    etags = {
+        httpx.get(f"{base_url}/products/?limit=1").headers.get("etag")
+        for _ in range(8 * workers)
+    }
+    if len(etags) != 1:
+        raise SystemExit(f"workers disagree on the catalogue version: {sorted(map(str, etags))}")
+    return etags.pop()
+
+
+# -- admin jobs ------------------------------------------------------------------
+
+
+def run_job(
+    client: httpx.Client, path: str, timeout: float = 600.0, **params: Any
+) -> Dict[str, Any]:
+    """
+    Start an admin job and poll `/admin/jobs/{id}` until it finishes; exits
+    if it doesn't succeed.
+    """
+    response = client.post(path, params=params)
+    response.raise_for_status()
+    job = response.json()
+    deadline = time.monotonic() + timeout
+    while job["status"] in ("queued", "running"):
+        if time.monotonic() > deadline:
+            raise SystemExit(f"{path} job {job['id']} still {job['status']} after {timeout:.0f}s")
+        time.sleep(0.2)
+        job = client.get(f"/admin/jobs/{job['id']}").raise_for_status().json()
+    if job["status"] != "succeeded":
+        raise SystemExit(f"{path} job {job['id']} {job['status']}: {job.get('error')}")
+    return job
+
+
+class BackgroundJobs:
+    """
+    Scrape and index-build jobs run back to back in a thread, each scrape
+    against a larger stub catalogue, until `stop`.
+    """
+
+    def __init__(self, base_url: str, traya_url: str, copies: int) -> None:
+        self.base_url = base_url
+        self.traya_url = traya_url
+        self.copies = copies
+        self.finished: List[Dict[str, Any]] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+
+    def __enter__(self) -> "BackgroundJobs":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _loop(self) -> None:
+        with httpx.Client(base_url=self.base_url, timeout=60.0) as client:
+            while not self._stop.is_set():
+                self.copies += 25
+                httpx.post(f"{self.traya_url}/_config", json={"copies": self.copies})
+                for path, params in (
+                    ("/admin/scrape-traya", {"limit": 1000}),
+                    ("/admin/build-index", {}),
+                ):
+                    started = time.perf_counter()
+                    job = run_job(client, path, **params)
+                    self.finished.append(
+                        {
+                            "kind": job["kind"],
+                            "seconds": round(time.perf_counter() - started, 2),
+                            "progress": job["progress"],
+                        }
+                    )
+
+
+# -- load ------------------------------------------------------------------------
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.stages: Dict[str, List[float]] = {}
+
+    def record(self, endpoint: str, seconds: float, ok: bool) -> None:
+        self.latencies.setdefault(endpoint, []).append(seconds)
+        if not ok:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        total = sum(len(v) for k, v in self.latencies.items() if not k.endswith(" ttft"))
+        return {
+            "requests": total,
+            "elapsed_s": round(elapsed, 3),
+            "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+            "endpoints": {
+                name: {
+                    "count": len(values),
+                    "errors": self.errors.get(name, 0),
+                    **percentiles(values),
+                }
+                for name, values in sorted(self.latencies.items())
+            },
+            "stages": {name: percentiles(values) for name, values in sorted(self.stages.items())},
+        }
+
+
+async def _request(
+    client: httpx.AsyncClient,
+    endpoint: str,
+    messages: List[Dict[str, Any]],
+    product_id: int,
+    recorder: Recorder,
+) -> None:
+    started = time.perf_counter()
+    if endpoint == "chat":
+        response = await client.post("/chat/", json={"messages": messages})
+        recorder.record("POST /chat", time.perf_counter() - started, response.is_success)
+        for stage, seconds in parse_server_timing(response.headers.get("server-timing")).items():
+            recorder.stages.setdefault(stage, []).append(seconds)
+    elif endpoint == "stream":
+        first_token: Optional[float] = None
+        async with client.stream("POST", "/chat/stream", json={"messages": messages}) as response:
+            async for line in response.aiter_lines():
+                if first_token is None and line.startswith("event: token"):
+                    first_token = time.perf_counter() - started
+            ok = response.is_success
+        recorder.record("POST /chat/stream", time.perf_counter() - started, ok)
+        if first_token is not None:
+            recorder.record("POST /chat/stream ttft", first_token, True)
+    elif endpoint == "products":
+        response = await client.get("/products/", params={"fields": "id,title,price,image_url"})
+        recorder.record("GET /products", time.perf_counter() - started, response.is_success)
+    elif endpoint == "product":
+        response = await client.get(f"/products/{product_id}")
+        recorder.record("GET /products/{id}", time.perf_counter() - started, response.is_success)
+    else:
+        raise SystemExit(f"unknown endpoint in --mix: {endpoint}")
+
+
+async def run_level(
+    base_url: str,
+    corpus: List[List[Dict[str, Any]]],
+    plan: List[str],
+    product_ids: List[int],
+    concurrency: int,
+    total: int,
+) -> Dict[str, Any]:
+    recorder = Recorder()
+    next_index = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=120.0, limits=limits) as client:
+
+        async def user() -> None:
+            nonlocal next_index
+            while next_index < total:
+                i = next_index
+                next_index += 1
+                try:
+                    await _request(
+                        client,
+                        plan[i % len(plan)],
+                        corpus[i % len(corpus)],
+                        product_ids[i % len(product_ids)],
+                        recorder,
+                    )
+                except httpx.HTTPError:
+                    recorder.record(plan[i % len(plan)], 0.0, False)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return {"concurrency": concurrency, **recorder.report(elapsed)}
+
+
+# -- report ---------------------------------------------------------------------
+
+
+def print_level(level: Dict[str, Any]) -> None:
+    print(
+        f"\nconcurrency {level['concurrency']}: {level['requests']} requests, "
+        f"{level['throughput_rps']} req/s, worker RSS {level['memory_mb']} MB, "
+        f"PSS {level['pss_mb']} MB"
+    )
+    for job in level.get("background_jobs", []):
+        print(f"  background {job['kind']:<12} {job['seconds']:>6.2f} s  {job['progress']}")
+    for name, row in level["endpoints"].items():
+        print(
+            f"  {name:<24} n={row['count']:<5} err={row['errors']:<3} "
+            f"p50 {row.get('p50_ms', 0):>8.1f}  p95 {row.get('p95_ms', 0):>8.1f}  "
+            f"p99 {row.get('p99_ms', 0):>8.1f} ms"
+        )
+    for name, row in level["stages"].items():
+        print(
+            f"    {name:<22} p50 {row['p50_ms']:>8.2f}  p95 {row['p95_ms']:>8.2f}  "
+            f"p99 {row['p99_ms']:>8.2f} ms"
+        )
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    def change(new: Optional[float], old: Optional[float]) -> str:
+        if not new or not old:
+            return "   n/a"
+        return f"{(new - old) / old:+6.1%}"
+
+    print(f"\nvs {baseline['meta'].get('git_commit') or 'baseline'}:")
+    old_levels = {level["concurrency"]: level for level in baseline["levels"]}
+    for level in report["levels"]:
+        old = old_levels.get(level["concurrency"])
+        if old is None:
+            continue
+        print(
+            f"  concurrency {level['concurrency']}: throughput "
+            f"{change(level['throughput_rps'], old['throughput_rps'])}"
+        )
+        for name, row in level["endpoints"].items():
+            before = old["endpoints"].get(name, {})
+            print(
+                f"    {name:<24} p50 {change(row.get('p50_ms'), before.get('p50_ms'))}  "
+                f"p95 {change(row.get('p95_ms'), before.get('p95_ms'))}  "
+                f"p99 {change(row.get('p99_ms'), before.get('p99_ms'))}"
+            )
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BACKEND,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.loadtest")
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated levels")
+    parser.add_argument("--requests", type=int, default=200, help="requests per level")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes")
+    parser.add_argument("--server", default="uvicorn", choices=("uvicorn", "gunicorn"))
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="endpoint weights")
+    parser.add_argument("--vector-store", default="numpy", choices=("numpy", "chroma"))
+    parser.add_argument("--llm-latency-ms", type=float, default=150.0, help="time to first token")
+    parser.add_argument("--tokens-per-s", type=float, default=400.0, help="stub generation speed")
+    parser.add_argument("--search-latency-ms", type=float, default=200.0)
+    parser.add_argument("--answer-cache", action="store_true", help="enable the answer cache")
+    parser.add_argument(
+        "--background-jobs", action="store_true", help="scrape and re-index during every level"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="write the JSON report here")
+    parser.add_argument("--compare", type=Path, help="earlier JSON report to diff against")
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus(args.corpus)
+    plan = parse_mix(args.mix)
+    random.Random(args.seed).shuffle(plan)
+    levels = [int(c) for c in args.concurrency.split(",")]
+
+    scratch = Path(tempfile.mkdtemp(prefix="loadtest-"))
+    ports = {name: free_port() for name in ("openai", "searchapi", "traya", "app")}
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{scratch / 'bench.db'}",
+        "OPENAI_API_KEY": "bench",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{ports['openai']}/v1",
+        "SEARCHAPI_API_KEY": "bench",
+        "SEARCHAPI_BASE_URL": f"http://127.0.0.1:{ports['searchapi']}/api/v1/search",
+        "TRAYA_BASE_URL": f"http://127.0.0.1:{ports['traya']}",
+        "VECTOR_STORE_BACKEND": args.vector_store,
+        "CHROMA_PATH": str(scratch / "chroma"),
+        "NUMPY_STORE_PATH": str(scratch / "vector_index"),
+        "EMBEDDING_CACHE_PATH": str(scratch / "embeddings.sqlite3"),
+        "ANSWER_CACHE_ENABLED": "true" if args.answer_cache else "false",
+    }
+
+    processes: List[subprocess.Popen] = []
+    try:
+        for name, module in (
+            ("openai", "benchmarks.stub_openai"),
+            ("searchapi", "benchmarks.stub_searchapi"),
+            ("traya", "benchmarks.stub_traya"),
+        ):
+            process = spawn(
+                ["-m", module, "--port", str(ports[name])], env, scratch / f"{name}.log"
+            )
+            processes.append(process)
+            wait_ready(f"http://127.0.0.1:{ports[name]}/_stats", process)
+        stub_config: Dict[str, Any] = {
+            "openai": {"latency_ms": args.llm_latency_ms, "tokens_per_s": args.tokens_per_s},
+            "searchapi": {"latency_ms": args.search_latency_ms},
+        }
+        for name, body in stub_config.items():
+            httpx.post(f"http://127.0.0.1:{ports[name]}/_config", json=body).raise_for_status()
+
+        if args.server == "gunicorn":
+            command = ["-m", "gunicorn", "app.main:app", "-c", str(BACKEND / "gunicorn.conf.py")]
+            env.update(BIND=f"127.0.0.1:{ports['app']}", WEB_CONCURRENCY=str(args.workers))
+        else:
+            command = [
+                "-m", "uvicorn", "app.main:app",
+                "--host", "127.0.0.1", "--port", str(ports["app"]),
+                "--workers", str(args.workers), "--log-level", "warning",
+            ]
+        env["CATALOGUE_VERSION_PATH"] = str(scratch / "catalogue_version")
+        app = spawn(command, env, scratch / "app.log")
+        processes.append(app)
+        base_url = f"http://127.0.0.1:{ports['app']}"
+        wait_ready(f"{base_url}/products/", app)
+
+        with httpx.Client(base_url=base_url, timeout=300.0) as client:
+            run_job(client, "/admin/scrape-traya")
+            run_job(client, "/admin/build-index")
+            product_ids = [p["id"] for p in client.get("/products/").json()["items"]]
+        if not product_ids:
+            raise SystemExit("the stub catalogue was not scraped; see " + str(scratch))
+        check_catalogue_version(base_url, args.workers)
+
+        # One unmeasured pass so every worker has loaded its caches.
+        asyncio.run(
+            run_level(base_url, corpus, ["chat"], product_ids, args.workers, len(corpus))
+        )
+        report: Dict[str, Any] = {
+            "meta": {
+                "git_commit": git_commit(),
+                "python": platform.python_version(),
+                "workers": args.workers,
+                "server": args.server,
+                "vector_store": args.vector_store,
+                "corpus": str(args.corpus),
+                "mix": args.mix,
+                "requests_per_level": args.requests,
+                "stubs": stub_config,
+                "answer_cache": args.answer_cache,
+                "background_jobs": args.background_jobs,
+            },
+            "levels": [],
+        }
+        copies = 1
+        for concurrency in levels:
+            if args.background_jobs:
+                traya_url = f"http://127.0.0.1:{ports['traya']}"
+                with BackgroundJobs(base_url, traya_url, copies) as background:
+                    level = asyncio.run(
+                        run_level(base_url, corpus, plan, product_ids, concurrency, args.requests)
+                    )
+                copies = background.copies
+                level["background_jobs"] = background.finished
+            else:
+                level = asyncio.run(
+                    run_level(base_url, corpus, plan, product_ids, concurrency, args.requests)
+                )
+            pids = worker_pids(app.pid)
+            level["memory_mb"] = [rss_mb(pid) for pid in pids]
+            level["pss_mb"] = [pss_mb(pid) for pid in pids]
+            report["levels"].append(level)
+            print_level(level)
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    if args.compare:
+        compare(report, json.loads(args.compare.read_text(encoding="utf-8")))
+    failed = sum(row["errors"] for level in report["levels"] for row in level["endpoints"].values())
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+Local OpenAI-compatible stub for benchmarks and gateway checks.
+
+Serves `/v1/embeddings` (deterministic hashed bag-of-words vectors, so
+similar texts get similar vectors) and `/v1/chat/completions` (a JSON
+answer recommending the first product ids in the prompt, streamed or not).
+Latency, generation speed and failures are injected through `POST /_config`:
+
+    {"latency_ms": 20, "slow_rate": 0.05, "slow_ms": 800, "tokens_per_s": 200,
+     "error_rate": 0.2, "error_status": 429, "retry_after": 0.05,
+     "failing_models": ["llama-3.1-8b-instant"], "seed": 1}
+
+`latency_ms` is the time to the first token; with `tokens_per_s` set, chat
+answers then take as long as generating their completion tokens would.
+
+`GET /_stats` returns request counts by endpoint, model and status.
+
+Run standalone from `backend/`:
+
+    python -m benchmarks.stub_openai --port 8765
+
+or start it in a background thread with `serve_in_thread(port)`.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List
+
+import uvicorn
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.requests import ClientDisconnect
+
+
+DEFAULT_CONFIG: Dict[str, Any] = {
+    "latency_ms": 0.0,
+    "slow_rate": 0.0,
+    "slow_ms": 0.0,
+    "tokens_per_s": 0.0,
+    "error_rate": 0.0,
+    "error_status": 429,
+    "retry_after": None,
+    "failing_models": [],
+    "embedding_dim": 256,
+    "seed": 0,
+}
+
+app = FastAPI()
+config: Dict[str, Any] = dict(DEFAULT_CONFIG)
+stats: Counter = Counter()
+_rng = random.Random(0)
+
+
+def _vector(text: str, dim: int) -> List[float]:
+    vector = [0.0] * dim
+    for word in re.findall(r"[a-z0-9]+", text.lower()):
+        digest = int(hashlib.md5(word.encode()).hexdigest(), 16)
+        vector[digest % dim] += 1.0 if digest & 1 else -1.0
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+async def _fault(endpoint: str, model: str):
+    """
+    Sleep the configured latency; return an error response to send, if any.
+    """
+    delay = config["latency_ms"]
+    if config["slow_rate"] and _rng.random() < config["slow_rate"]:
+        delay = config["slow_ms"]
+    if delay:
+        await asyncio.sleep(delay / 1000)
+
+    status = None
+    if model in config["failing_models"]:
+        status = 500
+    elif config["error_rate"] and _rng.random() < config["error_rate"]:
+        status = config["error_status"]
+    stats[f"{endpoint} {model} {status or 200}"] += 1
+    if status is None:
+        return None
+    headers = {}
+    if status == 429 and config["retry_after"] is not None:
+        headers["retry-after-ms"] = str(int(config["retry_after"] * 1000))
+    body = {"error": {"message": f"stub {status}", "type": "stub_error", "code": status}}
+    return JSONResponse(body, status_code=status, headers=headers)
+
+
+async def _body(request: Request) -> Any:
+    # Hedged and cancelled requests hang up before their body is read.
+    try:
+        return await request.json()
+    except ClientDisconnect:
+        return None
+
+
+@app.post("/_config")
+async def set_config(request: Request) -> Dict[str, Any]:
+    global _rng
+    config.clear()
+    config.update(DEFAULT_CONFIG)
+    config.update(await request.json())
+    _rng = random.Random(config["seed"])
+    stats.clear()
+    return config
+
+
+@app.get("/_stats")
+async def get_stats() -> Dict[str, int]:
+    return dict(stats)
+
+
+@app.post("/v1/embeddings")
+async def embeddings(request: Request):
+    body = await _body(request)
+    if body is None:
+        return Response(status_code=499)
+    error = await _fault("embeddings", body["model"])
+    if error is not None:
+        return error
+    inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+    dim = config["embedding_dim"]
+    return {
+        "object": "list",
+        "model": body["model"],
+        "data": [
+            {"object": "embedding", "index": i, "embedding": _vector(text, dim)}
+            for i, text in enumerate(inputs)
+        ],
+        "usage": {"prompt_tokens": len(inputs), "total_tokens": len(inputs)},
+    }
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await _body(request)
+    if body is None:
+        return Response(status_code=499)
+    error = await _fault("chat", body["model"])
+    if error is not None:
+        return error
+    prompt = body["messages"][-1]["content"]
+    ids = re.findall(r"Product ID: (\d+)", prompt)[:3]
+    content = json.dumps(
+        {
+            "reply": "Based on your concerns, here are some Traya products that can help.",
+            "recommendations": [
+                {"product_id": int(i), "reason": "matches your concern"} for i in ids
+            ],
+        }
+    )
+    usage = {
+        "prompt_tokens": len(prompt) // 4,
+        "completion_tokens": len(content) // 4,
+        "total_tokens": (len(prompt) + len(content)) // 4,
+    }
+    created = int(time.time())
+
+    rate = config["tokens_per_s"]
+
+    if body.get("stream"):
+
+        async def chunks():
+            for start in range(0, len(content), 8):
+                if rate:
+                    await asyncio.sleep(2 / rate)  # ~2 tokens per 8-character chunk
+                chunk = {
+                    "id": "stub",
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": body["model"],
+                    "choices": [
+                        {
+                            "index": 0,
+                            "delta": {"content": content[start : start + 8]},
+                            "finish_reason": None,
+                        }
+                    ],
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+
+    if rate:
+        await asyncio.sleep(usage["completion_tokens"] / rate)
+    return {
+        "id": "stub",
+        "object": "chat.completion",
+        "created": created,
+        "model": body["model"],
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": usage,
+    }
+
+
+def serve_in_thread(port: int, target: FastAPI = app) -> uvicorn.Server:
+    """
+    Start `target` on 127.0.0.1:`port` in a daemon thread; returns once it
+    accepts connections. Stop it with `server.should_exit = True`.
+    """
+    server = uvicorn.Server(
+        uvicorn.Config(target, host="127.0.0.1", port=port, log_level="warning", lifespan="off")
+    )
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    uvicorn.run(app, host="127.0.0.1", port=parser.parse_args().port, log_level="warning")
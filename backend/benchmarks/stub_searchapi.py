@@ -0,0 +1,76 @@
+"""
+Local SearchApi.io (DuckDuckGo engine) stub for benchmarks.
+
+`GET /api/v1/search?engine=duckduckgo&q=...` answers with a few organic
+results whose snippets echo the query, after `latency_ms` (set through
+`POST /_config`, e.g. `{"latency_ms": 300, "empty_rate": 0.2}`; a share of
+`empty_rate` queries get no results). `GET /_stats` counts the searches.
+
+Point the app at it with `SEARCHAPI_BASE_URL=http://127.0.0.1:<port>/api/v1/search`
+and any `SEARCHAPI_API_KEY`. Run standalone from `backend/`:
+
+    python -m benchmarks.stub_searchapi --port 8766
+"""
+
+import argparse
+import asyncio
+import random
+from collections import Counter
+from typing import Any, Dict
+
+import uvicorn
+from fastapi import FastAPI, Request
+
+
+DEFAULT_CONFIG: Dict[str, Any] = {"latency_ms": 0.0, "empty_rate": 0.0, "seed": 0}
+
+app = FastAPI()
+config: Dict[str, Any] = dict(DEFAULT_CONFIG)
+stats: Counter = Counter()
+_rng = random.Random(0)
+
+
+@app.post("/_config")
+async def set_config(request: Request) -> Dict[str, Any]:
+    global _rng
+    config.clear()
+    config.update(DEFAULT_CONFIG)
+    config.update(await request.json())
+    _rng = random.Random(config["seed"])
+    stats.clear()
+    return config
+
+
+@app.get("/_stats")
+async def get_stats() -> Dict[str, int]:
+    return dict(stats)
+
+
+@app.get("/api/v1/search")
+async def search(q: str = "", engine: str = "duckduckgo") -> Dict[str, Any]:
+    if config["latency_ms"]:
+        await asyncio.sleep(config["latency_ms"] / 1000)
+    stats["search"] += 1
+    if config["empty_rate"] and _rng.random() < config["empty_rate"]:
+        return {"search_parameters": {"engine": engine, "q": q}, "organic_results": []}
+    return {
+        "search_parameters": {"engine": engine, "q": q},
+        "organic_results": [
+            {
+                "position": i,
+                "title": f"Result {i} for {q}",
+                "link": f"https://example.com/{i}",
+                "snippet": (
+                    f"{q}: mild scalp irritation or itching is reported by some users; "
+                    "consult a doctor if you are pregnant or on medication."
+                ),
+            }
+            for i in range(1, 4)
+        ],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8766)
+    uvicorn.run(app, host="127.0.0.1", port=parser.parse_args().port, log_level="warning")
@@ -0,0 +1,98 @@
+"""
+Static Traya catalogue site built from the recorded fixtures.
+
+Serves what the scraper reads from traya.health: the paginated
+`/products.json` feed, `/products/<handle>.js`, the product HTML pages and
+`/collections/all`, with `ETag`s so re-crawls get 304s. `copies` in
+`POST /_config` (e.g. `{"copies": 50}`) inflates the feed with renamed
+copies of the fixture products for larger catalogues.
+
+Point the scraper at it with `TRAYA_BASE_URL=http://127.0.0.1:<port>`. Run
+standalone from `backend/`:
+
+    python -m benchmarks.stub_traya --port 8767
+"""
+
+import argparse
+import copy
+import hashlib
+import json
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List
+
+import uvicorn
+from fastapi import FastAPI, Request, Response
+
+
+FIXTURES = Path(__file__).parent / "fixtures" / "traya"
+
+DEFAULT_CONFIG: Dict[str, Any] = {"copies": 1}
+
+app = FastAPI()
+config: Dict[str, Any] = dict(DEFAULT_CONFIG)
+stats: Counter = Counter()
+
+
+def _catalogue() -> List[Dict[str, Any]]:
+    products = json.loads((FIXTURES / "products.json").read_text(encoding="utf-8"))["products"]
+    out = list(products)
+    for n in range(1, int(config["copies"])):
+        for product in products:
+            clone = copy.deepcopy(product)
+            clone["id"] = product["id"] * 1000 + n
+            clone["handle"] = f"{product['handle']}-{n}"
+            clone["title"] = f"{product['title']} {n}"
+            out.append(clone)
+    return out
+
+
+def _send(request: Request, body: bytes, media_type: str) -> Response:
+    etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+    if request.headers.get("if-none-match") == etag:
+        stats["304"] += 1
+        return Response(status_code=304, headers={"ETag": etag})
+    stats["200"] += 1
+    return Response(body, media_type=media_type, headers={"ETag": etag})
+
+
+@app.post("/_config")
+async def set_config(request: Request) -> Dict[str, Any]:
+    config.clear()
+    config.update(DEFAULT_CONFIG)
+    config.update(await request.json())
+    stats.clear()
+    return config
+
+
+@app.get("/_stats")
+async def get_stats() -> Dict[str, int]:
+    return dict(stats)
+
+
+@app.get("/products.json")
+async def feed(request: Request, limit: int = 30, page: int = 1) -> Response:
+    batch = _catalogue()[(page - 1) * limit : page * limit]
+    return _send(request, json.dumps({"products": batch}).encode(), "application/json")
+
+
+@app.get("/collections/all")
+async def collection(request: Request) -> Response:
+    return _send(request, (FIXTURES / "collections" / "all.html").read_bytes(), "text/html")
+
+
+@app.get("/products/{name}")
+async def product(request: Request, name: str) -> Response:
+    handle, is_js = (name[:-3], True) if name.endswith(".js") else (name, False)
+    path = FIXTURES / "products" / (f"{handle}.js" if is_js else f"{handle}.html")
+    if not path.is_file():
+        stats["404"] += 1
+        return Response(status_code=404)
+    media_type = "application/javascript" if is_js else "text/html"
+    return _send(request, path.read_bytes(), media_type)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8767)
+    uvicorn.run(app, host="127.0.0.1", port=parser.parse_args().port, log_level="warning")
@@ -0,0 +1,47 @@
+"""
+Multi-worker deployment: gunicorn master with uvicorn workers.
+
+    gunicorn app.main:app -c gunicorn.conf.py
+
+The master imports the app and builds the read-only catalogue structures
+(`app.preload`) once, then forks; each worker starts from that state and
+runs the app's startup hook for what must be per process (database pools,
+LLM clients, Chroma). Scrapes and index builds reach every worker through
+the shared catalogue version file (`CATALOGUE_VERSION_PATH`) and, with the
+NumPy backend, the shared on-disk vector index.
+
+Settings come from the environment: WEB_CONCURRENCY (workers, default 2),
+PORT (default 8001), BIND, GUNICORN_TIMEOUT.
+"""
+
+import os
+
+from app.core.config import get_settings
+
+
+bind = os.environ.get("BIND", f"0.0.0.0:{os.environ.get('PORT', '8001')}")
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+
+
+def on_starting(server) -> None:
+    # Runs in the master after the app is imported, before any fork.
+    from app import preload
+
+    settings = get_settings()
+    if workers > 1 and not settings.catalogue_version_path:
+        server.log.warning(
+            "CATALOGUE_VERSION_PATH is empty: catalogue changes made through one "
+            "worker will not reach the others"
+        )
+    if workers > 1 and settings.vector_store_backend == "chroma":
+        server.log.warning(
+            "Chroma's embedded client is not multi-process safe: each worker keeps "
+            "its own index and misses writes made by the others; use "
+            "VECTOR_STORE_BACKEND=numpy"
+        )
+    preload()
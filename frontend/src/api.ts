@@ -18,6 +18,8 @@ export interface Product {
 export interface ChatMessage {
   role: "user" | "assistant";
   content: string;
+  // Products shown with an assistant reply; lets follow-ups refer to them.
+  recommended_product_ids?: number[];
 }
 
 export interface RecommendedProduct {
@@ -30,8 +32,20 @@ export interface ChatResponse {
   recommended_products: RecommendedProduct[];
 }
 
-export async function fetchProducts(): Promise<Product[]> {
-  const res = await fetch(`${API_BASE_URL}/products`);
+export interface ProductPage {
+  items: Product[];
+  next_cursor: string | null;
+}
+
+// Columns a product card needs; the listing sends nothing else.
+const CARD_FIELDS = "id,title,price,image_url,category";
+
+export async function fetchProducts(cursor?: string | null): Promise<ProductPage> {
+  const params = new URLSearchParams({ fields: CARD_FIELDS });
+  if (cursor) {
+    params.set("cursor", cursor);
+  }
+  const res = await fetch(`${API_BASE_URL}/products/?${params}`);
   if (!res.ok) {
     throw new Error("Failed to fetch products");
   }
@@ -46,13 +60,16 @@ export async function fetchProduct(id: number): Promise<Product> {
   return res.json();
 }
 
+// The server only looks at recent turns; older ones needn't be sent.
+const MAX_SENT_MESSAGES = 12;
+
 export async function sendChat(
   messages: ChatMessage[]
 ): Promise<ChatResponse> {
   const res = await fetch(`${API_BASE_URL}/chat/`, {
     method: "POST",
     headers: { "Content-Type": "application/json" },
-    body: JSON.stringify({ messages }),
+    body: JSON.stringify({ messages: messages.slice(-MAX_SENT_MESSAGES) }),
   });
   if (!res.ok) {
     throw new Error("Chat request failed");
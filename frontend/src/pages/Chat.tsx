@@ -54,7 +54,11 @@ export function ChatPage() {
 
       setMessages((prev) => [
         ...prev,
-        { role: "assistant", content: response.reply },
+        {
+          role: "assistant",
+          content: response.reply,
+          recommended_product_ids: response.recommended_products.map((r) => r.product_id),
+        },
       ]);
     } catch (err) {
       setError((err as Error).message);
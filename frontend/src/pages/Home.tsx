@@ -6,12 +6,15 @@ export function HomePage() {
   const [products, setProducts] = useState<Product[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     async function load() {
       try {
-        const data = await fetchProducts();
-        setProducts(data);
+        const page = await fetchProducts();
+        setProducts(page.items);
+        setNextCursor(page.next_cursor);
       } catch (err) {
         setError((err as Error).message);
       } finally {
@@ -21,6 +24,19 @@ export function HomePage() {
     load();
   }, []);
 
+  async function loadMore() {
+    setLoadingMore(true);
+    try {
+      const page = await fetchProducts(nextCursor);
+      setProducts((prev) => [...prev, ...page.items]);
+      setNextCursor(page.next_cursor);
+    } catch (err) {
+      setError((err as Error).message);
+    } finally {
+      setLoadingMore(false);
+    }
+  }
+
   if (loading) {
     return <p className="status">Loading products...</p>;
   }
@@ -40,6 +56,11 @@ export function HomePage() {
           <ProductCard key={p.id} product={p} />
         ))}
       </div>
+      {nextCursor && (
+        <button className="load-more" onClick={loadMore} disabled={loadingMore}>
+          {loadingMore ? "Loading..." : "Load more"}
+        </button>
+      )}
     </div>
   );
 }